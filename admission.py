@@ -0,0 +1,169 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class Rejected(Exception):
+    """A request turned away by admission control; retry_after is in seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"{reason}: retry after {retry_after:.2f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_seconds(self):
+        """Whole seconds, at least 1, for Retry-After headers and user-facing text."""
+        return max(1, math.ceil(self.retry_after))
+
+
+class RateLimiter:
+    """Token bucket per key: `rate` requests per second on average, bursts of up to `burst`.
+
+    Buckets are kept for the max_keys most recently seen keys; an evicted key
+    comes back with a full bucket, which it would mostly have refilled anyway.
+    A rate of 0 or less disables the limiter.
+    """
+
+    def __init__(self, rate, burst=None, max_keys=100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def acquire(self, key, cost=1.0):
+        """Take `cost` tokens for key. Returns 0 when allowed, otherwise the seconds until it would be."""
+        if not self.enabled:
+            return 0.0
+        now = self._clock()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / self.rate
+                self.throttled += 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "burst": self.burst, "keys": len(self._buckets), "throttled": self.throttled}
+
+
+class ConcurrencyLimiter:
+    """Global cap on requests being worked on, with load shedding based on queue time.
+
+    Up to max_concurrent requests run at once. Later ones queue for a free slot
+    for at most max_wait seconds and are then shed, so a request is either
+    served after a bounded wait or refused quickly, never left to time out.
+    Arrivals that find max_waiting requests already queued are shed at once.
+    """
+
+    def __init__(self, max_concurrent=64, max_wait=0.25, max_waiting=256, retry_after=1.0, clock=time.monotonic):
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.max_waiting = max_waiting
+        self.retry_after = retry_after
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    @property
+    def enabled(self):
+        return self.max_concurrent > 0
+
+    def acquire(self, queued=0.0):
+        """Wait for a slot; returns the seconds spent queued here or raises Rejected("shed").
+
+        `queued` is time the request already spent waiting upstream (e.g. in a
+        proxy or the accept backlog) and counts against max_wait.
+        """
+        if not self.enabled:
+            return 0.0
+        with self._cond:
+            if queued >= self.max_wait:
+                self.shed += 1
+                raise Rejected("shed", self.retry_after)
+            # Queued requests go first, so a burst cannot jump the queue
+            if self._active < self.max_concurrent and not self._waiting:
+                self._active += 1
+                self.admitted += 1
+                return 0.0
+            if self._waiting >= self.max_waiting:
+                self.shed += 1
+                raise Rejected("shed", self.retry_after)
+            start = self._clock()
+            deadline = start + self.max_wait - queued
+            self._waiting += 1
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        self.shed += 1
+                        raise Rejected("shed", self.retry_after)
+                    self._cond.wait(remaining)
+                self._active += 1
+                self.admitted += 1
+            finally:
+                self._waiting -= 1
+            return self._clock() - start
+
+    def release(self):
+        if not self.enabled:
+            return
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, queued=0.0):
+        waited = self.acquire(queued)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_wait": self.max_wait,
+                "active": self._active,
+                "waiting": self._waiting,
+                "admitted": self.admitted,
+                "shed": self.shed,
+            }
+
+
+def parse_request_start(value, now=None):
+    """Seconds since a proxy's X-Request-Start stamp ("t=<epoch>" in s, ms or us), or 0 if unusable."""
+    if not value:
+        return 0.0
+    try:
+        stamp = float(value.strip().removeprefix("t="))
+    except ValueError:
+        return 0.0
+    if stamp > 1e14:
+        stamp /= 1e6
+    elif stamp > 1e11:
+        stamp /= 1e3
+    queued = (time.time() if now is None else now) - stamp
+    # Clock skew between hosts can make it negative; anything over an hour is not a queue
+    return queued if 0 < queued < 3600 else 0.0
@@ -1,142 +1,494 @@
-from flask import Flask, render_template, request, jsonify, session, send_file, make_response
-from flask_socketio import SocketIO
-import json, random, logging
-import spacy
 import os
-from difflib import get_close_matches
+
+# Production concurrency mode: threading (default), eventlet or gevent.
+# Green-thread modes must patch the standard library before anything else imports it.
+ASYNC_MODE = os.environ.get("ASYNC_MODE", "threading").lower()
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, render_template, request, jsonify, session, g, send_file, make_response, Response, stream_with_context, url_for
+from flask_socketio import SocketIO, join_room, leave_room
+import json, random, logging, time, secrets
 from werkzeug.utils import secure_filename
-from difflib import SequenceMatcher
+from werkzeug.middleware.proxy_fix import ProxyFix
 import datetime
+from intent_matcher import IntentMatcher
+from spelling import SpellingIndex, pattern_vocabulary
+from intent_classifier import ClassifierLoader
+from keywords import SpacyLoader, KeywordExtractor
+from session_store import create_session_store
+from group_directory import MemoryGroupDirectory, SQLiteGroupDirectory
+from sqlite_pubsub import SQLiteManager
+from worker_pool import WorkerPool, PoolSaturated
+from admission import RateLimiter, ConcurrencyLimiter, Rejected, parse_request_start
+from faq_index import FaqIndex
+from quiz_grader import QuizGrader
+from content_store import ContentStore
+from chat_log import ChatLog
+from metrics import Registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from log_queue import AsyncLogging, sampled_logger
+from notes_index import NotesIndex
+from media_store import MediaStore, UploadRejected
+from static_assets import StaticAssets, EncodedBody, json_body
+from cache_utils import LRUCache
+from reminders import ReminderStore, ReminderScheduler, parse_reminder, parse_when, local_now, to_timestamp, to_ics, reminder_event
 
-# Load NLP model for keyword extraction
-nlp = spacy.load("en_core_web_sm")
+# Load the NLP model for keyword extraction in the background; extract_keywords
+# uses a regex fallback until it is ready
+nlp_loader = SpacyLoader(os.environ.get("SPACY_MODEL", "en_core_web_sm")).start()
 
 app = Flask(__name__)
-app.secret_key = os.environ.get("SECRET_KEY", "dev_secret")  # Added for session security
-socketio = SocketIO(app)
-logging.basicConfig(level=logging.INFO)
-
-# Load intents
-with open("intents.json", encoding="utf-8") as f:
-    intents = json.load(f)["intents"]
-
-user_quiz_data = {}  # Stores question index and score per user
-# User context for multi-turn
-user_context = {}
-
-# Dummy quiz data
-quiz_bank = {
-    "python": [
-        "What is a variable in Python?",
-        "Define a function in Python.",
-        "What is a list comprehension?",
-        "What is the difference between a list and a tuple?",
-        "How do you handle exceptions in Python?"
-    ],
-    "java": [
-        "What is a class in Java?",
-        "Explain inheritance in Java.",
-        "What is JVM?",
-        "What are access modifiers?",
-        "Difference between overloading and overriding?"
-    ],
-    "c++": [
-        "What is a pointer?",
-        "Explain constructors and destructors.",
-        "What is the use of 'this' pointer?",
-        "What are templates in C++?",
-        "Define function overloading."
-    ],
-    "c": [
-        "What is a header file in C?",
-        "Difference between malloc() and calloc()?",
-        "Explain pointers in C.",
-        "What is a static variable?",
-        "What are structures in C?"
-    ],
-    "ai": [
-        "What is artificial intelligence?",
-        "Name a type of AI.",
-        "What is supervised learning?",
-        "What is overfitting?",
-        "What are neural networks?"
-    ]
-}
+# Signs the session cookie, which carries the user id that chat history and
+# reminders are keyed on. A random key logs everyone out on restart; set
+# SECRET_KEY to keep sessions.
+app.secret_key = os.environ.get("SECRET_KEY") or secrets.token_hex(32)
 
-# In-memory FAQ base for demo
-FAQ_BASE = [
-    {"q": "How do I reset my password?", "a": "Go to settings and click 'Reset Password'."},
-    {"q": "How do I start a quiz?", "a": "Click the Quiz button or type 'Start a quiz'."},
-    {"q": "What languages are supported?", "a": "English, Spanish, French, German, Hindi, Chinese, Japanese, Russian, Arabic, Italian, Portuguese."},
-    {"q": "How do I upload a file?", "a": "Click the File Upload button in the sidebar."},
-]
-
-JOKES = [
-    "Why did the computer go to the doctor? Because it had a virus!",
-    "Why do programmers prefer dark mode? Because light attracts bugs!",
-    "Why was the math book sad? Because it had too many problems!",
-]
-FACTS = [
-    "Did you know? The first computer bug was an actual moth.",
-    "Python is named after Monty Python, not the snake.",
-    "The first 1GB hard disk was announced in 1980 and weighed 550 pounds!",
-]
-GAMES = [
-    "Let's play Rock, Paper, Scissors! Type your choice.",
-    "Guess a number between 1 and 10! (Demo only)",
-    "Try this riddle: What has keys but can't open locks? (A piano)",
-]
-
-RESOURCE_TOPICS = {
-    "python": [
-        ("Official Python Docs", "https://docs.python.org/3/"),
-        ("GeeksforGeeks Python", "https://www.geeksforgeeks.org/tag/python/"),
-        ("YouTube Python Tutorials", "https://youtube.com/results?search_query=python+tutorial"),
-    ],
-    "java": [
-        ("Official Java Docs", "https://docs.oracle.com/javase/8/docs/"),
-        ("GeeksforGeeks Java", "https://www.geeksforgeeks.org/tag/java/"),
-        ("YouTube Java Tutorials", "https://youtube.com/results?search_query=java+tutorial"),
-    ],
-    "ai": [
-        ("Wikipedia AI", "https://en.wikipedia.org/wiki/Artificial_intelligence"),
-        ("YouTube AI Tutorials", "https://youtube.com/results?search_query=ai+tutorial"),
-    ],
-}
+# Several worker processes (see serve.py) share emits through MESSAGE_QUEUE:
+# redis://, amqp:// or kafka:// across hosts, or sqlite:///path for workers on one host.
+# With a queue configured, sessions, groups, reminders and the chat log live in
+# SQLite files under STATE_DIR and uploads under UPLOAD_FOLDER, which every worker shares.
+MESSAGE_QUEUE = os.environ.get("MESSAGE_QUEUE")
+STATE_DIR = os.environ.get("STATE_DIR", "")
+if STATE_DIR:
+    # The stores below open their SQLite files in it as soon as they are created
+    os.makedirs(STATE_DIR, exist_ok=True)
+
+def state_path(name):
+    return os.path.join(STATE_DIR, name)
+
+if MESSAGE_QUEUE and MESSAGE_QUEUE.startswith("sqlite://"):
+    socketio = SocketIO(app, async_mode=ASYNC_MODE, client_manager=SQLiteManager(MESSAGE_QUEUE))
+else:
+    socketio = SocketIO(app, async_mode=ASYNC_MODE, message_queue=MESSAGE_QUEUE)
+
+# Number of reverse proxies in front of the app. Each appends the address it
+# received the request from to X-Forwarded-For; ProxyFix takes the client IP
+# from the entry the outermost trusted proxy added, so per-IP rate limits see
+# real clients rather than the proxy. With 0 the header is ignored, since a
+# client could set it to anything. Wraps the Socket.IO middleware too, so
+# socket handshakes get the same address.
+TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", "0"))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES, x_host=TRUSTED_PROXIES)
+
+# spaCy parsing and intent classification run here, off the socket handler
+nlp_pool = WorkerPool(
+    max_workers=int(os.environ.get("NLP_WORKERS", "4")),
+    max_queue=int(os.environ.get("NLP_QUEUE", "64")),
+    async_mode=ASYNC_MODE,
+)
+# Log records are handed to a background writer thread; the per-message input and
+# response lines are sampled so a busy server does not log every chat message
+async_logging = AsyncLogging(level=logging.INFO, max_queue=int(os.environ.get("LOG_QUEUE_SIZE", "10000")))
+message_log, message_log_sampler = sampled_logger("chat.messages", float(os.environ.get("MESSAGE_LOG_SAMPLE_RATE", "0.1")))
+
+# Prometheus-style metrics served at /metrics
+metrics = Registry()
+STAGE_SECONDS = metrics.histogram("studybuddy_stage_seconds", "Time spent in each stage of the message path.", ["stage"])
+REQUEST_SECONDS = metrics.histogram("studybuddy_http_request_seconds", "REST request latency until the response is returned.", ["route", "method"])
+REQUESTS = metrics.counter("studybuddy_http_requests_total", "REST requests by route and status.", ["route", "method", "status"])
+MESSAGES = metrics.counter("studybuddy_messages_total", "Chat messages handled.")
+INTENTS = metrics.counter("studybuddy_intents_total", "Messages answered by intent and how it was found.", ["intent", "source"])
+FALLBACKS = metrics.counter("studybuddy_fallbacks_total", "Messages that got the fallback reply.", ["reason"])
+SPELL_CORRECTED = metrics.counter("studybuddy_spelling_corrected_total", "Messages matched to an intent only after spelling correction.")
+OVERLOADED = metrics.counter("studybuddy_overloaded_total", "Messages rejected because the NLP pool was saturated.")
+socket_connections = metrics.counter("studybuddy_socket_connections_total", "Socket.IO connects and disconnects.", ["event"])
+
+# Intents, quizzes, FAQs and fun content live in JSON files. Derived indexes are
+# rebuilt only for the files that changed and swapped in without a restart.
+CONTENT_DIR = os.environ.get("CONTENT_DIR", "content")
+FAQ_MIN_SCORE = float(os.environ.get("FAQ_MIN_SCORE", "0.45"))
+QUIZ_PASS_SCORE = float(os.environ.get("QUIZ_PASS_SCORE", "0.3"))
+SPELLING_INDEX = os.environ.get("SPELLING_INDEX", "spelling.json")
+SPELL_CORRECTION = os.environ.get("SPELL_CORRECTION", "1") == "1"
+# Extra correctly spelled words (one per line) on top of the dictionary saved by train_model.py
+SPELLING_DICTIONARY = os.environ.get("SPELLING_DICTIONARY", "/usr/share/dict/words")
+
+def read_word_list(path):
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            return {line.strip().lower() for line in f if line.strip().isalpha()}
+    except OSError:
+        return set()
+
+spelling_dictionary = read_word_list(SPELLING_DICTIONARY) if SPELLING_DICTIONARY else set()
+
+def build_spelling_index(intents):
+    """Use the index saved by train_model.py while it covers the current pattern vocabulary.
+
+    None when there is no English dictionary to tell real words from typos:
+    correcting against the pattern words alone turns "byte" into "bye".
+    """
+    index = None
+    if os.path.exists(SPELLING_INDEX):
+        try:
+            index = SpellingIndex.load(SPELLING_INDEX)
+            if index.words != pattern_vocabulary(intents):
+                index = SpellingIndex.from_intents(intents, dictionary=index.dictionary)
+        except Exception as e:
+            logging.warning(f"Ignoring spelling index {SPELLING_INDEX}: {e}")
+    if index is None:
+        index = SpellingIndex.from_intents(intents)
+    if spelling_dictionary:
+        index.add_dictionary(spelling_dictionary)
+    if not index.dictionary:
+        logging.warning(f"Spelling correction is off: {SPELLING_INDEX} has no dictionary (run train_model.py) "
+                        f"and SPELLING_DICTIONARY is empty")
+        return None
+    return index
+
+content = ContentStore()
+content.register("intents", os.environ.get("INTENTS_FILE", "intents.json"), parse=lambda data: data["intents"], derived={
+    # Compile every pattern once; predict_intent then scans each message a single time
+    "intent_matcher": IntentMatcher,
+    # Typo-tolerant second pass for messages no pattern matched exactly
+    "spelling_index": build_spelling_index,
+    # First intent in file order wins for duplicate tags
+    "intents_by_tag": lambda intents: {intent["tag"]: intent for intent in reversed(intents)},
+})
+content.register("quiz_bank", os.path.join(CONTENT_DIR, "quiz_bank.json"), derived={
+    # Reference answers are vectorized once per load
+    "quiz_grader": lambda bank: QuizGrader(bank, threshold=QUIZ_PASS_SCORE),
+})
+content.register("faq", os.environ.get("FAQ_FILE") or os.path.join(CONTENT_DIR, "faq.json"), derived={
+    "faq_index": FaqIndex,
+})
+content.register("jokes", os.path.join(CONTENT_DIR, "jokes.json"))
+content.register("facts", os.path.join(CONTENT_DIR, "facts.json"))
+content.register("games", os.path.join(CONTENT_DIR, "games.json"))
+content.register("resources", os.path.join(CONTENT_DIR, "resources.json"))
+content.reload()
+if os.environ.get("CONTENT_WATCH", "1") == "1":
+    content.watch(float(os.environ.get("CONTENT_WATCH_INTERVAL", "2")))
+
+# Keyword results are cached per normalized message; warmed from the intent patterns
+keyword_extractor = KeywordExtractor(
+    nlp_loader,
+    maxsize=int(os.environ.get("KEYWORD_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("KEYWORD_CACHE_TTL", "3600")),
+)
+def warmup_keywords(intents):
+    keyword_extractor.warmup(pattern for intent in intents for pattern in intent.get("patterns", []))
+
+nlp_loader.on_ready(lambda nlp: warmup_keywords(content.current()["intents"]))
+content.on_reload(lambda snapshot, changed: warmup_keywords(snapshot["intents"]) if "intents" in changed else None)
+
+# Trained TF-IDF + NB model, used when no pattern matches the message
+CLASSIFIER_THRESHOLD = float(os.environ.get("CLASSIFIER_THRESHOLD", "0.35"))
+CLASSIFIER_BATCH_WINDOW_MS = float(os.environ.get("CLASSIFIER_BATCH_WINDOW_MS", "5"))
+# Prefer the memory-mapped artifact (no sklearn/NLTK import); fall back to the pickle
+INTENT_MODEL = os.environ.get("INTENT_MODEL") or ("intent_model.bin" if os.path.exists("intent_model.bin") else "intent_model.pkl")
+# Loaded in the background like spaCy; classify_intent skips the model until it is ready
+classifier_loader = ClassifierLoader(
+    INTENT_MODEL,
+    threshold=CLASSIFIER_THRESHOLD,
+    # Green-thread modes classify inline on the NLP pool's OS threads instead of batching
+    batch_window=CLASSIFIER_BATCH_WINDOW_MS / 1000 if ASYNC_MODE == "threading" else 0,
+).start()
+
+# Server-side conversation history, written in batches off the socket handler
+chat_log = ChatLog(os.environ.get("CHAT_LOG_DB", state_path("chat_history.db")))
+
+# Group chat rooms created through /group-chat and their member user_ids
+chat_groups = SQLiteGroupDirectory(os.environ.get("GROUPS_DB", state_path("groups.db"))) if MESSAGE_QUEUE else MemoryGroupDirectory()
+
+# User context for multi-turn, including the active quiz (question index and score).
+# Bounded and expiring; SESSION_BACKEND=sqlite shares it between worker processes.
+session_store = create_session_store(
+    default_backend="sqlite" if MESSAGE_QUEUE else "memory", default_path=state_path("sessions.db"))
+
+metrics.gauge_callback("studybuddy_active_sessions", "Live user sessions in the session store.",
+                       lambda: session_store.stats()["live_sessions"])
+metrics.gauge_callback("studybuddy_socket_clients", "Connected Socket.IO clients.",
+                       lambda: socket_connections.value("connect") - socket_connections.value("disconnect"))
+metrics.counter_callback("studybuddy_keyword_cache_total", "Keyword cache lookups by result.",
+                         lambda: {("hit",): keyword_extractor.cache.hits, ("miss",): keyword_extractor.cache.misses}, ["result"])
+metrics.gauge_callback("studybuddy_nlp_pool_tasks", "NLP pool tasks running or queued.",
+                       lambda: {(k,): nlp_pool.stats()[k] for k in ("in_flight", "queue_depth")}, ["state"])
+metrics.counter_callback("studybuddy_log_records_dropped_total", "Log records dropped by sampling or a full log queue.",
+                         lambda: {("sampled",): message_log_sampler.dropped, ("queue_full",): async_logging.stats()["dropped"]}, ["reason"])
+
+# Reminders persist in SQLite and fire into the user's room from a scheduler thread
+REMINDER_MAX_PER_USER = int(os.environ.get("REMINDER_MAX_PER_USER", "100"))
+
+def deliver_reminders(user_id, reminders):
+    """Send everything due for one user in the same tick as a single message."""
+    message = "\n".join(f"⏰ Reminder: {reminder.text}" for reminder in reminders)
+    socketio.emit("response", {"message": message, "user_id": user_id}, to=user_room(user_id))
+    chat_log.append(user_id, "bot", message)
+
+reminder_scheduler = ReminderScheduler(ReminderStore(os.environ.get("REMINDER_DB", state_path("reminders.db"))), deliver_reminders)
+if os.environ.get("REMINDER_SCHEDULER", "1") == "1":
+    reminder_scheduler.start()
+metrics.gauge_callback("studybuddy_reminders_pending", "Reminders queued to fire in this process, including cancelled ones not yet skipped.",
+                       lambda: reminder_scheduler.stats()["pending"])
+metrics.counter_callback("studybuddy_reminders_delivered_total", "Reminders delivered by this process.",
+                         lambda: reminder_scheduler.delivered)
+
+# Offline study notes (markdown/text files in NOTES_DIR) in an on-disk BM25 index,
+# searched by the study_material and explain_topic replies and by /resources
+NOTES_DIR = os.environ.get("NOTES_DIR", "notes")
+NOTES_RESULTS = int(os.environ.get("NOTES_RESULTS", "3"))
+# Request words that say what the user wants rather than what about
+NOTES_QUERY_IGNORE = {"define", "explain", "learn", "material", "materials", "notes", "provide", "resource",
+                      "resources", "show", "study", "teach", "tell", "tutorial"}
+notes_index = NotesIndex(os.environ.get("NOTES_INDEX", state_path("notes_index")))
+if os.environ.get("CONTENT_WATCH", "1") == "1":
+    notes_index.watch(NOTES_DIR, float(os.environ.get("NOTES_WATCH_INTERVAL", "10")))
+else:
+    notes_index.update(NOTES_DIR)
+metrics.gauge_callback("studybuddy_notes_documents", "Study notes in the search index.",
+                       lambda: notes_index.stats()["documents"])
+
+# Admission control for chat messages and REST calls: token buckets per user and
+# per client IP, then a global concurrency limit that sheds requests once they
+# have queued for ADMISSION_MAX_WAIT_MS. Rejections get a "busy, retry after" reply.
+# A rate or concurrency limit of 0 turns that check off.
+user_limiter = RateLimiter(float(os.environ.get("USER_RATE_LIMIT", "5")), float(os.environ.get("USER_RATE_BURST", "10")))
+ip_limiter = RateLimiter(float(os.environ.get("IP_RATE_LIMIT", "20")), float(os.environ.get("IP_RATE_BURST", "40")))
+admission = ConcurrencyLimiter(
+    max_concurrent=int(os.environ.get("ADMISSION_MAX_CONCURRENT", "32")),
+    max_wait=float(os.environ.get("ADMISSION_MAX_WAIT_MS", "250")) / 1000,
+    max_waiting=int(os.environ.get("ADMISSION_MAX_WAITING", "256")),
+    retry_after=float(os.environ.get("SHED_RETRY_AFTER", "1")),
+)
+# Cheap endpoints that monitoring and page loads depend on
+ADMISSION_EXEMPT = {"health", "ready", "metrics_endpoint", "static", "asset", "media"}
+THROTTLED = metrics.counter("studybuddy_throttled_total", "Requests rejected by a per-user or per-IP rate limit.", ["scope", "transport"])
+SHED = metrics.counter("studybuddy_shed_total", "Requests shed because the server was saturated.", ["transport"])
+metrics.gauge_callback("studybuddy_admission_requests", "Requests holding or waiting for an admission slot.",
+                       lambda: {(k,): admission.stats()[k] for k in ("active", "waiting")}, ["state"])
+
+def check_rate(user_id, ip, transport):
+    """Raise Rejected when the user's or the IP's bucket is empty."""
+    for scope, limiter, key in (("user", user_limiter, user_id), ("ip", ip_limiter, ip)):
+        if key:
+            wait = limiter.acquire(key)
+            if wait:
+                THROTTLED.inc(scope, transport)
+                raise Rejected(scope, wait)
+
+def admit(transport, queued=0.0):
+    """Take an admission slot, recording the queue time; the caller must release it.
+
+    `queued` is time already spent waiting before the app saw the request.
+    """
+    try:
+        waited = admission.acquire(queued)
+    except Rejected:
+        SHED.inc(transport)
+        raise
+    STAGE_SECONDS.observe(queued + waited, "admission_queue")
+
+def busy_message(rejected):
+    if rejected.reason == "shed":
+        return f"I'm a little overloaded right now. Please try again in {rejected.retry_after_seconds} second(s)."
+    return f"You're sending messages a bit fast. Please wait {rejected.retry_after_seconds} second(s) and try again."
 
 SUPPORTED_LANGUAGES = ['English', 'Spanish', 'French', 'German', 'Hindi', 'Chinese', 'Japanese', 'Russian', 'Arabic', 'Italian', 'Portuguese']
 
-UPLOAD_FOLDER = os.path.join('static', 'img', 'avatars')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Uploaded images are stored by content hash and served from /media/<sha256>.<ext>
+UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", state_path("uploads"))
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB
+MEDIA_MAX_AGE = 365 * 24 * 3600  # Blob URLs never change content, so they can be cached for good
+media_store = MediaStore(UPLOAD_FOLDER, max_bytes=app.config['MAX_CONTENT_LENGTH'])
+
+# Script and stylesheet are served pre-compressed under fingerprinted URLs
+ASSET_MAX_AGE = 365 * 24 * 3600
+static_assets = StaticAssets()
+static_assets.add('js/script.js', os.path.join(app.static_folder, 'JS', 'script.js'))
+static_assets.add('css/style.css', os.path.join(app.static_folder, 'css', 'style.css'))
+
+# Serialized bodies of responses determined by their inputs and the content version
+response_cache = LRUCache(maxsize=int(os.environ.get("RESPONSE_CACHE_SIZE", "2048")))
+metrics.counter_callback("studybuddy_response_cache_total", "Response cache lookups by result.",
+                         lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses}, ["result"])
+
+def cached_body(key, build):
+    """The EncodedBody for key, built on first use. Keys carry the content version, so reloads invalidate them."""
+    body = response_cache.get(key)
+    if body is None:
+        body = build()
+        response_cache.set(key, body)
+    return body
+
+def send_body(body, mimetype='application/json', cache_control='no-cache'):
+    """Respond with the best encoding of a precomputed body; answers conditional GETs with 304."""
+    encoding, data = body.negotiate(request.accept_encodings)
+    response = Response(data, mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(body.etag_for(encoding))
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+def request_data():
+    """JSON body of a POST, or the query string of a GET or DELETE."""
+    if request.method != 'POST':
+        return request.args.to_dict()
+    return request.get_json(silent=True) or {}
+
+# Polling needs every request of a connection to reach the same worker; websocket does not
+SOCKET_TRANSPORTS = os.environ.get("SOCKET_TRANSPORTS", "websocket" if MESSAGE_QUEUE else "polling,websocket")
+
+@app.context_processor
+def inject_asset_url():
+    return {
+        'asset_url': lambda name: url_for('asset', name=static_assets.url_name(name)),
+        'socket_transports': SOCKET_TRANSPORTS,
+    }
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.before_request
+def admit_request():
+    if request.endpoint in ADMISSION_EXEMPT:
+        return None
+    try:
+        check_rate(session.get('user_id'), request.remote_addr, "rest")
+        # A front proxy's arrival stamp also covers time queued in the proxy and the accept backlog
+        admit("rest", parse_request_start(request.headers.get('X-Request-Start')))
+    except Rejected as e:
+        status = 503 if e.reason == "shed" else 429
+        response = jsonify({'success': False, 'error': 'busy', 'reason': e.reason,
+                            'message': busy_message(e), 'retry_after': e.retry_after_seconds})
+        response.status_code = status
+        response.headers['Retry-After'] = str(e.retry_after_seconds)
+        return response
+    g.admitted = True
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    if g.pop('admitted', False):
+        admission.release()
+
+@app.after_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Label by URL rule, not path, so label cardinality stays bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route, request.method)
+        REQUESTS.inc(route, request.method, str(response.status_code))
+    return response
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
 @app.route("/")
 def index():
-    return render_template("index.html")
+    # Issue the session id before the page opens its socket, which reuses the cookie
+    current_user_id()
+    # Rendered once per asset version: the page only changes when the fingerprinted URLs do
+    body = cached_body(('index', static_assets.version), lambda: EncodedBody(render_template("index.html").encode("utf-8")))
+    return send_body(body, mimetype='text/html')
+
+@app.route("/assets/<path:name>")
+def asset(name):
+    found = static_assets.lookup(name)
+    if not found:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    return send_body(found.body, mimetype=found.mimetype, cache_control=f'public, max-age={ASSET_MAX_AGE}, immutable')
 
 @app.route("/health")
 def health():
-    """Health check endpoint for deployment readiness."""
-    return jsonify({'status': 'ok', 'time': datetime.datetime.utcnow().isoformat()})
+    """Liveness check: the process is up and serving, whether or not the models have loaded."""
+    payload = {
+        'status': 'ok',
+        'ready': nlp_loader.ready,
+        'nlp': nlp_loader.state,
+        'time': datetime.datetime.utcnow().isoformat(),
+        'pid': os.getpid(),
+    }
+    payload['keyword_cache'] = keyword_extractor.cache.stats()
+    payload['sessions'] = session_store.stats()
+    payload['nlp_pool'] = nlp_pool.stats()
+    payload['chat_log'] = chat_log.stats()
+    payload['media'] = media_store.stats()
+    payload['reminders'] = reminder_scheduler.stats()
+    payload['notes'] = notes_index.stats()
+    payload['admission'] = dict(admission.stats(), user_limiter=user_limiter.stats(), ip_limiter=ip_limiter.stats())
+    payload['logging'] = dict(async_logging.stats(), sampled_out=message_log_sampler.dropped)
+    payload['intent_classifier'] = {'state': classifier_loader.state, 'load_seconds': classifier_loader.load_seconds}
+    if classifier_loader.classifier:
+        payload['intent_classifier'].update(classifier_loader.classifier.stats.snapshot())
+    return jsonify(payload)
+
+@app.route("/ready")
+def ready():
+    """Readiness check: 503 until the spaCy model has finished loading."""
+    payload = {'ready': nlp_loader.ready, 'nlp': nlp_loader.state, 'load_seconds': nlp_loader.load_seconds}
+    if nlp_loader.error:
+        payload['error'] = nlp_loader.error
+    return jsonify(payload), 200 if nlp_loader.ready else 503
+
+@app.route("/content-version")
+def content_version():
+    """Version (ETag) of the loaded content, so clients can cache content-derived responses."""
+    snapshot = content.current()
+    etag = f'"{snapshot.version}"'
+    if request.headers.get('If-None-Match') == etag:
+        return '', 304, {'ETag': etag}
+    response = jsonify({'version': snapshot.version, 'sources': snapshot.hashes})
+    response.headers['ETag'] = etag
+    return response
+
+def save_upload():
+    """Stream the request's image into the media store: a multipart 'file' field or a raw image body.
+
+    Returns (blob, client filename); raises UploadRejected.
+    """
+    if request.mimetype == 'multipart/form-data':
+        if 'file' not in request.files:
+            raise UploadRejected('No file part')
+        file = request.files['file']
+        if not file or file.filename == '':
+            raise UploadRejected('No selected file')
+        # Werkzeug spools large multipart files to disk, so this reads from a temp file
+        return media_store.save_stream(file.stream), secure_filename(file.filename)
+    return media_store.save_stream(request.stream), None
+
+def media_url(name):
+    return f"/media/{name}"
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    if 'file' not in request.files:
-        return jsonify({'success': False, 'error': 'No file part'}), 400
-    file = request.files['file']
-    if not file or file.filename == '':
-        return jsonify({'success': False, 'error': 'No selected file'}), 400
-    filename = secure_filename(file.filename)
-    if not filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-        return jsonify({'success': False, 'error': 'Invalid file type'}), 400
-    save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     try:
-        file.save(save_path)
-    except Exception as e:
+        blob, filename = save_upload()
+    except UploadRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except OSError as e:
         logging.error(f"File save error: {e}")
         return jsonify({'success': False, 'error': 'File save failed'}), 500
-    return jsonify({'success': True, 'filename': filename})
+    return jsonify({
+        'success': True,
+        'filename': filename or blob.name,
+        'url': media_url(blob.name),
+        'sha256': blob.digest,
+        'duplicate': blob.duplicate,
+    })
+
+@app.route('/media/<name>')
+def media(name):
+    """Serve a stored blob or thumbnail; its name is its content hash, so the ETag is strong and permanent."""
+    path = media_store.path(name)
+    if not path:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    response = send_file(path, mimetype=media_store.mime_type(name), etag=name,
+                         max_age=MEDIA_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 @app.route('/generate-image', methods=['POST'])
 def generate_image():
@@ -168,22 +520,83 @@ def tts():
     audio_url = 'https://www.soundhelix.com/examples/mp3/SoundHelix-Song-1.mp3'
     return jsonify({'success': True, 'audio_url': audio_url, 'text': text})
 
-@app.route('/reminder', methods=['POST'])
+def parse_tz_offset(value):
+    """Minutes behind UTC as reported by JavaScript's getTimezoneOffset(); None if missing or invalid."""
+    try:
+        offset = int(value)
+    except (TypeError, ValueError):
+        return None
+    return offset if -16 * 60 <= offset <= 16 * 60 else None
+
+def schedule_reminder(user_id, text, when, tz_offset):
+    """Schedule a reminder at a local datetime; returns (reminder, None) or (None, error message)."""
+    if reminder_scheduler.store.count_pending(user_id) >= REMINDER_MAX_PER_USER:
+        return None, f"You already have {REMINDER_MAX_PER_USER} pending reminders."
+    return reminder_scheduler.schedule(user_id, text[:500], to_timestamp(when, tz_offset)), None
+
+def reminder_reply(user_id, message, tz_offset):
+    """Schedule a reminder phrased as 'remind me to ... at ...'; None if the message has no usable time."""
+    parsed = parse_reminder(message, local_now(reminder_scheduler.clock, tz_offset))
+    if not parsed:
+        return None
+    text, when = parsed
+    reminder, error = schedule_reminder(user_id, text, when, tz_offset)
+    if error:
+        return f"⏰ {error}"
+    return f"⏰ Reminder set: {text} on {when.strftime('%a %d %b at %H:%M')}."
+
+@app.route('/reminder', methods=['GET', 'POST', 'DELETE'])
 def reminder():
-    data = request.get_json()
+    data = request_data()
+    user_id = current_user_id()
+    if request.method == 'GET':
+        pending = reminder_scheduler.store.pending(user_id)
+        return jsonify({'success': True, 'reminders': [r._asdict() for r in pending]})
+    if request.method == 'DELETE':
+        reminder_id = data.get('id')
+        cancelled = isinstance(reminder_id, (int, str)) and str(reminder_id).isdigit() \
+            and reminder_scheduler.cancel(user_id, int(reminder_id))
+        return jsonify({'success': bool(cancelled)})
+
     text = data.get('text', '')
-    time = data.get('time', '')
-    # Placeholder: In production, schedule a real reminder
-    # Here, just return a confirmation message
-    return jsonify({'success': True, 'message': f"Reminder set for '{text}' at {time if time else '[time not specified]'} (demo only)"})
+    when_text = data.get('time', '')
+    if not isinstance(text, str) or not isinstance(when_text, str) or not text.strip():
+        return jsonify({'success': False, 'message': 'Please say what to remind you about.'}), 400
+    tz_offset = parse_tz_offset(data.get('tz_offset'))
+    when = parse_when(when_text, local_now(reminder_scheduler.clock, tz_offset)) if when_text else None
+    if not when:
+        return jsonify({'success': False, 'message': f"I couldn't understand the time '{when_text}'."}), 400
+    reminder, error = schedule_reminder(user_id, text.strip(), when, tz_offset)
+    if error:
+        return jsonify({'success': False, 'message': error}), 429
+    return jsonify({
+        'success': True,
+        'id': reminder.id,
+        'due': reminder.due,
+        'message': f"Reminder set for '{reminder.text}' on {when.strftime('%a %d %b at %H:%M')}.",
+    })
 
-@app.route('/calendar-export', methods=['POST'])
+@app.route('/calendar-export', methods=['GET', 'POST'])
 def calendar_export():
-    data = request.get_json()
+    """An .ics file with one event ('Study group at 5 pm friday') or all of the user's pending reminders."""
+    data = request_data()
     event = data.get('event', '')
-    # Placeholder: In production, generate and return a real calendar file or link
-    # Here, just return a confirmation message
-    return jsonify({'success': True, 'message': f"Event '{event}' exported to your calendar (demo only)"})
+    tz_offset = parse_tz_offset(data.get('tz_offset'))
+    now = reminder_scheduler.clock()
+    if isinstance(event, str) and event.strip():
+        event = event.strip()
+        local = local_now(reminder_scheduler.clock, tz_offset)
+        parsed = parse_reminder(f"remind me to {event}", local)
+        if parsed:
+            events = [{'uid': f"event-{int(now * 1000)}", 'summary': parsed[0], 'start': to_timestamp(parsed[1], tz_offset)}]
+        else:
+            # No time given: an all-day event today
+            events = [{'uid': f"event-{int(now * 1000)}", 'summary': event, 'date': local.date()}]
+    else:
+        events = [reminder_event(r) for r in reminder_scheduler.store.pending(current_user_id())]
+    response = Response(to_ics(events, now), mimetype='text/calendar')
+    response.headers['Content-Disposition'] = 'attachment; filename="astra_calendar.ics"'
+    return response
 
 @app.route('/quiz-customization', methods=['POST'])
 def quiz_customization():
@@ -202,261 +615,489 @@ def progress():
     # Here, just return a demo progress message
     return jsonify({'success': True, 'message': f"{user}'s progress: 5 quizzes completed, 3 reminders set, 2 study plans created (demo only)"})
 
-@app.route('/export', methods=['POST'])
+EXPORT_FORMATS = {
+    'txt': 'text/plain; charset=utf-8',
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+def export_lines(user_id, export_format):
+    """Render a user's history one message at a time so exports use constant memory."""
+    messages = chat_log.iter_messages(user_id)
+    if export_format == 'txt':
+        yield f"Astra Chat History ({user_id})\n----------------------\n"
+        for item in messages:
+            speaker = "You" if item['role'] == 'user' else "Astra"
+            stamp = datetime.datetime.utcfromtimestamp(item['ts']).strftime('%Y-%m-%d %H:%M:%S')
+            yield f"[{stamp}] {speaker}: {item['message']}\n\n"
+    elif export_format == 'ndjson':
+        for item in messages:
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+    else:
+        yield '{"user_id": ' + json.dumps(user_id) + ', "messages": ['
+        for i, item in enumerate(messages):
+            yield ("," if i else "") + json.dumps(item, ensure_ascii=False)
+        yield "]}\n"
+
+@app.route('/export', methods=['GET', 'POST'])
 def export():
-    data = request.get_json(silent=True) or {}
-    what = data.get('what', 'chat history')
+    data = request.get_json(silent=True) or request.args
+    user_id = current_user_id()
     export_format = data.get('format', 'txt')
-    filename = data.get('filename', f"astra_export_{what.replace(' ', '_')}.{export_format}")
-    # Demo export content
-    export_content = f"Exported data for: {what}\nDate: 2025-06-03\n(This is demo content.)"
-    import io
-    if export_format == 'json':
-        import json as pyjson
-        file_obj = io.BytesIO(pyjson.dumps({"exported": what, "date": "2025-06-03", "demo": True}).encode('utf-8'))
-        file_obj.seek(0)
-        try:
-            return send_file(file_obj, as_attachment=True, download_name=filename, mimetype='application/json')
-        except TypeError:
-            # For older Flask versions
-            return send_file(file_obj, as_attachment=True, attachment_filename=filename, mimetype='application/json')
-    elif export_format == 'txt':
-        file_obj = io.BytesIO(export_content.encode('utf-8'))
-        file_obj.seek(0)
-        try:
-            return send_file(file_obj, as_attachment=True, download_name=filename, mimetype='text/plain')
-        except TypeError:
-            return send_file(file_obj, as_attachment=True, attachment_filename=filename, mimetype='text/plain')
-    else:
-        # Fallback: confirmation message
-        return jsonify({'success': True, 'message': f"Exported {what} (demo only)"})
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    filename = secure_filename(data.get('filename') or f"astra_chat_history.{export_format}")
+    # Include messages still waiting in the writer queue
+    chat_log.flush()
+    response = Response(stream_with_context(export_lines(user_id, export_format)), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@app.route('/history', methods=['GET', 'DELETE'])
+def history():
+    """Paged chat history, newest page first: pass the returned `before` to get older messages."""
+    user_id = current_user_id()
+    # Messages still waiting in the writer queue are part of the history too
+    chat_log.flush()
+    if request.method == 'DELETE':
+        deleted = chat_log.delete_user(user_id)
+        return jsonify({'success': True, 'deleted': deleted})
+    before = request.args.get('before', type=int)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    messages = chat_log.page(user_id, before=before, limit=limit)
+    return jsonify({
+        'success': True,
+        'messages': messages,
+        'before': messages[0]['id'] if len(messages) == limit else None,
+    })
 
-@app.route('/faq', methods=['POST'])
+@app.route('/faq', methods=['GET', 'POST'])
 def faq():
-    data = request.get_json(silent=True) or {}
+    data = request_data()
     question = data.get('question', '')
     if not isinstance(question, str):
         return jsonify({'success': False, 'answer': 'Invalid question format.'})
     question = question.strip()
     if not question:
         return jsonify({'success': False, 'answer': 'Please provide a question.'})
-    questions = [item['q'] for item in FAQ_BASE]
-    matches = get_close_matches(question, questions, n=1, cutoff=0.4)
-    if matches:
-        answer = next((item['a'] for item in FAQ_BASE if item['q'] == matches[0]), None)
-        return jsonify({'success': True, 'answer': answer})
-    else:
-        return jsonify({'success': True, 'answer': f"Sorry, I couldn't find an FAQ for '{question}'."})
+    top_k = data.get('k', 1)
+    if isinstance(top_k, str) and top_k.isdigit():
+        top_k = int(top_k)
+    if not isinstance(top_k, int) or not 1 <= top_k <= 20:
+        top_k = 1
+    snapshot = content.current()
+
+    def build():
+        hits = snapshot["faq_index"].search(question, k=top_k, min_score=FAQ_MIN_SCORE)
+        if hits:
+            matches = [{'question': hit.question, 'answer': hit.answer, 'score': round(hit.score, 4)} for hit in hits]
+            return json_body({'success': True, 'answer': hits[0].answer, 'matches': matches})
+        return json_body({'success': True, 'answer': f"Sorry, I couldn't find an FAQ for '{question}'."})
+    return send_body(cached_body(('faq', snapshot.version, question, top_k), build))
+
+FUN_SOURCES = {'joke': 'jokes', 'fact': 'facts', 'game': 'games'}
 
-@app.route('/fun', methods=['POST'])
+@app.route('/fun', methods=['GET', 'POST'])
 def fun():
-    data = request.get_json(silent=True) or {}
+    data = request_data()
     fun_type = data.get('type', 'joke')
     if not isinstance(fun_type, str):
         fun_type = 'joke'
     fun_type = fun_type.lower()
-    if fun_type == 'joke':
-        content = random.choice(JOKES)
-    elif fun_type == 'fact':
-        content = random.choice(FACTS)
-    elif fun_type == 'game':
-        content = random.choice(GAMES)
-    else:
-        content = 'Unknown fun type. Try joke, fact, or game.'
-    return jsonify({'success': True, 'content': content, 'type': fun_type})
+    snapshot = content.current()
 
-@app.route('/resources', methods=['POST'])
+    def build():
+        # Every possible reply is serialized once; a request just picks one
+        source = FUN_SOURCES.get(fun_type)
+        texts = snapshot[source] if source else ['Unknown fun type. Try joke, fact, or game.']
+        return [json_body({'success': True, 'content': text, 'type': fun_type}) for text in texts]
+    bodies = cached_body(('fun', snapshot.version, fun_type if fun_type in FUN_SOURCES else None), build)
+    return send_body(random.choice(bodies), cache_control='no-store')
+
+@app.route('/resources', methods=['GET', 'POST'])
 def resources():
-    data = request.get_json(silent=True) or {}
+    data = request_data()
     topic = data.get('topic', 'Python')
     if not isinstance(topic, str):
         topic = 'Python'
     topic = topic.lower().strip()
-    links = RESOURCE_TOPICS.get(topic, [])
-    if not links:
-        links = [("Wikipedia", f"https://en.wikipedia.org/wiki/{topic.title()}")]
-    resources_list = [f"{name}: {url}" for name, url in links]
-    return jsonify({'success': True, 'resources': resources_list, 'topic': topic.title()})
+    snapshot = content.current()
+    try:
+        notes_index.refresh()
+    except (OSError, ValueError) as e:
+        # The previous manifest stays loaded, so notes are served from it
+        logging.warning(f"Notes index refresh failed, keeping the loaded index: {e}")
+
+    def build():
+        links = snapshot['resources'].get(topic, [])
+        if not links:
+            links = [{'name': "Wikipedia", 'url': f"https://en.wikipedia.org/wiki/{topic.title()}"}]
+        resources_list = [f"{link['name']}: {link['url']}" for link in links]
+        notes = [{'title': hit.title, 'path': hit.path, 'snippet': hit.snippet, 'score': hit.score}
+                 for hit in search_notes(topic)]
+        return json_body({'success': True, 'resources': resources_list, 'notes': notes, 'topic': topic.title()})
+    return send_body(cached_body(('resources', snapshot.version, notes_index.generation, topic), build))
 
-@app.route('/languages', methods=['POST'])
+@app.route('/languages', methods=['GET', 'POST'])
 def languages():
-    data = request.get_json(silent=True) or {}
+    data = request_data()
     lang = data.get('language')
     if lang:
         if not isinstance(lang, str):
             return jsonify({'success': False, 'message': 'Invalid language format.', 'languages': SUPPORTED_LANGUAGES})
         if lang.capitalize() in SUPPORTED_LANGUAGES:
             session['language'] = lang.capitalize()
-            return jsonify({'success': True, 'message': f"Language switched to {lang.capitalize()}.", 'languages': SUPPORTED_LANGUAGES})
+            body = cached_body(('language_set', lang.capitalize()), lambda: json_body(
+                {'success': True, 'message': f"Language switched to {lang.capitalize()}.", 'languages': SUPPORTED_LANGUAGES}))
         else:
             return jsonify({'success': False, 'message': f"Language '{lang}' not supported.", 'languages': SUPPORTED_LANGUAGES})
-    return jsonify({'success': True, 'languages': SUPPORTED_LANGUAGES, 'current': session.get('language', 'English')})
+    else:
+        current = session.get('language', 'English')
+        body = cached_body(('languages', current), lambda: json_body(
+            {'success': True, 'languages': SUPPORTED_LANGUAGES, 'current': current}))
+    # Depends on the session cookie, so shared caches must not store it
+    return send_body(body, cache_control='private, no-cache')
 
 @app.route('/group-chat', methods=['POST'])
 def group_chat():
     data = request.get_json(silent=True) or {}
     action = data.get('action', 'info')
     group_name = data.get('group', 'General')
+    # Socket id of the caller's connection, so REST joins can put it in the group room
+    sid = data.get('sid')
+    user_id = current_user_id()
     if not isinstance(action, str):
         action = 'info'
     if not isinstance(group_name, str):
         group_name = 'General'
     action = action.lower()
     if action == 'create':
-        return jsonify({'success': True, 'message': f"Group '{group_name}' created! (Demo only)"})
+        chat_groups.create(group_name)
+        if isinstance(sid, str):
+            join_group(group_name, user_id, sid)
+        return jsonify({'success': True, 'message': f"Group '{group_name}' created!", 'room': group_room(group_name)})
     elif action == 'join':
-        return jsonify({'success': True, 'message': f"Joined group '{group_name}'! (Demo only)"})
+        if not chat_groups.exists(group_name):
+            return jsonify({'success': False, 'message': f"Group '{group_name}' does not exist."})
+        if not isinstance(sid, str):
+            return jsonify({'success': False, 'message': 'A socket id (sid) is required to join a group.'})
+        join_group(group_name, user_id, sid)
+        return jsonify({'success': True, 'message': f"Joined group '{group_name}'!", 'room': group_room(group_name)})
     elif action == 'info':
-        return jsonify({'success': True, 'message': f"Group chat feature is coming soon! (Demo only)"})
+        groups = chat_groups.names()
+        if group_name in groups:
+            return jsonify({'success': True, 'message': f"Group '{group_name}' has {chat_groups.member_count(group_name)} member(s).", 'groups': groups})
+        return jsonify({'success': True, 'message': f"{len(groups)} group(s) available.", 'groups': groups})
     else:
         return jsonify({'success': False, 'message': f"Unknown group chat action: {action}"})
 
 @app.route('/avatar', methods=['POST'])
 def avatar():
-    if 'file' in request.files:
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'success': False, 'error': 'No selected file'})
-        filename = secure_filename(file.filename)
-        save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(save_path)
-        avatar_url = f"/static/img/avatars/{filename}"
-        session['avatar_url'] = avatar_url
-        return jsonify({'success': True, 'avatar_url': avatar_url, 'message': 'Avatar updated!'})
+    if request.files or request.mimetype.startswith('image/'):
+        try:
+            blob, _ = save_upload()
+        except UploadRejected as e:
+            return jsonify({'success': False, 'error': str(e)})
+        # Resizing happens on the thumbnail pool; 'get' switches to the thumbnail once it exists
+        media_store.request_thumbnail(blob)
+        session['avatar'] = blob.name
+        return jsonify({'success': True, 'avatar_url': media_url(blob.name), 'message': 'Avatar updated!'})
     data = request.get_json(silent=True) or {}
     avatar_action = data.get('action', 'get')
     if not isinstance(avatar_action, str):
         avatar_action = 'get'
     avatar_action = avatar_action.lower()
     if avatar_action == 'get':
-        avatar_url = session.get('avatar_url', '/static/img/bot.png')
-        return jsonify({'success': True, 'avatar_url': avatar_url})
+        name = session.get('avatar')
+        if not name:
+            return jsonify({'success': True, 'avatar_url': '/static/img/bot.png'})
+        thumbnail = media_store.thumbnail_name(name)
+        return jsonify({'success': True, 'avatar_url': media_url(thumbnail if media_store.path(thumbnail) else name)})
     elif avatar_action == 'set':
         return jsonify({'success': True, 'message': 'Avatar updated! (demo only)'})
     else:
         return jsonify({'success': False, 'error': 'Unknown avatar action.'})
 
+@STAGE_SECONDS.timed("predict_intent")
 def predict_intent(message):
-    message_lower = message.lower()
-    for intent in intents:
-        for pattern in intent["patterns"]:
-            if pattern.lower() in message_lower:
-                return intent["tag"]
+    return content.current()["intent_matcher"].predict(message)
+
+@STAGE_SECONDS.timed("correct_spelling")
+def correct_intent(message):
+    """Pattern match on the spelling-corrected message, for messages neither the patterns nor the model placed.
+
+    Only a match whose pattern covers a corrected word counts, so a correction
+    elsewhere in the message cannot produce an unrelated match.
+    """
+    snapshot = content.current()
+    if not SPELL_CORRECTION or snapshot["spelling_index"] is None:
+        return None
+    corrected, spans = snapshot["spelling_index"].correct_spans(message)
+    if not spans:
+        return None
+    match = snapshot["intent_matcher"].match(corrected)
+    if match and any(start < match.end and match.start < end for start, end in spans):
+        SPELL_CORRECTED.inc()
+        return match.tag
     return None
 
+@STAGE_SECONDS.timed("classify_intent")
+def classify_intent(message):
+    """Model fallback for messages no pattern matched; batched with concurrent messages."""
+    intent_classifier = classifier_loader.classifier
+    if not intent_classifier:
+        return None
+    try:
+        if intent_classifier.batch_window > 0:
+            # Already off the handler: the classifier's batching thread does the work
+            tag, confidence = intent_classifier.predict(message, timeout=2)
+        else:
+            tag, confidence = nlp_pool.run(intent_classifier.predict, message)
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logging.error(f"Intent classification error: {e}")
+        return None
+    # The model may know tags that intents.json no longer has responses for
+    return tag if tag in content.current()["intents_by_tag"] else None
+
+@STAGE_SECONDS.timed("extract_keywords")
 def extract_keywords(message):
-    doc = nlp(message)
-    return [token.text for token in doc if token.pos_ in ("NOUN", "PROPN")]
+    return keyword_extractor.extract(message)
 
-def is_answer_similar(user_answer, expected_keywords):
-    """Basic NLP similarity for quiz answers."""
-    user_answer = user_answer.lower()
-    for keyword in expected_keywords:
-        if SequenceMatcher(None, keyword, user_answer).ratio() > 0.7:
-            return True
-    return False
+def notes_query(keywords):
+    """Topic words from the extracted keywords, minus request words like "explain" or "resources"."""
+    return [word for word in keywords if word.lower() not in NOTES_QUERY_IGNORE]
+
+@STAGE_SECONDS.timed("search_notes")
+def search_notes(query, k=NOTES_RESULTS):
+    try:
+        return notes_index.search(query, k)
+    except Exception as e:
+        logging.error(f"Notes search failed: {e}")
+        return []
+
+@STAGE_SECONDS.timed("grade_quiz")
+def grade_quiz(topic, answers):
+    """Grade every answer of a finished quiz in one batch; returns the number correct."""
+    return content.current()["quiz_grader"].grade_quiz(topic, answers)[0]
+
+def current_user_id():
+    """The user id bound to this browser's session, created on first use.
+
+    History, reminders and replies are keyed on it; ids sent by clients are
+    ignored, so nobody can read or delete another user's data.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        user_id = session['user_id'] = f"user_{secrets.token_urlsafe(16)}"
+        session.permanent = True
+    return user_id
 
 def get_user_context(user_id, key):
-    return user_context.get(user_id, {}).get(key)
+    return session_store.get(user_id, key)
 
 def set_user_context(user_id, key, value):
-    if user_id not in user_context:
-        user_context[user_id] = {}
-    user_context[user_id][key] = value
+    session_store.set(user_id, key, value)
 
 def clear_user_context(user_id):
-    if user_id in user_context:
-        user_context[user_id] = {}
+    session_store.clear(user_id)
+
+def user_room(user_id):
+    return f"user:{user_id}"
+
+def group_room(group_name):
+    return f"group:{group_name}"
+
+def join_group(group_name, user_id, sid):
+    chat_groups.create(group_name)
+    if user_id:
+        chat_groups.join(group_name, user_id)
+    join_room(group_room(group_name), sid=sid, namespace='/')
+
+@socketio.on('connect')
+def handle_connect():
+    socket_connections.inc("connect")
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    socket_connections.inc("disconnect")
+
+@socketio.on('join')
+def handle_join(data):
+    """Put this connection in its user's room so replies reach only that user's tabs."""
+    join_room(user_room(current_user_id()))
+
+@socketio.on('group_message')
+def handle_group_message(data):
+    group_name = data.get("group")
+    message = data.get("message")
+    user_id = current_user_id()
+    if not isinstance(group_name, str) or not isinstance(message, str) or not message.strip():
+        return
+    # Only members may post, so a socket cannot write into groups it never joined
+    if not chat_groups.is_member(group_name, user_id):
+        return
+    socketio.emit("group_message", {"group": group_name, "message": message.strip(), "user_id": user_id},
+                  to=group_room(group_name), include_self=False)
+
+@socketio.on('leave_group')
+def handle_leave_group(data):
+    group_name = data.get("group")
+    if chat_groups.exists(group_name):
+        leave_room(group_room(group_name))
+        chat_groups.leave(group_name, current_user_id())
+
+def emit_response(user_id, message, **extra):
+    with STAGE_SECONDS.time("emit"):
+        socketio.emit("response", dict(extra, message=message, user_id=user_id), to=user_room(user_id))
+
+def emit_busy(user_id, rejected):
+    """Tell the client to back off for retry_after seconds instead of leaving it waiting."""
+    emit_response(user_id, busy_message(rejected), busy=True, reason=rejected.reason,
+                  retry_after=rejected.retry_after_seconds)
 
 @socketio.on('message')
+@STAGE_SECONDS.timed("handle_message")
 def handle_message(data):
     user_input = data.get("message", "").strip()
-    user_id = data.get("user_id", "anonymous_user")
-    logging.info(f"[{user_id}] Input: {user_input}")
+    user_id = current_user_id()
+    MESSAGES.inc()
+    # Clients that connected before sending 'join' still get their replies
+    join_room(user_room(user_id))
+    try:
+        check_rate(user_id, request.remote_addr, "socket")
+    except Rejected as e:
+        emit_busy(user_id, e)
+        return
+    # %-style arguments: sampled-out lines are never formatted
+    message_log.info("[%s] Input: %s", user_id, user_input)
+    if user_input:
+        chat_log.append(user_id, "user", user_input)
 
     if not user_input:
-        response = "Please type something!"
-        socketio.emit("response", {"message": response, "user_id": user_id})
+        emit_response(user_id, "Please type something!")
+        return
+
+    try:
+        admit("socket")
+    except Rejected as e:
+        emit_busy(user_id, e)
+        return
+    try:
+        response = build_reply(user_input, user_id, parse_tz_offset(data.get("tz_offset")))
+    except PoolSaturated:
+        OVERLOADED.inc()
+        logging.warning(f"[{user_id}] NLP pool saturated, rejecting message")
+        emit_busy(user_id, Rejected("shed", admission.retry_after))
         return
+    finally:
+        admission.release()
+
+    emit_response(user_id, response)
+    chat_log.append(user_id, "bot", response)
+    message_log.info("[%s] Response: %s", user_id, response)
+
+def build_reply(user_input, user_id, tz_offset=None):
+    if get_user_context(user_id, "awaiting_reminder"):
+        # Answer to "what and when?" after a bare "remind me"
+        set_user_context(user_id, "awaiting_reminder", False)
+        reply = reminder_reply(user_id, f"remind me to {user_input}", tz_offset)
+        if reply:
+            return reply
 
     response, intent_tag = get_response(user_input, user_id)
 
     # Custom logic for special intents
     if intent_tag == "quiz_request":
         # Reset quiz context
-        topic = extract_keywords(user_input)
+        topic = nlp_pool.run(extract_keywords, user_input)
         chosen_topic = topic[0].lower() if topic else "python"
-        questions = quiz_bank.get(chosen_topic, quiz_bank["python"])
-        user_quiz_data[user_id] = {
+        quiz_bank = content.current()["quiz_bank"]
+        if chosen_topic not in quiz_bank:
+            chosen_topic = "python"
+        questions = [entry["q"] for entry in quiz_bank[chosen_topic]]
+        set_user_context(user_id, "quiz", {
             "topic": chosen_topic,
             "questions": questions,
             "index": 0,
-            "score": 0
-        }
+            "answers": []
+        })
         question = questions[0]
         set_user_context(user_id, "in_quiz", True)
         response = f"🧪 Starting quiz on {chosen_topic.title()}!\nQuestion 1: {question}"
 
     elif get_user_context(user_id, "in_quiz"):
-        quiz = user_quiz_data.get(user_id)
-        user_answer = user_input.lower().strip()
-        current_index = quiz["index"]
-        topic = quiz["topic"]
-        expected_keywords = quiz["questions"][current_index].lower().split()
-        # Improved answer checking
-        correct = is_answer_similar(user_answer, expected_keywords)
-
-        if correct:
-            quiz["score"] += 1
-
-        current_index += 1
+        quiz = get_user_context(user_id, "quiz")
+        # Answers are graded together once the last one is in
+        quiz["answers"].append(user_input.lower().strip())
+        current_index = quiz["index"] + 1
 
         if current_index < len(quiz["questions"]):
             quiz["index"] = current_index
+            set_user_context(user_id, "quiz", quiz)
             next_q = quiz["questions"][current_index]
             response = f"✅ Got it!\n\nQuestion {current_index + 1}: {next_q}"
         else:
-            score = quiz["score"]
+            score = grade_quiz(quiz["topic"], quiz["answers"])
             total = len(quiz["questions"])
             response = (
                 f"✅ Quiz complete!\n\nYour Score: {score}/{total}\n"
                 f"👏 Great work! Keep practicing!"
             )
             clear_user_context(user_id)
-            user_quiz_data.pop(user_id, None)
 
     elif intent_tag == "study_schedule":
         response += "\n\n📅 Sample Study Plan:\n- Math: 2 hrs\n- Python: 1.5 hrs\n- Review: 30 mins"
 
     elif intent_tag == "study_material":
-        keywords = extract_keywords(user_input)
-        subject = keywords[0].lower() if keywords else "python"
+        topic_words = notes_query(nlp_pool.run(extract_keywords, user_input))
+        subject = topic_words[0].lower() if topic_words else "python"
+        hits = search_notes(" ".join(topic_words)) if topic_words else []
+        if hits:
+            response += "\n\n📚 From your notes:\n" + "\n".join(f"- **{hit.title}**: {hit.snippet}" for hit in hits)
         response += f"\n\n📹 YouTube: https://youtube.com/results?search_query={subject}+tutorial\n📖 Article: https://www.geeksforgeeks.org/tag/{subject}/"
 
-    elif intent_tag == "reminder":
-        response += "\n\n⏰ Reminder set! (Demo only – reminders don't persist yet)"
+    elif intent_tag == "set_reminder":
+        reply = reminder_reply(user_id, user_input, tz_offset)
+        if reply:
+            response = reply
+        else:
+            set_user_context(user_id, "awaiting_reminder", True)
 
     elif intent_tag == "explain_topic":
-        keywords = extract_keywords(user_input)
-        topic = keywords[0] if keywords else "Python"
+        topic_words = notes_query(nlp_pool.run(extract_keywords, user_input))
+        topic = " ".join(topic_words) if topic_words else "Python"
+        hits = search_notes(topic, k=1) if topic_words else []
+        if hits:
+            response += f"\n\n📗 From your notes on **{hits[0].title}**:\n{hits[0].snippet}"
         response += f"\n\n📘 Want to learn more about {topic}? Try this: https://en.wikipedia.org/wiki/{topic.replace(' ', '_')}"
 
-    socketio.emit("response", {"message": response, "user_id": user_id})
-    logging.info(f"[{user_id}] Response: {response}")
+    return response
 
+@STAGE_SECONDS.timed("get_response")
 def get_response(user_input, user_id):
     if get_user_context(user_id, "awaiting_subject"):
         clear_user_context(user_id)
+        INTENTS.inc("study_schedule", "context")
         return f"Great! Let's build a schedule for {user_input}.", "study_schedule"
 
-    intent_tag = predict_intent(user_input)
+    intent_tag, source = predict_intent(user_input), "pattern"
+    if not intent_tag:
+        intent_tag, source = classify_intent(user_input), "model"
+    if not intent_tag:
+        # Corrections can turn real words into pattern words, so the model gets the first say
+        intent_tag, source = correct_intent(user_input), "spelling"
 
     if not intent_tag:
+        FALLBACKS.inc("no_match")
         return "Hmm... I'm not sure how to help with that. Try asking about study plans, quizzes, or topics.", "fallback"
 
-    intent_obj = next((i for i in intents if i["tag"] == intent_tag), None)
+    intent_obj = content.current()["intents_by_tag"].get(intent_tag)
     if not intent_obj:
+        FALLBACKS.inc("unknown_intent")
         return "Oops, something went wrong understanding that.", "fallback"
+    INTENTS.inc(intent_tag, source)
 
     set_user_context(user_id, "last_intent", intent_tag)
 
@@ -469,4 +1110,9 @@ def get_response(user_input, user_id):
     return random.choice(responses) if responses else "Let’s continue!", intent_tag
 
 if __name__ == "__main__":
-    socketio.run(app, debug=True)
+    socketio.run(
+        app,
+        host=os.environ.get("HOST", "127.0.0.1"),
+        port=int(os.environ.get("PORT", "5000")),
+        debug=os.environ.get("FLASK_DEBUG", "1") == "1",
+    )
@@ -0,0 +1,137 @@
+"""Socket fan-out benchmark: what each client receives, broadcast vs per-user and group rooms.
+
+Connects --clients Socket.IO test clients to the in-process app, each with its
+own session, split evenly across --groups group rooms (joined through
+/group-chat). Every client sends --messages chat messages, which the app
+answers, and --group-messages messages to its group. The run is repeated with
+the app's emits forced to every connection, as before replies went to
+per-user rooms, and with the app as it is. Reports per client the messages
+and payload bytes delivered, and the number delivered per message sent.
+
+    python benchmarks/fanout.py
+    python benchmarks/fanout.py --clients 500 --groups 25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "fanout.json")
+sys.path.insert(0, HERE)
+
+from run import load_app, read_corpus  # noqa: E402
+
+
+def broadcast_all(emit):
+    """socketio.emit with the target dropped, so every event reaches every connection."""
+    def emit_to_everyone(event, *args, **kwargs):
+        for key in ("to", "room", "include_self"):
+            kwargs.pop(key, None)
+        return emit(event, *args, **kwargs)
+    return emit_to_everyone
+
+
+def connect(app, count, groups, tag):
+    """count clients with their own session, joined round-robin to `groups` group rooms."""
+    clients = []
+    for n in range(count):
+        http = app.app.test_client()
+        http.get("/")
+        socket = app.socketio.test_client(app.app, flask_test_client=http)
+        socket.emit("join", {})
+        sid = app.socketio.server.manager.sid_from_eio_sid(socket.eio_sid, "/")
+        group = f"{tag}-{n % groups}"
+        http.post("/group-chat", json={"action": "join" if n >= groups else "create", "group": group, "sid": sid})
+        socket.get_received()
+        clients.append((socket, group))
+    return clients
+
+
+def run(app, mode, args):
+    messages = read_corpus("messages.txt")
+    clients = connect(app, args.clients, args.groups, mode)
+    original = app.socketio.emit
+    if mode == "broadcast":
+        app.socketio.emit = broadcast_all(original)
+    sent = 0
+    started = time.perf_counter()
+    try:
+        for round_ in range(max(args.messages, args.group_messages)):
+            for n, (socket, group) in enumerate(clients):
+                if round_ < args.messages:
+                    socket.emit("message", {"message": messages[(n + round_) % len(messages)]})
+                    sent += 1
+                if round_ < args.group_messages:
+                    socket.emit("group_message", {"group": group, "message": f"hello from {n}"})
+                    sent += 1
+    finally:
+        app.socketio.emit = original
+    elapsed = time.perf_counter() - started
+
+    delivered = []
+    for socket, _ in clients:
+        packets = socket.get_received()
+        delivered.append((len(packets), sum(len(json.dumps(p["args"], ensure_ascii=False)) for p in packets)))
+        socket.disconnect()
+    total_messages = sum(count for count, _ in delivered)
+    total_bytes = sum(size for _, size in delivered)
+    return {
+        "sent": sent,
+        "messages_per_client": round(total_messages / len(clients), 1),
+        "bytes_per_client": round(total_bytes / len(clients), 1),
+        "max_messages_per_client": max(count for count, _ in delivered),
+        "deliveries_per_message": round(total_messages / sent, 2),
+        "bytes_per_message": round(total_bytes / sent, 1),
+        "ms_per_message": round(elapsed / sent * 1000, 3),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark socket fan-out, broadcast vs rooms.")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=10, help="group rooms the clients are split across")
+    parser.add_argument("--messages", type=int, default=2, help="chat messages each client sends")
+    parser.add_argument("--group-messages", type=int, default=1, help="group messages each client sends")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.groups = max(1, min(args.groups, args.clients))
+    output = os.path.abspath(args.output)
+    with tempfile.TemporaryDirectory() as workdir:
+        app = load_app(workdir)
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "clients": args.clients,
+                "groups": args.groups,
+                "messages": args.messages,
+                "group_messages": args.group_messages,
+            },
+            "runs": {mode: run(app, mode, args) for mode in ("broadcast", "rooms")},
+        }
+
+    print(f"{args.clients} clients in {args.groups} groups; each sends {args.messages} chat and "
+          f"{args.group_messages} group message(s)")
+    print(f"{'mode':<11}{'msgs/client':>12}{'bytes/client':>14}{'deliveries/msg':>16}{'bytes/msg':>11}{'ms/msg':>9}")
+    for mode, stats in results["runs"].items():
+        print(f"{mode:<11}{stats['messages_per_client']:>12.1f}{stats['bytes_per_client']:>14.1f}"
+              f"{stats['deliveries_per_message']:>16.2f}{stats['bytes_per_message']:>11.1f}{stats['ms_per_message']:>9.3f}")
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
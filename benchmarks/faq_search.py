@@ -0,0 +1,162 @@
+"""FAQ search benchmark: FaqIndex lookup latency on a large synthetic FAQ set.
+
+Builds a FaqIndex from content/faq.json plus --faqs synthetic questions and
+queries the index directly, so the /faq response cache never answers. Queries
+are the FAQ query corpus plus synthetic questions with words dropped and
+typos added, each asked once. Reports build time, p50/p95/p99 search latency
+and how often the top hit is the question a query was derived from, and exits
+with status 1 when p95 latency is over --budget-ms.
+
+    python benchmarks/faq_search.py                     # 10,000 synthetic FAQs
+    python benchmarks/faq_search.py --faqs 50000 --queries 5000
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "faq_search.json")
+sys.path.insert(0, ROOT)
+
+from faq_index import FaqIndex  # noqa: E402
+
+# Letters weighted by their frequency in English text, so made-up words have English-like trigrams
+LETTERS = "etaoinshrdlcumwfgypbvkjxqz"
+LETTER_WEIGHTS = [12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8, 2.4, 2.4, 2.2, 2.0, 2.0, 1.9,
+                  1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1]
+TEMPLATES = [
+    "How do I {verb} the {thing}?",
+    "Where can I {verb} my {thing}?",
+    "Can I {verb} a {thing} for {course}?",
+    "What happens if I {verb} the {thing} late?",
+    "Why can't I {verb} my {thing} in {course}?",
+    "Is there a way to {verb} {thing} notes for {course}?",
+]
+VERBS = ["reset", "submit", "download", "share", "export", "renew", "cancel", "schedule", "review", "upload",
+         "print", "edit", "delete", "restore", "sync", "archive", "grade", "join", "leave", "book"]
+
+
+def read_corpus(name):
+    with open(os.path.join(HERE, "corpus", name), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def make_words(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(LETTERS, LETTER_WEIGHTS, k=rng.randint(4, 10))))
+    return sorted(words)
+
+
+def make_faqs(count, rng):
+    """count distinct synthetic {"q", "a"} entries about made-up things and courses."""
+    things = make_words(max(50, count // 20), rng)
+    courses = [f"{word[:3].upper()}{rng.randint(100, 499)}" for word in make_words(max(20, count // 50), rng)]
+    questions = set()
+    while len(questions) < count:
+        questions.add(rng.choice(TEMPLATES).format(verb=rng.choice(VERBS), thing=rng.choice(things),
+                                                   course=rng.choice(courses)))
+    return [{"q": q, "a": f"Answer {n}."} for n, q in enumerate(sorted(questions))]
+
+
+def perturb(question, rng):
+    """A user's version of an FAQ: a word or two dropped and one typo."""
+    words = question.rstrip("?").split()
+    for _ in range(rng.randint(0, 2)):
+        if len(words) > 3:
+            words.pop(rng.randrange(len(words)))
+    word = rng.randrange(len(words))
+    if len(words[word]) > 3:
+        chars = list(words[word])
+        i = rng.randrange(len(chars) - 1)
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        words[word] = "".join(chars)
+    return " ".join(words)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FaqIndex search on a large synthetic FAQ set.")
+    parser.add_argument("--faqs", type=int, default=10000, help="synthetic FAQs added to content/faq.json")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=3, help="results per query")
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="fail when p95 latency is above this")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(42)
+    with open(os.path.join(ROOT, "content", "faq.json"), encoding="utf-8") as f:
+        real = json.load(f)
+    synthetic = make_faqs(args.faqs, rng)
+
+    start = time.perf_counter()
+    index = FaqIndex(real + synthetic)
+    build_seconds = time.perf_counter() - start
+
+    sources = rng.sample(synthetic, min(args.queries, len(synthetic)))
+    queries = [(perturb(faq["q"], rng), faq["q"]) for faq in sources]
+    queries += [(query, None) for query in read_corpus("faq_queries.txt")]
+    index.search(queries[0][0], args.k)
+    latencies = []
+    found = 0
+    for query, source in queries:
+        start = time.perf_counter()
+        hits = index.search(query, k=args.k)
+        latencies.append(time.perf_counter() - start)
+        found += bool(source and hits and hits[0].question == source)
+    latencies.sort()
+
+    p95_ms = percentile(latencies, 0.95) * 1000
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "index": {
+            "faqs": len(index),
+            "build_seconds": round(build_seconds, 2),
+            "terms": len(index._postings),
+        },
+        "search": {
+            "queries": len(queries),
+            "k": args.k,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(p95_ms, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "top1_recall": round(found / len(sources), 3) if sources else None,
+        },
+        "budget_ms": args.budget_ms,
+        "within_budget": p95_ms <= args.budget_ms,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+    print(f"Index:  {results['index']['faqs']} FAQs, {results['index']['terms']} trigrams, "
+          f"built in {results['index']['build_seconds']}s")
+    print(f"Search: p50 {results['search']['p50_ms']} ms, p95 {results['search']['p95_ms']} ms, "
+          f"p99 {results['search']['p99_ms']} ms over {len(queries)} uncached queries (top {args.k})")
+    print(f"Top hit is the source question for {results['search']['top1_recall']:.1%} of perturbed queries; "
+          f"peak RSS {results['max_rss_mb']} MB")
+    print(f"p95 {'within' if results['within_budget'] else 'OVER'} the {args.budget_ms} ms budget")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0 if results["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Intent model loading across worker processes: memory-mapped .bin vs pickle.
+
+Trains a synthetic TF-IDF + MultinomialNB pipeline sized like a large intent
+set (--classes, --vocabulary; unigrams and bigrams) and writes it both as a
+pickle and as a model artifact (.bin). Training runs in a spawned process, so
+the parent never imports sklearn or holds the model. The parent then forks
+--workers processes per format. Each worker loads the model, classifies a
+batch of messages and reads /proc/self/smaps_rollup before and after. Loads
+take turns, so load time is not inflated by CPU contention, and all workers
+hold the model at once while they measure, so memory they map in common
+counts as shared.
+
+Reports per format the mean load time and, per worker, the growth in RSS,
+shared and private memory and PSS (a shared page split between the processes
+mapping it), plus the PSS of all workers together. numpy is imported before
+forking, as the app does; load time includes the other imports a format
+needs (sklearn for the pickle).
+
+    python benchmarks/model_memory.py
+    python benchmarks/model_memory.py --workers 8 --vocabulary 200000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy  # noqa: F401  -- shared by both formats, imported before forking like the app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "model_memory.json")
+sys.path.insert(0, ROOT)
+
+SYLLABLES = ["ra", "to", "mi", "ke", "lo", "sa", "nu", "pe", "di", "vo", "ga", "shi", "tor", "lex", "quin", "bar"]
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def make_messages(count, classes, vocabulary, rng):
+    """(text, label) pairs; each class draws mostly from its own slice of the vocabulary."""
+    words = set()
+    while len(words) < vocabulary:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    words = sorted(words)
+    per_class = max(1, len(words) // classes)
+    messages = []
+    for n in range(count):
+        label = n % classes
+        own = words[label * per_class:(label + 1) * per_class]
+        text = " ".join(rng.choice(own) if rng.random() < 0.8 else rng.choice(words) for _ in range(rng.randint(4, 12)))
+        messages.append((text, f"intent_{label}"))
+    return messages
+
+
+def build_models(workdir, args):
+    """Train the synthetic pipeline and write model.pkl and model.bin (runs in a spawned process)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from model_artifacts import export_pipeline
+
+    messages = make_messages(args.patterns, args.classes, args.vocabulary, random.Random(42))
+    pipeline = Pipeline([("tfidf", TfidfVectorizer(ngram_range=(1, 2))), ("clf", MultinomialNB())])
+    pipeline.fit([text for text, _ in messages], [label for _, label in messages])
+    with open(os.path.join(workdir, "model.pkl"), "wb") as f:
+        pickle.dump(pipeline, f)
+    # sklearn's default tokenizer keeps stop words and does not lemmatize
+    export_pipeline(pipeline, os.path.join(workdir, "model.bin"), tokenizer={"stop_words": [], "lemmas": {}})
+    with open(os.path.join(workdir, "queries.json"), "w", encoding="utf-8") as f:
+        json.dump([text for text, _ in messages[:args.queries]], f)
+
+
+def smaps():
+    """Memory counters of this process in kB, from /proc/self/smaps_rollup."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def load(fmt, path):
+    if fmt == "pickle":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    from intent_inference import NumpyIntentModel
+    return NumpyIntentModel.load(path)
+
+
+def worker(fmt, path, queries, turn, barrier, results):
+    before = smaps()
+    with turn:
+        start = time.perf_counter()
+        model = load(fmt, path)
+        load_seconds = time.perf_counter() - start
+    model.predict_proba(queries)
+    # Measure only once every worker holds the model, then keep it until all have measured
+    barrier.wait()
+    after = smaps()
+    results.put({"load_ms": load_seconds * 1000, **{name: after[name] - before[name] for name in SMAPS_FIELDS}})
+    barrier.wait()
+
+
+def run(fmt, path, queries, workers):
+    context = multiprocessing.get_context("fork")
+    turn, barrier, results = context.Lock(), context.Barrier(workers), context.Queue()
+    procs = [context.Process(target=worker, args=(fmt, path, queries, turn, barrier, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    rows = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    mean = lambda key: sum(row[key] for row in rows) / len(rows)
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "load_ms": round(mean("load_ms"), 1),
+        "rss_mb": mb(mean("Rss")),
+        "shared_mb": mb(mean("Shared_Clean") + mean("Shared_Dirty")),
+        "private_mb": mb(mean("Private_Clean") + mean("Private_Dirty")),
+        "pss_mb": mb(mean("Pss")),
+        "total_pss_mb": mb(sum(row["Pss"] for row in rows)),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model loading and memory across worker processes.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--classes", type=int, default=50)
+    parser.add_argument("--vocabulary", type=int, default=50000, help="distinct words in the training patterns")
+    parser.add_argument("--patterns", type=int, default=50000, help="training patterns")
+    parser.add_argument("--queries", type=int, default=1000, help="messages each worker classifies after loading")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("This benchmark reads /proc/self/smaps_rollup and needs Linux 4.14 or later.")
+        return 1
+    workdir = tempfile.mkdtemp(prefix="model-memory-")
+    try:
+        builder = multiprocessing.get_context("spawn").Process(target=build_models, args=(workdir, args))
+        builder.start()
+        builder.join()
+        if builder.exitcode:
+            return builder.exitcode
+        with open(os.path.join(workdir, "queries.json"), encoding="utf-8") as f:
+            queries = json.load(f)
+        files = {"pickle": os.path.join(workdir, "model.pkl"), "artifact": os.path.join(workdir, "model.bin")}
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "workers": args.workers,
+                "classes": args.classes,
+                "vocabulary": args.vocabulary,
+                "file_mb": {fmt: round(os.path.getsize(path) / 2**20, 1) for fmt, path in files.items()},
+            },
+            "runs": {fmt: run(fmt, path, queries, args.workers) for fmt, path in files.items()},
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.workers} workers; model files: " +
+          ", ".join(f"{fmt} {size} MB" for fmt, size in results["meta"]["file_mb"].items()))
+    print("Per worker, growth from loading the model and classifying a batch:")
+    print(f"{'format':<10}{'load ms':>9}{'RSS MB':>9}{'shared':>9}{'private':>9}{'PSS MB':>9}{'total PSS':>11}")
+    for fmt, stats in results["runs"].items():
+        print(f"{fmt:<10}{stats['load_ms']:>9.1f}{stats['rss_mb']:>9.1f}{stats['shared_mb']:>9.1f}"
+              f"{stats['private_mb']:>9.1f}{stats['pss_mb']:>9.1f}{stats['total_pss_mb']:>11.1f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Study-notes search benchmark on a synthetic corpus.
+
+Generates --docs markdown notes with Zipf-distributed words, indexes them with
+NotesIndex, and reports indexing throughput, on-disk size, top-k query latency
+(p50/p95/p99) for one- to three-word queries, the cost of an incremental update
+that adds a few notes, and the process's peak RSS. Postings are memory-mapped,
+so RSS should stay far below the corpus size.
+
+    python benchmarks/notes_search.py                     # 10,000 notes
+    python benchmarks/notes_search.py --docs 200000 --keep /tmp/notes-bench
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "notes_search.json")
+sys.path.insert(0, ROOT)
+
+from notes_index import NotesIndex  # noqa: E402
+
+SYLLABLES = ["ra", "to", "mi", "ke", "lo", "sa", "nu", "pe", "di", "vo", "ga", "shi", "tor", "lex", "quin", "bar"]
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def write_corpus(notes_dir, docs, words_per_doc, vocabulary, rng, start=0):
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    total = 0
+    for n in range(start, start + docs):
+        words = rng.choices(vocabulary, weights, k=words_per_doc)
+        text = f"# Note {n} {words[0]}\n\n" + " ".join(words) + "\n"
+        subdir = os.path.join(notes_dir, f"{n // 1000:04d}")
+        os.makedirs(subdir, exist_ok=True)
+        with open(os.path.join(subdir, f"note-{n}.md"), "w", encoding="utf-8") as f:
+            f.write(text)
+        total += len(text)
+    return total
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 study-notes index.")
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=300, help="words per note")
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=10, help="results per query")
+    parser.add_argument("--keep", help="build the corpus and index here and keep them")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(42)
+    workdir = args.keep or tempfile.mkdtemp(prefix="notes-bench-")
+    notes_dir = os.path.join(workdir, "notes")
+    index_dir = os.path.join(workdir, "index")
+    try:
+        vocabulary = make_vocabulary(args.vocabulary, rng)
+        corpus_bytes = write_corpus(notes_dir, args.docs, args.words, vocabulary, rng)
+
+        index = NotesIndex(index_dir)
+        start = time.perf_counter()
+        index.update(notes_dir)
+        build_seconds = time.perf_counter() - start
+
+        # Mostly mid-frequency words, like real topic queries
+        pool = vocabulary[50:5000]
+        queries = [" ".join(rng.sample(pool, rng.randint(1, 3))) for _ in range(args.queries)]
+        index.search(queries[0], args.k)
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, args.k)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        write_corpus(notes_dir, 10, args.words, vocabulary, rng, start=args.docs)
+        start = time.perf_counter()
+        index.update(notes_dir)
+        incremental_ms = (time.perf_counter() - start) * 1000
+
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "corpus": {"docs": args.docs, "mb": round(corpus_bytes / 2**20, 1)},
+            "index": {
+                "build_seconds": round(build_seconds, 2),
+                "docs_per_second": round(args.docs / build_seconds, 1),
+                "mb": round(directory_size(index_dir) / 2**20, 1),
+                **index.stats(),
+            },
+            "search": {
+                "queries": len(queries),
+                "k": args.k,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            },
+            "incremental_update_ms": round(incremental_ms, 1),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Corpus: {results['corpus']['docs']} notes, {results['corpus']['mb']} MB")
+    print(f"Index:  {results['index']['build_seconds']}s ({results['index']['docs_per_second']} notes/s), "
+          f"{results['index']['mb']} MB in {results['index']['segments']} segment(s)")
+    print(f"Search: p50 {results['search']['p50_ms']} ms, p95 {results['search']['p95_ms']} ms, "
+          f"p99 {results['search']['p99_ms']} ms (top {args.k})")
+    print(f"Incremental update of 10 notes: {results['incremental_update_ms']} ms; peak RSS {results['max_rss_mb']} MB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
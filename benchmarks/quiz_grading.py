@@ -0,0 +1,169 @@
+"""Quiz grading benchmark: accuracy on labelled answers and grading throughput.
+
+Grades the labelled answers in corpus/quiz_answers.txt (topic, question index,
+1 for correct or 0 for wrong, answer) with the original heuristic (a
+SequenceMatcher ratio above 0.7 against any word of the question) and with
+QuizGrader. The questions are split in two (--holdout, --seed): a threshold
+sweep on the tuning half shows where QUIZ_PASS_SCORE should sit, and accuracy,
+precision, recall and how many answers that just repeat the question pass are
+reported on the held-out half only, at the configured and the tuned
+threshold. Throughput is answers graded per second over all answers, one at a
+time and as whole-quiz batches.
+
+    python benchmarks/quiz_grading.py
+    python benchmarks/quiz_grading.py --threshold 0.3 --repeat 50
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "quiz_grading.json")
+sys.path.insert(0, ROOT)
+
+from quiz_grader import QuizGrader  # noqa: E402
+from text_vectors import normalize_text  # noqa: E402
+
+
+def heuristic_is_correct(question, user_answer):
+    """The grader app.py used before QuizGrader."""
+    user_answer = user_answer.lower()
+    return any(SequenceMatcher(None, keyword, user_answer).ratio() > 0.7 for keyword in question.lower().split())
+
+
+def read_labelled(path):
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                topic, index, label, answer = line.rstrip("\n").split("\t")
+                rows.append((topic, int(index), label == "1", answer))
+    return rows
+
+
+def split_by_question(rows, holdout, seed):
+    """(tuning rows, held-out rows), with all answers to one question on the same side."""
+    questions = sorted({(row[0], row[1]) for row in rows})
+    random.Random(seed).shuffle(questions)
+    held_out = set(questions[:round(len(questions) * holdout)])
+    return [r for r in rows if (r[0], r[1]) not in held_out], [r for r in rows if (r[0], r[1]) in held_out]
+
+
+def is_echo(question, answer):
+    """An answer whose words all come from the question."""
+    words = normalize_text(answer).split()
+    return bool(words) and set(words) <= set(normalize_text(question).split())
+
+
+def confusion(predicted, rows):
+    tp = sum(p and r[2] for p, r in zip(predicted, rows))
+    fp = sum(p and not r[2] for p, r in zip(predicted, rows))
+    fn = sum(not p and r[2] for p, r in zip(predicted, rows))
+    correct = sum(p == r[2] for p, r in zip(predicted, rows))
+    return {
+        "accuracy": round(correct / len(rows), 3),
+        "precision": round(tp / (tp + fp), 3) if tp + fp else 0.0,
+        "recall": round(tp / (tp + fn), 3) if tp + fn else 0.0,
+    }
+
+
+def per_second(func, count, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return round(count * repeat / (time.perf_counter() - started), 1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quiz answer grading.")
+    parser.add_argument("--answers", default=os.path.join(HERE, "corpus", "quiz_answers.txt"))
+    parser.add_argument("--quiz-bank", default=os.path.join(ROOT, "content", "quiz_bank.json"))
+    parser.add_argument("--threshold", type=float, help="pass score to evaluate (default: QuizGrader's)")
+    parser.add_argument("--holdout", type=float, default=0.5, help="share of the questions held out from tuning")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the tuning/held-out split")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the answers for throughput")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.quiz_bank, encoding="utf-8") as f:
+        quiz_bank = json.load(f)
+    rows = read_labelled(args.answers)
+    tuning, held_out = split_by_question(rows, args.holdout, args.seed)
+    grader = QuizGrader(quiz_bank) if args.threshold is None else QuizGrader(quiz_bank, threshold=args.threshold)
+    question = lambda row: quiz_bank[row[0]][row[1]]["q"]
+    score = lambda row: grader.score(row[0], row[1], row[3])
+
+    # The threshold is chosen on the tuning questions only
+    tuning_scores = [score(row) for row in tuning]
+    sweep = {t / 100: confusion([s >= t / 100 for s in tuning_scores], tuning)["accuracy"] for t in range(5, 60, 5)}
+    tuned = max(sweep, key=lambda t: (sweep[t], -t))
+
+    echoes = [i for i, row in enumerate(held_out) if is_echo(question(row), row[3])]
+    old = [heuristic_is_correct(question(row), row[3]) for row in held_out]
+    scores = [score(row) for row in held_out]
+
+    def evaluate(predicted):
+        return dict(confusion(predicted, held_out), echoes_passed=sum(predicted[i] for i in echoes))
+
+    # Whole quizzes: every labelled answer to a topic graded in one call
+    by_topic = {}
+    for topic, index, _, answer in rows:
+        by_topic.setdefault(topic, []).append((index, answer))
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "answers": len(rows),
+            "tuning_answers": len(tuning),
+            "held_out_answers": len(held_out),
+            "held_out_echoes": len(echoes),
+            "seed": args.seed,
+            "threshold": grader.threshold,
+            "tuned_threshold": tuned,
+        },
+        "heuristic": dict(evaluate(old),
+                          answers_per_second=per_second(lambda: [heuristic_is_correct(question(r), r[3]) for r in rows],
+                                                        len(rows), args.repeat)),
+        "grader": dict(evaluate([s >= grader.threshold for s in scores]),
+                       max_echo_score=round(max((scores[i] for i in echoes), default=0.0), 3),
+                       answers_per_second=per_second(lambda: [score(r) for r in rows], len(rows), args.repeat),
+                       batch_answers_per_second=per_second(
+                           lambda: [grader.score_batch(topic, pairs) for topic, pairs in by_topic.items()],
+                           len(rows), args.repeat)),
+        "grader_tuned": evaluate([s >= tuned for s in scores]),
+        "tuning_threshold_accuracy": {f"{t:.2f}": a for t, a in sweep.items()},
+    }
+
+    print(f"{len(rows)} labelled answers: threshold tuned on {len(tuning)}, scored on {len(held_out)} held-out "
+          f"answers to other questions ({len(echoes)} repeat the question)")
+    print(f"{'grader':<24}{'accuracy':>10}{'precision':>11}{'recall':>8}{'echoes ok':>11}")
+    for name, label in (("heuristic", "heuristic"), ("grader", f"grader @ {grader.threshold}"),
+                        ("grader_tuned", f"grader @ {tuned:.2f} (tuned)")):
+        stats = results[name]
+        print(f"{label:<24}{stats['accuracy']:>10.3f}{stats['precision']:>11.3f}{stats['recall']:>8.3f}"
+              f"{stats['echoes_passed']:>11}")
+    print(f"Grading: {results['grader']['answers_per_second']:.1f} answers/s one at a time, "
+          f"{results['grader']['batch_answers_per_second']:.1f} batched "
+          f"(heuristic {results['heuristic']['answers_per_second']:.1f})")
+    print("Tuning accuracy by threshold: " + ", ".join(f"{t:.2f}: {a:.3f}" for t, a in sweep.items()))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
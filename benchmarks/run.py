@@ -0,0 +1,305 @@
+"""Benchmark and load-test harness for the chat message path and the REST routes.
+
+Runs offline against the in-process app through the Flask and Flask-SocketIO
+test clients, reports throughput, p50/p95/p99 latency and peak memory per
+scenario, writes the results as JSON and compares them with a saved baseline.
+
+    python benchmarks/run.py                      # run everything, compare with the baseline
+    python benchmarks/run.py -s faq -s socket_message --iterations 2000
+    python benchmarks/run.py --save-baseline      # record the current numbers as the baseline
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "latest.json")
+
+# Smallest valid PNG (1x1 transparent pixel) for upload scenarios
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+
+def read_corpus(name):
+    with open(os.path.join(HERE, "corpus", name), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_app(workdir):
+    """Import app.py with every on-disk store pointed at a scratch directory."""
+    os.environ.setdefault("CONTENT_WATCH", "0")
+    os.environ.setdefault("CHAT_LOG_DB", os.path.join(workdir, "chat_history.db"))
+    os.environ.setdefault("SESSION_DB", os.path.join(workdir, "sessions.db"))
+    os.environ.setdefault("UPLOAD_FOLDER", os.path.join(workdir, "uploads"))
+    os.environ.setdefault("REMINDER_DB", os.path.join(workdir, "reminders.db"))
+    os.environ.setdefault("NOTES_INDEX", os.path.join(workdir, "notes_index"))
+    # Every scenario runs as one client; admission control has its own load test (spike.py)
+    os.environ.setdefault("USER_RATE_LIMIT", "0")
+    os.environ.setdefault("IP_RATE_LIMIT", "0")
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import logging
+    logging.disable(logging.INFO)
+    import app
+    # Scenarios that reach the model fallback should measure it, not the loading window
+    app.classifier_loader.wait(120)
+    return app
+
+
+# --- Scenarios ---
+# Each scenario takes the app module and returns a function that performs one
+# operation given its iteration number.
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(factory):
+        SCENARIOS[name] = factory
+        return factory
+    return register
+
+
+@scenario("predict_intent")
+def predict_intent_scenario(app):
+    messages = read_corpus("messages.txt")
+    return lambda i: app.predict_intent(messages[i % len(messages)])
+
+
+@scenario("predict_intent_noisy")
+def predict_intent_noisy_scenario(app):
+    # Misspelled messages: most miss the exact patterns and go through spelling correction
+    messages = [line.split("\t", 1)[1] for line in read_corpus("noisy_messages.txt")]
+    return lambda i: app.predict_intent(messages[i % len(messages)]) or app.correct_intent(messages[i % len(messages)])
+
+
+@scenario("extract_keywords")
+def extract_keywords_scenario(app):
+    messages = read_corpus("messages.txt")
+    return lambda i: app.extract_keywords(messages[i % len(messages)])
+
+
+@scenario("socket_message")
+def socket_message_scenario(app, users=20):
+    """Replay the message corpus through handle_message from several simulated users, one session each."""
+    messages = read_corpus("messages.txt")
+    clients = []
+    for n in range(users):
+        client = app.socketio.test_client(app.app)
+        client.emit("join", {})
+        clients.append(client)
+
+    def op(i):
+        client = clients[i % users]
+        client.emit("message", {"message": messages[i % len(messages)]})
+        client.get_received()
+    return op
+
+
+@scenario("faq")
+def faq_scenario(app):
+    client = app.app.test_client()
+    queries = read_corpus("faq_queries.txt")
+    return lambda i: client.post("/faq", json={"question": queries[i % len(queries)]})
+
+
+@scenario("resources")
+def resources_scenario(app):
+    client = app.app.test_client()
+    topics = ["python", "java", "ai", "physics", "c++"]
+    return lambda i: client.post("/resources", json={"topic": topics[i % len(topics)]})
+
+
+@scenario("notes_search")
+def notes_search_scenario(app):
+    topics = ["recursion", "machine learning", "neural networks", "polymorphism", "dbms transactions",
+              "binary search tree", "spaced repetition", "python exceptions"]
+    return lambda i: app.search_notes(topics[i % len(topics)])
+
+
+@scenario("index")
+def index_scenario(app):
+    """Page loads from a returning client: full gzip response, then conditional GETs."""
+    client = app.app.test_client()
+    headers = {"Accept-Encoding": "gzip, br"}
+    etag = client.get("/", headers=headers).headers["ETag"]
+
+    def op(i):
+        extra = {"If-None-Match": etag} if i % 2 else {}
+        client.get("/", headers=dict(headers, **extra)).close()
+    return op
+
+
+@scenario("reminder")
+def reminder_scenario(app):
+    """Schedule reminders through /reminder; they are due far enough ahead that none fire."""
+    client = app.app.test_client()
+    app.REMINDER_MAX_PER_USER = 10 ** 9
+
+    def op(i):
+        client.post("/reminder", json={"text": f"revise chapter {i}", "time": "in 2 days"})
+    return op
+
+
+@scenario("export")
+def export_scenario(app, history=2000):
+    """Stream a long chat history out of /export."""
+    for n in range(history):
+        app.chat_log.append("bench_export", "user" if n % 2 else "bot", f"benchmark message {n}")
+    app.chat_log.flush()
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = "bench_export"
+    formats = ["txt", "json", "ndjson"]
+
+    def op(i):
+        response = client.get(f"/export?format={formats[i % len(formats)]}")
+        for _ in response.response:
+            pass
+    return op
+
+
+@scenario("upload")
+def upload_scenario(app):
+    client = app.app.test_client()
+
+    def op(i):
+        data = {"file": (io.BytesIO(PNG_BYTES), f"bench_{i % 50}.png")}
+        client.post("/upload", data=data, content_type="multipart/form-data")
+    return op
+
+
+@scenario("media")
+def media_scenario(app):
+    """Repeat loads of a stored image: a full response, then 304s on the strong ETag."""
+    client = app.app.test_client()
+    url = client.post("/upload", data=PNG_BYTES, content_type="image/png").get_json()["url"]
+    etag = client.get(url).headers["ETag"]
+
+    def op(i):
+        headers = {"If-None-Match": etag} if i % 10 else {}
+        client.get(url, headers=headers).close()
+    return op
+
+
+# --- Measurement ---
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def measure(op, iterations, warmup):
+    for i in range(warmup):
+        op(i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        op(i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    # Peak memory comes from a separate, shorter traced pass so tracing does not skew latency
+    tracemalloc.start()
+    for i in range(max(1, iterations // 10)):
+        op(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "seconds": round(elapsed, 4),
+        "throughput": round(iterations / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 4),
+        "p95_ms": round(percentile(latencies, 0.95), 4),
+        "p99_ms": round(percentile(latencies, 0.99), 4),
+        "max_ms": round(latencies[-1], 4),
+        "peak_traced_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return human-readable regressions: p95 up or throughput down by more than threshold."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.3f} -> {current['p95_ms']:.3f} ms")
+        if previous["throughput"] and current["throughput"] < previous["throughput"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {previous['throughput']:.1f} -> {current['throughput']:.1f} ops/s")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Smart Study Buddy app.")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative regression before failing (default 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.scenario or list(SCENARIOS)
+    with tempfile.TemporaryDirectory() as workdir:
+        app = load_app(workdir)
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "nlp": app.nlp_loader.state,
+            },
+            "scenarios": {},
+        }
+        print(f"{'scenario':<22}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KB':>10}")
+        for name in names:
+            stats = measure(SCENARIOS[name](app), args.iterations, args.warmup)
+            results["scenarios"][name] = stats
+            print(f"{name:<22}{stats['throughput']:>10.1f}{stats['p50_ms']:>10.3f}"
+                  f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['peak_traced_kb']:>10.1f}")
+        results["meta"]["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
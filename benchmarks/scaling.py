@@ -0,0 +1,193 @@
+"""Throughput scaling benchmark for multi-worker deployments (serve.py).
+
+Starts serve.py with each worker count in turn, drives it over real HTTP from
+several client processes for a fixed time, and reports requests/s, the
+speedup over one worker and the scaling efficiency (speedup / workers).
+Requests are FAQ lookups with a unique suffix so every one misses the
+response cache and does real work in the worker.
+
+    python benchmarks/scaling.py                          # 1, 2 and 4 workers
+    python benchmarks/scaling.py -w 1 -w 8 --clients 16 --seconds 20
+
+The client processes share the machine with the workers, so run the load on
+a host with spare cores (at least workers + client processes) for a fair
+curve. On a single-core host every worker count tops out at the same rate.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "scaling.json")
+
+
+def read_corpus(name):
+    with open(os.path.join(HERE, "corpus", name), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_json(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("GET", path)
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def start_server(workers, port, state_dir, startup_timeout=120, env=None):
+    """Launch serve.py and wait until every worker answers /health."""
+    env = dict(os.environ, CONTENT_WATCH="0", REMINDER_SCHEDULER="0", MESSAGE_LOG_SAMPLE_RATE="0", **(env or {}))
+    # All load comes from one address; keep the per-IP limit out of a throughput test
+    env.setdefault("IP_RATE_LIMIT", "0")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(workers),
+         "--port", str(port), "--state-dir", state_dir],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    seen = set()
+    deadline = time.time() + startup_timeout
+    while len(seen) < workers:
+        if proc.poll() is not None or time.time() > deadline:
+            stop_server(proc)
+            raise RuntimeError(f"serve.py did not start {workers} worker(s) (saw {len(seen)})")
+        try:
+            seen.add(get_json(port, "/health")["pid"])
+        except (OSError, ValueError, KeyError):
+            time.sleep(0.2)
+    return proc
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def client_loop(port, seconds, reconnect_every, seed, results):
+    """Issue uncached FAQ requests until the deadline; report (completed, errors, latencies)."""
+    queries = read_corpus("faq_queries.txt")
+    completed = errors = 0
+    latencies = []
+    conn = None
+    deadline = time.perf_counter() + seconds
+    i = seed
+    while time.perf_counter() < deadline:
+        if conn is None or completed % reconnect_every == 0:
+            if conn is not None:
+                conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        body = json.dumps({"question": f"{queries[i % len(queries)]} {seed}-{i}"})
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/faq", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except OSError:
+            errors += 1
+            conn.close()
+            conn = None
+        latencies.append(time.perf_counter() - start)
+        completed += 1
+        i += 1
+    if conn is not None:
+        conn.close()
+    results.put((completed, errors, latencies))
+
+
+def run_load(port, clients, seconds, reconnect_every):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client_loop, args=(port, seconds, reconnect_every, n * 1000003, results))
+             for n in range(clients)]
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - start
+    completed = sum(c for c, _, _ in collected)
+    latencies = sorted(l for _, _, ls in collected for l in ls)
+    p = lambda fraction: latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        "requests": completed,
+        "errors": sum(e for _, e, _ in collected),
+        "seconds": round(elapsed, 3),
+        "throughput": round(completed / elapsed, 1),
+        "p50_ms": round(p(0.50), 3),
+        "p95_ms": round(p(0.95), 3),
+        "p99_ms": round(p(0.99), 3),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure throughput scaling across serve.py worker counts.")
+    parser.add_argument("-w", "--workers", type=int, action="append", help="worker count to test (repeatable)")
+    parser.add_argument("--clients", type=int, default=8, help="load-generating client processes")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration per worker count")
+    parser.add_argument("--reconnect-every", type=int, default=20,
+                        help="requests per connection, so connections keep spreading across workers")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    worker_counts = args.workers or [1, 2, 4]
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "clients": args.clients,
+            "seconds": args.seconds,
+        },
+        "runs": {},
+    }
+    print(f"{'workers':<10}{'req/s':>10}{'speedup':>10}{'effic.':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    base = None
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as state_dir:
+            port = free_port()
+            server = start_server(workers, port, state_dir)
+            try:
+                stats = run_load(port, args.clients, args.seconds, args.reconnect_every)
+            finally:
+                stop_server(server)
+        base = base or stats["throughput"] / workers
+        stats["speedup"] = round(stats["throughput"] / base, 2)
+        stats["efficiency"] = round(stats["speedup"] / workers, 2)
+        results["runs"][str(workers)] = stats
+        print(f"{workers:<10}{stats['throughput']:>10.1f}{stats['speedup']:>10.2f}{stats['efficiency']:>10.2f}"
+              f"{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['errors']:>8}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
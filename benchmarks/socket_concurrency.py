@@ -0,0 +1,170 @@
+"""Chat latency with hundreds of concurrent Socket.IO clients, per ASYNC_MODE.
+
+Starts serve.py (one worker) in each --mode in turn and connects --clients
+websocket clients to it, spread over --processes client processes and ramped
+up over --ramp seconds. Each client repeatedly waits a random think time
+(mean --think seconds), sends a chat message and waits for the reply, for
+--seconds. Reports per mode how many clients connected, replies per second,
+busy replies (admission control or a full NLP pool), timeouts, and
+p50/p95/p99 reply latency.
+
+Modes whose server package is missing are skipped: install the optional
+requirements (pip install -r requirements-async.txt) for eventlet and
+gevent. The clients use python-socketio's asyncio client, which needs
+aiohttp (pip install aiohttp).
+
+    python benchmarks/socket_concurrency.py                   # 300 clients
+    python benchmarks/socket_concurrency.py --clients 500 --mode gevent
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "socket_concurrency.json")
+sys.path.insert(0, HERE)
+
+from scaling import free_port, read_corpus, start_server, stop_server  # noqa: E402
+
+MODES = ("threading", "eventlet", "gevent")
+
+
+async def chat_client(url, n, args, start_at, deadline, records, counts):
+    import socketio
+
+    rng = random.Random(n)
+    messages = read_corpus("messages.txt")
+    replies = asyncio.Queue()
+    client = socketio.AsyncClient(reconnection=False)
+    client.on("response", replies.put_nowait)
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(max(0.0, start_at - loop.time()))
+    try:
+        await client.connect(url, transports=["websocket"], wait_timeout=args.timeout)
+    except Exception:
+        counts["connect_errors"] += 1
+        return
+    counts["connected"] += 1
+    try:
+        await client.emit("join", {})
+        while loop.time() < deadline:
+            await asyncio.sleep(rng.expovariate(1 / args.think))
+            # A reply that arrived after its timeout must not be taken for the next one
+            while not replies.empty():
+                replies.get_nowait()
+            sent = time.perf_counter()
+            await client.emit("message", {"message": messages[rng.randrange(len(messages))]})
+            try:
+                reply = await asyncio.wait_for(replies.get(), args.timeout)
+            except asyncio.TimeoutError:
+                counts["timeouts"] += 1
+                continue
+            if reply.get("busy"):
+                counts["busy"] += 1
+            else:
+                records.append(time.perf_counter() - sent)
+    except Exception:
+        counts["errors"] += 1
+    finally:
+        await client.disconnect()
+
+
+def client_process(url, first, count, args, results):
+    """Run clients first..first+count-1 in one event loop; report (latencies, counts)."""
+    async def main():
+        loop = asyncio.get_running_loop()
+        begin = loop.time()
+        records = []
+        counts = dict.fromkeys(("connected", "connect_errors", "busy", "timeouts", "errors"), 0)
+        # Ramp-up slots are interleaved across processes
+        await asyncio.gather(*(
+            chat_client(url, n, args, begin + args.ramp * n / args.clients, begin + args.ramp + args.seconds,
+                        records, counts)
+            for n in range(first, first + count)))
+        return records, counts
+    results.put(asyncio.run(main()))
+
+
+def run(mode, args):
+    with tempfile.TemporaryDirectory() as state_dir:
+        port = free_port()
+        server = start_server(1, port, state_dir, env={"ASYNC_MODE": mode})
+        try:
+            results = multiprocessing.Queue()
+            share = -(-args.clients // args.processes)
+            procs = [multiprocessing.Process(target=client_process,
+                                             args=(f"http://127.0.0.1:{port}", first, min(share, args.clients - first),
+                                                   args, results))
+                     for first in range(0, args.clients, share)]
+            started = time.perf_counter()
+            for proc in procs:
+                proc.start()
+            collected = [results.get() for _ in procs]
+            elapsed = time.perf_counter() - started
+            for proc in procs:
+                proc.join()
+        finally:
+            stop_server(server)
+    latencies = sorted(l for records, _ in collected for l in records)
+    counts = {key: sum(c[key] for _, c in collected) for key in collected[0][1]}
+    pick = lambda fraction: round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1) \
+        if latencies else None
+    return dict(counts, replies=len(latencies), replies_per_second=round(len(latencies) / elapsed, 1),
+                p50_ms=pick(0.50), p95_ms=pick(0.95), p99_ms=pick(0.99))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Socket.IO chat latency under many concurrent clients.")
+    parser.add_argument("--mode", action="append", choices=MODES, help="ASYNC_MODE to test (repeatable; default: all installed)")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--processes", type=int, default=4, help="client processes")
+    parser.add_argument("--seconds", type=float, default=20.0, help="measured time after the ramp-up")
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which clients connect")
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds between a client's messages")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a connection or reply")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if importlib.util.find_spec("aiohttp") is None:
+        print("The benchmark clients need aiohttp: pip install aiohttp")
+        return 1
+    modes = args.mode or [mode for mode in MODES if mode == "threading" or importlib.util.find_spec(mode)]
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "clients": args.clients,
+            "think_seconds": args.think,
+            "seconds": args.seconds,
+        },
+        "runs": {},
+    }
+    print(f"{args.clients} clients, one message every {args.think}s on average, {args.seconds}s measured")
+    print(f"{'mode':<11}{'connected':>10}{'replies/s':>11}{'busy':>7}{'timeouts':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for mode in modes:
+        stats = results["runs"][mode] = run(mode, args)
+        print(f"{mode:<11}{stats['connected']:>10}{stats['replies_per_second']:>11.1f}{stats['busy']:>7}"
+              f"{stats['timeouts']:>10}{stats['p50_ms'] or 0:>9.1f}{stats['p95_ms'] or 0:>9.1f}{stats['p99_ms'] or 0:>9.1f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Spelling-correction benchmark: lookup latency and fallback rate on noisy messages.
+
+Builds the intent pattern matcher and the symmetric-delete spelling index from
+intents.json, then reports
+
+- index build time and size,
+- per-token lookup latency (cold cache, warm cache, and difflib for comparison),
+- how many noisy messages (benchmarks/corpus/noisy_messages.txt, "tag<TAB>text")
+  fall through to the fallback with exact matching alone and with correction,
+  and how many get the right intent,
+- how many clean messages (messages.txt) correction changes the intent for.
+
+    python benchmarks/spell_correction.py
+"""
+import argparse
+import difflib
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "spelling.json")
+sys.path.insert(0, ROOT)
+
+from intent_matcher import IntentMatcher  # noqa: E402
+from spelling import SpellingIndex  # noqa: E402
+
+
+def read_corpus(name):
+    with open(os.path.join(HERE, "corpus", name), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def latency(func, items, repeat):
+    """Per-call latency percentiles in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            func(item)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    pick = lambda fraction: round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1e6, 2)
+    return {"calls": len(samples), "p50_us": pick(0.50), "p95_us": pick(0.95), "p99_us": pick(0.99),
+            "mean_us": round(sum(samples) / len(samples) * 1e6, 2)}
+
+
+def predict(matcher, index, message):
+    tag = matcher.predict(message)
+    if tag is None and index is not None:
+        tag = matcher.predict(index.correct(message))
+    return tag
+
+
+def evaluate(matcher, index, labelled):
+    fallbacks = correct = 0
+    for expected, message in labelled:
+        tag = predict(matcher, index, message)
+        fallbacks += tag is None
+        correct += tag == expected
+    return {"fallback_rate": round(fallbacks / len(labelled), 3), "accuracy": round(correct / len(labelled), 3)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark typo-tolerant intent lookup.")
+    parser.add_argument("--intents", default=os.path.join(ROOT, "intents.json"))
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the noisy tokens per latency run")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.intents, encoding="utf-8") as f:
+        intents = json.load(f)["intents"]
+    matcher = IntentMatcher(intents)
+    start = time.perf_counter()
+    index = SpellingIndex.from_intents(intents)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    labelled = [tuple(line.split("\t", 1)) for line in read_corpus("noisy_messages.txt")]
+    clean = read_corpus("messages.txt")
+    tokens = sorted({t for _, m in labelled for t in re.findall(r"[a-z]+", m.lower()) if t not in index.words})
+    vocabulary = list(index.words)
+
+    def cold_lookup(token):
+        index._cache.clear()
+        index.lookup(token)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "index": {"words": len(index), "delete_keys": len(index._deletes), "build_ms": round(build_ms, 3)},
+        "lookup": {
+            "cold": latency(cold_lookup, tokens, args.repeat),
+            "warm": latency(index.lookup, tokens, args.repeat),
+            "difflib": latency(lambda t: difflib.get_close_matches(t, vocabulary, n=1, cutoff=0.75),
+                               tokens, max(1, args.repeat // 10)),
+        },
+        "noisy": {
+            "messages": len(labelled),
+            "exact": evaluate(matcher, None, labelled),
+            "corrected": evaluate(matcher, index, labelled),
+        },
+        "clean": {
+            "messages": len(clean),
+            "changed": sum(predict(matcher, None, m) != predict(matcher, index, m) for m in clean),
+        },
+    }
+
+    print(f"Index: {results['index']['words']} words, {results['index']['delete_keys']} delete keys, "
+          f"built in {results['index']['build_ms']:.2f} ms")
+    print(f"{'lookup':<10}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for name, stats in results["lookup"].items():
+        print(f"{name:<10}{stats['p50_us']:>10.2f}{stats['p95_us']:>10.2f}{stats['p99_us']:>10.2f}")
+    noisy = results["noisy"]
+    print(f"Noisy messages ({noisy['messages']}): fallback rate {noisy['exact']['fallback_rate']:.1%} -> "
+          f"{noisy['corrected']['fallback_rate']:.1%}, accuracy {noisy['exact']['accuracy']:.1%} -> "
+          f"{noisy['corrected']['accuracy']:.1%}")
+    print(f"Clean messages ({results['clean']['messages']}): {results['clean']['changed']} changed intent")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
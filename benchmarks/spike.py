@@ -0,0 +1,183 @@
+"""Load test for admission control: a 10x traffic spike against one server.
+
+Starts serve.py, then sends uncached FAQ requests open-loop (on a fixed
+schedule, whether or not earlier requests have finished) in three phases:
+baseline rate, --spike times the baseline rate, and baseline again. It runs
+once with admission control and once with the concurrency limit off, and
+reports per phase how many requests were served, throttled (429), shed (503)
+or timed out, with p50/p99 latency of the served ones. Latency is measured
+from each request's scheduled send time, so a backed-up client counts
+against the server. Requests carry that time in X-Request-Start, as a
+front proxy would, so the server sheds on total queue time. The "no-stamp"
+run repeats the admission run without the header, as when no proxy sets it:
+the server then only sees the time a request waits once it has been read.
+
+    python benchmarks/spike.py
+    python benchmarks/spike.py --rate 40 --spike 10 --seconds 10 --max-concurrent 8
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "spike.json")
+sys.path.insert(0, HERE)
+
+from scaling import free_port, read_corpus, start_server, stop_server  # noqa: E402
+
+PHASES = ("baseline", "spike", "recovery")
+
+
+def send(port, body, timeout, request_start):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    headers = {"Content-Type": "application/json"}
+    if request_start is not None:
+        headers["X-Request-Start"] = f"t={request_start:.6f}"
+    try:
+        conn.request("POST", "/faq", body, headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    except OSError:
+        return "timeout"
+    finally:
+        conn.close()
+
+
+def generator(port, schedule, timeout, threads, seed, stamp, results):
+    """Fire one request at each (phase, offset) in schedule; report (phase, status, latency) per request."""
+    queries = read_corpus("faq_queries.txt")
+    records = []
+    lock = threading.Lock()
+
+    # Stamp each request with its scheduled time, like a front proxy stamping arrival
+    wall_offset = time.time() - time.perf_counter()
+
+    def fire(phase, due, i):
+        body = json.dumps({"question": f"{queries[i % len(queries)]} {seed}-{i}"})
+        status = send(port, body, timeout, due + wall_offset if stamp else None)
+        with lock:
+            records.append((phase, status, time.perf_counter() - due))
+
+    start = time.perf_counter() + 0.5
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for i, (phase, offset) in enumerate(schedule):
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, phase, due, i)
+    results.put(records)
+
+
+def build_schedule(rate, spike, seconds):
+    """Evenly spaced (phase, offset) send times for the three phases."""
+    schedule = []
+    offset = 0.0
+    for phase, phase_rate in zip(PHASES, (rate, rate * spike, rate)):
+        count = int(phase_rate * seconds)
+        schedule.extend((phase, offset + n / phase_rate) for n in range(count))
+        offset += seconds
+    return schedule
+
+
+def summarize(records):
+    summary = {}
+    for phase in PHASES:
+        rows = [r for r in records if r[0] == phase]
+        served = sorted(latency for _, status, latency in rows if status == 200)
+        pick = lambda fraction: round(served[min(len(served) - 1, int(fraction * len(served)))] * 1000, 1) if served else None
+        summary[phase] = {
+            "sent": len(rows),
+            "served": len(served),
+            "throttled": sum(status == 429 for _, status, _ in rows),
+            "shed": sum(status == 503 for _, status, _ in rows),
+            "timeouts": sum(status == "timeout" for _, status, _ in rows),
+            "p50_ms": pick(0.50),
+            "p99_ms": pick(0.99),
+        }
+    return summary
+
+
+def run(mode, env, stamp, args):
+    schedule = build_schedule(args.rate, args.spike, args.seconds)
+    # Interleave send times across generator processes
+    parts = [schedule[n::args.generators] for n in range(args.generators)]
+    with tempfile.TemporaryDirectory() as state_dir:
+        port = free_port()
+        server = start_server(1, port, state_dir, env=env)
+        try:
+            results = multiprocessing.Queue()
+            procs = [multiprocessing.Process(
+                target=generator, args=(port, part, args.timeout, args.threads, n, stamp, results))
+                for n, part in enumerate(parts)]
+            for proc in procs:
+                proc.start()
+            records = [record for _ in procs for record in results.get()]
+            for proc in procs:
+                proc.join()
+        finally:
+            stop_server(server)
+    summary = summarize(records)
+    for phase, stats in summary.items():
+        print(f"{mode:<12}{phase:<10}{stats['sent']:>7}{stats['served']:>8}{stats['throttled']:>7}{stats['shed']:>7}"
+              f"{stats['timeouts']:>9}{stats['p50_ms'] or 0:>10.1f}{stats['p99_ms'] or 0:>10.1f}")
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Spike load test for admission control.")
+    parser.add_argument("--rate", type=float, default=30.0, help="baseline requests per second")
+    parser.add_argument("--spike", type=float, default=10.0, help="spike rate as a multiple of the baseline")
+    parser.add_argument("--seconds", type=float, default=8.0, help="duration of each phase")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="ADMISSION_MAX_CONCURRENT for the server")
+    parser.add_argument("--max-wait-ms", type=float, default=250.0, help="ADMISSION_MAX_WAIT_MS for the server")
+    parser.add_argument("--timeout", type=float, default=10.0, help="client timeout per request")
+    parser.add_argument("--generators", type=int, default=2, help="load-generating processes")
+    parser.add_argument("--threads", type=int, default=128, help="request threads per generator")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    admission = {"ADMISSION_MAX_CONCURRENT": str(args.max_concurrent), "ADMISSION_MAX_WAIT_MS": str(args.max_wait_ms)}
+    # mode -> (server environment, whether requests carry X-Request-Start)
+    modes = {
+        "admission": (admission, True),
+        "no-stamp": (admission, False),
+        "unlimited": ({"ADMISSION_MAX_CONCURRENT": "0"}, True),
+    }
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "rate": args.rate,
+            "spike": args.spike,
+            "seconds": args.seconds,
+        },
+        "runs": {},
+    }
+    print(f"{'mode':<12}{'phase':<10}{'sent':>7}{'served':>8}{'429':>7}{'503':>7}{'timeouts':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode, (env, stamp) in modes.items():
+        results["runs"][mode] = run(mode, env, stamp, args)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
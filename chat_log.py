@@ -0,0 +1,127 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+_FLUSH = object()
+
+
+class ChatLog:
+    """Append-only conversation log in SQLite, indexed by user and time.
+
+    append() only enqueues; a single writer thread group-commits whatever has
+    queued up (at most max_batch rows, waiting at most flush_interval seconds)
+    in one transaction, so the socket handler never waits on disk.
+    """
+
+    def __init__(self, path="chat_history.db", flush_interval=0.1, max_batch=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self.written = 0
+        self.batches = 0
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, "
+            "ts REAL NOT NULL, role TEXT NOT NULL, message TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS messages_user_id ON messages(user_id, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS messages_user_ts ON messages(user_id, ts)")
+        self._writer = threading.Thread(target=self._write_loop, name="chat-log-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, user_id, role, message, ts=None):
+        self._queue.put((user_id, ts if ts is not None else time.time(), role, message))
+
+    def flush(self, timeout=5):
+        """Block until everything appended so far is committed."""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item[0] is _FLUSH:
+                    waiters.append(item[1])
+                    # A flush request commits immediately instead of waiting out the interval
+                    deadline = 0
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    conn.execute("BEGIN")
+                    conn.executemany("INSERT INTO messages (user_id, ts, role, message) VALUES (?, ?, ?, ?)", batch)
+                    conn.execute("COMMIT")
+                    self.written += len(batch)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    logging.error(f"Chat log write of {len(batch)} messages failed: {e}")
+                    # When BEGIN itself failed ("database is locked") there is nothing to roll back
+                    if conn.in_transaction:
+                        try:
+                            conn.execute("ROLLBACK")
+                        except sqlite3.Error as e:
+                            logging.error(f"Chat log rollback failed: {e}")
+            for waiter in waiters:
+                waiter.set()
+
+    def page(self, user_id, before=None, limit=50):
+        """One page of history in chronological order, ending just before message id `before`."""
+        conn = self._connect()
+        if before is None:
+            rows = conn.execute(
+                "SELECT id, ts, role, message FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT id, ts, role, message FROM messages WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (user_id, before, limit),
+            ).fetchall()
+        return [{"id": r[0], "ts": r[1], "role": r[2], "message": r[3]} for r in reversed(rows)]
+
+    def iter_messages(self, user_id, chunk_size=500):
+        """Yield a user's whole history oldest first, holding one chunk in memory at a time."""
+        conn = self._connect()
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, ts, role, message FROM messages WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (user_id, last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield {"id": r[0], "ts": r[1], "role": r[2], "message": r[3]}
+            last_id = rows[-1][0]
+
+    def delete_user(self, user_id):
+        self.flush()
+        return self._connect().execute("DELETE FROM messages WHERE user_id = ?", (user_id,)).rowcount
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "written": self.written, "batches": self.batches}
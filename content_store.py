@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+
+class ContentSnapshot:
+    """Immutable view of every content source and the indexes derived from it.
+
+    Handlers fetch one snapshot per request, so a reload that swaps in a new
+    snapshot never changes data under a request that is already running.
+    """
+
+    def __init__(self, values, hashes):
+        self._values = values
+        self.hashes = hashes
+        digest = hashlib.sha1()
+        for name in sorted(hashes):
+            digest.update(f"{name}:{hashes[name]};".encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+
+class _Source:
+    __slots__ = ("name", "path", "parse", "derived", "stat", "hash")
+
+    def __init__(self, name, path, parse, derived):
+        self.name = name
+        self.path = path
+        self.parse = parse
+        self.derived = derived
+        self.stat = None
+        self.hash = None
+
+
+class ContentStore:
+    """Loads content from JSON files and hot-swaps it when a file changes.
+
+    Each source may declare derived values (an intent matcher, a search index)
+    built from its parsed content; a reload re-parses only the files whose
+    contents changed and rebuilds only the values derived from them.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        self._snapshot = ContentSnapshot({}, {})
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._listeners = []
+
+    def register(self, name, path, parse=None, derived=None):
+        """Add a JSON source; derived maps a value name to a function of the parsed content."""
+        self._sources[name] = _Source(name, path, parse or (lambda data: data), derived or {})
+
+    def on_reload(self, callback):
+        """Call callback(snapshot, changed_names) after every reload that changed something."""
+        self._listeners.append(callback)
+
+    def current(self):
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def reload(self):
+        """Re-read changed sources and swap in a new snapshot; returns the names that changed."""
+        with self._reload_lock:
+            old = self._snapshot
+            values = dict(old._values)
+            hashes = dict(old.hashes)
+            changed = []
+            for source in self._sources.values():
+                try:
+                    stat = os.stat(source.path)
+                except OSError as e:
+                    if source.hash is None:
+                        raise
+                    logging.error(f"Content source '{source.name}' unavailable, keeping last version: {e}")
+                    continue
+                stat_key = (stat.st_mtime_ns, stat.st_size)
+                if stat_key == source.stat:
+                    continue
+                with open(source.path, "rb") as f:
+                    raw = f.read()
+                content_hash = hashlib.sha1(raw).hexdigest()
+                source.stat = stat_key
+                if content_hash == source.hash:
+                    continue
+                try:
+                    parsed = source.parse(json.loads(raw.decode("utf-8")))
+                    built = {key: build(parsed) for key, build in source.derived.items()}
+                except Exception as e:
+                    if source.hash is None:
+                        raise
+                    logging.error(f"Content source '{source.name}' failed to reload, keeping last version: {e}")
+                    continue
+                values[source.name] = parsed
+                values.update(built)
+                hashes[source.name] = content_hash
+                source.hash = content_hash
+                changed.append(source.name)
+            if changed:
+                self._snapshot = ContentSnapshot(values, hashes)
+                logging.info(f"Content reloaded ({', '.join(changed)}), version {self._snapshot.version}")
+        if changed:
+            for callback in self._listeners:
+                try:
+                    callback(self._snapshot, changed)
+                except Exception as e:
+                    logging.error(f"Content reload listener failed: {e}")
+        return changed
+
+    def watch(self, interval=2.0):
+        """Poll the source files on a background thread and reload when they change."""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="content-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logging.error(f"Content reload failed: {e}")
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,129 @@
+import itertools
+import json
+import math
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from text_vectors import char_ngrams, term_vector
+
+FaqHit = namedtuple("FaqHit", ["score", "question", "answer", "faq_id"])
+
+
+class FaqIndex:
+    """Character-trigram TF-IDF inverted index over FAQ questions.
+
+    Documents are stored as L2-normalized sublinear-TF vectors and the query is
+    weighted by IDF at lookup time, so adding or removing an FAQ only touches
+    that FAQ's postings. Trigrams found in more than `max_df` of the questions
+    carry almost no signal and are skipped at query time, which keeps lookups
+    from walking postings that cover most of the index.
+
+    Each trigram's postings are also kept as id and weight arrays, built on
+    first use after a change, so a query is scored with one bincount instead
+    of a dict update per posting.
+    """
+
+    def __init__(self, faqs=(), n=3, max_df=0.2):
+        self.n = n
+        self.max_df = max_df
+        self._postings = {}
+        self._arrays = {}
+        self._entries = {}
+        self._by_question = {}
+        self._ids = itertools.count()
+        self._lock = threading.RLock()
+        for item in faqs:
+            self.add(item["q"], item["a"])
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Load a JSON list of {"q": ..., "a": ...} objects."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, question, answer):
+        """Add an FAQ, replacing any existing entry with the same question; returns its id."""
+        with self._lock:
+            existing = self._by_question.get(question)
+            if existing is not None:
+                self.remove(existing)
+            faq_id = next(self._ids)
+            vector = term_vector(char_ngrams(question, self.n))
+            for term, weight in vector.items():
+                self._postings.setdefault(term, {})[faq_id] = weight
+                self._arrays.pop(term, None)
+            self._entries[faq_id] = (question, answer, vector)
+            self._by_question[question] = faq_id
+            return faq_id
+
+    def remove(self, faq_id):
+        with self._lock:
+            entry = self._entries.pop(faq_id, None)
+            if entry is None:
+                return False
+            question, _, vector = entry
+            del self._by_question[question]
+            for term in vector:
+                postings = self._postings[term]
+                del postings[faq_id]
+                self._arrays.pop(term, None)
+                if not postings:
+                    del self._postings[term]
+            return True
+
+    def remove_question(self, question):
+        faq_id = self._by_question.get(question)
+        return self.remove(faq_id) if faq_id is not None else False
+
+    def _term_arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings[term]
+            arrays = self._arrays[term] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+        return arrays
+
+    def search(self, query, k=1, min_score=0.0):
+        """Return up to k FaqHit results, best first, scoring at least min_score."""
+        with self._lock:
+            total = len(self._entries)
+            if not total:
+                return []
+            counts = Counter(char_ngrams(query, self.n))
+            df_limit = max(1, self.max_df * total) if total >= 50 else total
+            query_weights = {}
+            for term, count in counts.items():
+                postings = self._postings.get(term)
+                if not postings or len(postings) > df_limit:
+                    continue
+                idf = math.log((1 + total) / (1 + len(postings))) + 1
+                query_weights[term] = (1.0 + math.log(count)) * idf
+            norm = math.sqrt(sum(w * w for w in query_weights.values()))
+            if not norm:
+                return []
+            ids, weights = [], []
+            for term, weight in query_weights.items():
+                term_ids, term_weights = self._term_arrays(term)
+                ids.append(term_ids)
+                weights.append(term_weights * (weight / norm))
+            # Indexed by FAQ id; ids no query term reaches score 0
+            scores = np.bincount(np.concatenate(ids), weights=np.concatenate(weights))
+            # Everything scoring at least the k-th best, best first; ties go to the older FAQ
+            cutoff = np.partition(scores, -k)[-k] if k < len(scores) else 0.0
+            best = np.flatnonzero(scores >= cutoff)
+            best = best[np.lexsort((best, -scores[best]))][:k]
+            hits = []
+            for faq_id in best.tolist():
+                score = float(scores[faq_id])
+                if score <= 0 or score < min_score:
+                    break
+                question, answer, _ = self._entries[faq_id]
+                hits.append(FaqHit(score, question, answer, faq_id))
+            return hits
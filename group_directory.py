@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+
+
+class MemoryGroupDirectory:
+    """Group chat names and their members, for a single worker process."""
+
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def create(self, name):
+        with self._lock:
+            self._groups.setdefault(name, set())
+
+    def exists(self, name):
+        return name in self._groups
+
+    def join(self, name, user_id):
+        with self._lock:
+            self._groups.setdefault(name, set()).add(user_id)
+
+    def is_member(self, name, user_id):
+        return user_id in self._groups.get(name, ())
+
+    def leave(self, name, user_id):
+        with self._lock:
+            self._groups.get(name, set()).discard(user_id)
+
+    def member_count(self, name):
+        return len(self._groups.get(name, ()))
+
+    def names(self):
+        with self._lock:
+            return sorted(self._groups)
+
+
+class SQLiteGroupDirectory:
+    """Group directory shared by every worker process on the host through one SQLite file."""
+
+    def __init__(self, path="groups.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS chat_groups (name TEXT PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS group_members (name TEXT NOT NULL, user_id TEXT NOT NULL, "
+            "PRIMARY KEY (name, user_id))"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, name):
+        self._connect().execute("INSERT OR IGNORE INTO chat_groups (name) VALUES (?)", (name,))
+
+    def exists(self, name):
+        return self._connect().execute("SELECT 1 FROM chat_groups WHERE name = ?", (name,)).fetchone() is not None
+
+    def join(self, name, user_id):
+        conn = self._connect()
+        conn.execute("INSERT OR IGNORE INTO chat_groups (name) VALUES (?)", (name,))
+        conn.execute("INSERT OR IGNORE INTO group_members (name, user_id) VALUES (?, ?)", (name, user_id))
+
+    def is_member(self, name, user_id):
+        return self._connect().execute("SELECT 1 FROM group_members WHERE name = ? AND user_id = ?",
+                                       (name, user_id)).fetchone() is not None
+
+    def leave(self, name, user_id):
+        self._connect().execute("DELETE FROM group_members WHERE name = ? AND user_id = ?", (name, user_id))
+
+    def member_count(self, name):
+        return self._connect().execute("SELECT COUNT(*) FROM group_members WHERE name = ?", (name,)).fetchone()[0]
+
+    def names(self):
+        return [row[0] for row in self._connect().execute("SELECT name FROM chat_groups ORDER BY name")]
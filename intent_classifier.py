@@ -0,0 +1,201 @@
+import logging
+import pickle
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    """Resolves the tokenizer of models pickled while train_model.py ran as __main__."""
+
+    def find_class(self, module, name):
+        if module == "__main__" and name == "custom_tokenizer":
+            from preprocessing import custom_tokenizer
+            return custom_tokenizer
+        return super().find_class(module, name)
+
+
+def load_pipeline(model_path="intent_model.pkl"):
+    with open(model_path, "rb") as f:
+        return _ModelUnpickler(f).load()
+
+
+class LatencyStats:
+    """Running count/mean/max of per-call and per-batch latencies, in milliseconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.call_ms_total = 0.0
+        self.call_ms_max = 0.0
+        self.batches = 0
+        self.batch_ms_total = 0.0
+        self.batch_ms_max = 0.0
+        self.batch_size_max = 0
+
+    def record_batch(self, size, batch_ms, call_ms):
+        with self._lock:
+            self.batches += 1
+            self.batch_ms_total += batch_ms
+            self.batch_ms_max = max(self.batch_ms_max, batch_ms)
+            self.batch_size_max = max(self.batch_size_max, size)
+            self.calls += size
+            self.call_ms_total += sum(call_ms)
+            self.call_ms_max = max([self.call_ms_max] + call_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "call_ms_avg": self.call_ms_total / self.calls if self.calls else 0.0,
+                "call_ms_max": self.call_ms_max,
+                "batches": self.batches,
+                "batch_ms_avg": self.batch_ms_total / self.batches if self.batches else 0.0,
+                "batch_ms_max": self.batch_ms_max,
+                "batch_size_avg": self.calls / self.batches if self.batches else 0.0,
+                "batch_size_max": self.batch_size_max,
+            }
+
+
+class IntentClassifier:
+    """Serves the TF-IDF + MultinomialNB pipeline trained by train_model.py.
+
+    Messages submitted within `batch_window` seconds of each other are grouped
+    into a single vectorized predict_proba call on a background thread.
+    """
+
+    def __init__(self, pipeline, threshold=0.35, batch_window=0.005, max_batch=64):
+        self.pipeline = pipeline
+        self.classes = list(pipeline.classes_)
+        self.threshold = threshold
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.stats = LatencyStats()
+        self._pending = []
+        self._cond = threading.Condition()
+        self._worker = None
+        if batch_window > 0:
+            self._worker = threading.Thread(target=self._run, name="intent-classifier", daemon=True)
+            self._worker.start()
+
+    @classmethod
+    def load(cls, model_path="intent_model.bin", **kwargs):
+        """Load a model artifact (.bin, served by NumPy alone) or a pickled sklearn pipeline."""
+        if model_path.endswith(".bin"):
+            from intent_inference import NumpyIntentModel
+            return cls(NumpyIntentModel.load(model_path), **kwargs)
+        return cls(load_pipeline(model_path), **kwargs)
+
+    def predict_batch(self, messages):
+        """Return a (tag, confidence) pair per message; tag is None below the threshold."""
+        probabilities = self.pipeline.predict_proba(messages)
+        results = []
+        for row in probabilities:
+            best = int(row.argmax())
+            confidence = float(row[best])
+            tag = self.classes[best] if confidence >= self.threshold else None
+            results.append((tag, confidence))
+        return results
+
+    def submit(self, message):
+        future = Future()
+        with self._cond:
+            self._pending.append((message, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def predict(self, message, timeout=None):
+        if self.batch_window <= 0:
+            # Batching disabled: classify on the caller's thread
+            started = time.perf_counter()
+            result = self.predict_batch([message])[0]
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.stats.record_batch(1, elapsed_ms, [elapsed_ms])
+            return result
+        return self.submit(message).result(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Give concurrent messages one window to join this batch
+                deadline = time.perf_counter() + self.batch_window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._process(batch)
+
+    def _process(self, batch):
+        messages = [message for message, _, _ in batch]
+        started = time.perf_counter()
+        try:
+            results = self.predict_batch(messages)
+        except Exception as e:
+            logging.error(f"Intent classification failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+        call_ms = []
+        for (_, future, submitted), result in zip(batch, results):
+            call_ms.append((finished - submitted) * 1000)
+            future.set_result(result)
+        batch_ms = (finished - started) * 1000
+        self.stats.record_batch(len(batch), batch_ms, call_ms)
+        logging.debug(f"Classified batch of {len(batch)} in {batch_ms:.2f} ms")
+
+
+class ClassifierLoader:
+    """Loads the intent model on a background thread so startup does not wait on it.
+
+    Loading a pickled pipeline imports sklearn, scipy and NLTK, which takes
+    seconds; until it finishes (or if it fails) `classifier` is None and
+    messages are answered by pattern matching alone.
+    """
+
+    def __init__(self, model_path, **kwargs):
+        self.model_path = model_path
+        self.kwargs = kwargs
+        self.classifier = None
+        self.error = None
+        self.load_seconds = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="intent-classifier-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            self.classifier = IntentClassifier.load(self.model_path, **self.kwargs)
+            self.load_seconds = time.perf_counter() - started
+            logging.info(f"Intent classifier '{self.model_path}' ready in {self.load_seconds:.2f}s")
+        except Exception as e:
+            self.error = str(e)
+            logging.warning(f"Intent classifier unavailable, using pattern matching only: {e}")
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self.classifier is not None
+
+    def wait(self, timeout=None):
+        """Block until loading has finished or failed; returns whether the classifier is ready."""
+        self._done.wait(timeout)
+        return self.ready
+
+    @property
+    def state(self):
+        if self.ready:
+            return "ready"
+        return "failed" if self.error else "loading"
@@ -0,0 +1,223 @@
+import re
+
+import numpy as np
+
+from model_artifacts import ModelArtifact
+
+# --- Tokenizer ---
+# Reproduces preprocessing.custom_tokenizer without NLTK: the Treebank regexes
+# nltk.word_tokenize applies within a sentence, a regex stand-in for Punkt
+# sentence splitting, and a precomputed lemma table plus WordNet's noun suffix
+# rules in place of WordNet itself.
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.?!])[\"')\]]*\s+")
+
+_STARTING_QUOTES = [
+    (re.compile("([«“‘„]|[`]+)"), r" \1 "),
+    (re.compile(r"^\""), r"``"),
+    (re.compile(r"(``)"), r" \1 "),
+    (re.compile(r"([ \(\[{<])(\"|\'{2})"), r"\1 `` "),
+    (re.compile(r"(?i)(\')(?!re|ve|ll|m|t|s|d|n)(\w)\b"), r"\1 \2"),
+]
+_PUNCTUATION = [
+    (re.compile(r'([^\.])(\.)([\]\)}>"\'' "»”’ " r"]*)\s*$"), r"\1 \2 \3 "),
+    (re.compile(r"([:,])([^\d])"), r" \1 \2"),
+    (re.compile(r"([:,])$"), r" \1 "),
+    (re.compile(r"\.{2,}"), r" \g<0> "),
+    (re.compile(r"[;@#$%&]"), r" \g<0> "),
+    (re.compile(r'([^\.])(\.)([\]\)}>"\']*)\s*$'), r"\1 \2\3 "),
+    (re.compile(r"[?!]"), r" \g<0> "),
+    (re.compile(r"([^'])' "), r"\1 ' "),
+    (re.compile(r"[*]"), r" \g<0> "),
+    (re.compile(r"[\]\[\(\)\{\}\<\>]"), r" \g<0> "),
+    (re.compile(r"--"), r" -- "),
+]
+_ENDING_QUOTES = [
+    (re.compile("([»”’])"), r" \1 "),
+    (re.compile(r"''"), " '' "),
+    (re.compile(r'"'), " '' "),
+    (re.compile(r"([^' ])('[sS]|'[mM]|'[dD]|') "), r"\1 \2 "),
+    (re.compile(r"([^' ])('ll|'LL|'re|'RE|'ve|'VE|n't|N'T) "), r"\1 \2 "),
+]
+_CONTRACTIONS = [re.compile(pattern) for pattern in (
+    r"(?i)\b(can)(?#X)(not)\b", r"(?i)\b(d)(?#X)('ye)\b", r"(?i)\b(gim)(?#X)(me)\b",
+    r"(?i)\b(gon)(?#X)(na)\b", r"(?i)\b(got)(?#X)(ta)\b", r"(?i)\b(lem)(?#X)(me)\b",
+    r"(?i)\b(more)(?#X)('n)\b", r"(?i)\b(wan)(?#X)(na)(?=\s)",
+    r"(?i) ('t)(?#X)(is)\b", r"(?i) ('t)(?#X)(was)\b",
+)]
+
+
+def treebank_tokenize(sentence):
+    """nltk's NLTKWordTokenizer.tokenize for a single sentence."""
+    text = sentence
+    for regexp, substitution in _STARTING_QUOTES:
+        text = regexp.sub(substitution, text)
+    for regexp, substitution in _PUNCTUATION:
+        text = regexp.sub(substitution, text)
+    text = f" {text} "
+    for regexp, substitution in _ENDING_QUOTES:
+        text = regexp.sub(substitution, text)
+    for regexp in _CONTRACTIONS:
+        text = regexp.sub(r" \1 \2 ", text)
+    return text.split()
+
+
+# WordNetLemmatizer's default (noun) suffix rules, plus doubled consonants ("quizzes"),
+# which WordNet only gets right through its exception list
+_NOUN_SUFFIXES = [
+    ("s", ""), ("ses", "s"), ("ves", "f"), ("xes", "x"), ("zes", "z"), ("ches", "ch"),
+    ("shes", "sh"), ("men", "man"), ("ies", "y"), ("zzes", "z"),
+]
+
+
+def rule_lemma(word, known):
+    """Lemmatize like WordNet's noun morphology, accepting only forms `known` says exist; the shortest wins."""
+    forms = [word] + [word[:-len(old)] + new for old, new in _NOUN_SUFFIXES if word.endswith(old)]
+    valid = [form for form in forms if known(form)]
+    return min(valid, key=len) if valid else word
+
+
+class Tokenizer:
+    """Lowercase, word-tokenize, drop non-alphanumeric and stop words, then lemmatize.
+
+    Words in the lemma table get its lemma. With `known` (the model's
+    vocabulary), other words go through rule_lemma, so unseen plurals still
+    reach their vocabulary term; the training-time table lists every word on
+    which the rules and WordNet disagree.
+    """
+
+    def __init__(self, stop_words, lemmas, known=None):
+        self.stop_words = frozenset(stop_words)
+        self.lemmas = lemmas
+        self.known = known
+
+    def lemmatize(self, word):
+        lemma = self.lemmas.get(word)
+        if lemma is not None:
+            return lemma
+        return rule_lemma(word, self.known) if self.known else word
+
+    def __call__(self, text):
+        tokens = []
+        for sentence in _SENTENCE_BREAK.split(text.lower()):
+            for word in treebank_tokenize(sentence):
+                if word.isalnum() and word not in self.stop_words:
+                    tokens.append(self.lemmatize(word))
+        return tokens
+
+
+# --- Inference Engine ---
+class NumpyIntentModel:
+    """TF-IDF + MultinomialNB inference over a model artifact, with no sklearn or NLTK import.
+
+    Exposes classes_ and predict_proba like the sklearn pipeline, so it can be
+    served through IntentClassifier unchanged.
+    """
+
+    def __init__(self, artifact):
+        self.artifact = artifact
+        config = artifact.header["tokenizer"]
+        # Terms are looked up in the mapped vocabulary, never copied into a per-process dict
+        known = self._known if config.get("lemma_fallback") == "noun_rules" else None
+        self.tokenizer = Tokenizer(config.get("stop_words", []), config.get("lemmas", {}), known)
+        self.ngram_range = tuple(config.get("ngram_range", (1, 1)))
+        tfidf = artifact.header["tfidf"]
+        self.norm = tfidf.get("norm", "l2")
+        self.sublinear_tf = tfidf.get("sublinear_tf", False)
+        self.use_idf = tfidf.get("use_idf", True)
+        self.classes_ = np.array(artifact.classes)
+        self.idf = artifact["idf"]
+        # (features, classes) so a message's scores are a sum of rows
+        self.feature_log_prob_t = artifact["feature_log_prob"].T
+        self.class_log_prior = artifact["class_log_prior"]
+
+    @classmethod
+    def load(cls, path="intent_model.bin"):
+        return cls(ModelArtifact(path))
+
+    def _known(self, term):
+        return self.artifact.term_index(term) >= 0
+
+    def _ngrams(self, tokens):
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                yield " ".join(tokens[i:i + n])
+
+    def _features(self, message):
+        """Feature indices and TF-IDF weights of one message, normalized like TfidfVectorizer."""
+        counts = {}
+        for term in self._ngrams(self.tokenizer(message)):
+            index = self.artifact.term_index(term)
+            if index >= 0:
+                counts[index] = counts.get(index, 0) + 1
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            weights = np.log(weights) + 1
+        if self.use_idf:
+            weights = weights * self.idf[indices]
+        if self.norm == "l2":
+            weights /= np.sqrt(np.dot(weights, weights))
+        elif self.norm == "l1":
+            weights /= np.abs(weights).sum()
+        return indices, weights
+
+    def joint_log_likelihood(self, messages):
+        jll = np.tile(self.class_log_prior, (len(messages), 1))
+        rows, cols, vals = [], [], []
+        for row, message in enumerate(messages):
+            indices, weights = self._features(message)
+            rows.append(np.full(len(indices), row))
+            cols.append(indices)
+            vals.append(weights)
+        if messages:
+            cols = np.concatenate(cols)
+            if len(cols):
+                contributions = self.feature_log_prob_t[cols] * np.concatenate(vals)[:, None]
+                np.add.at(jll, np.concatenate(rows), contributions)
+        return jll
+
+    def predict_proba(self, messages):
+        jll = self.joint_log_likelihood(list(messages))
+        jll -= jll.max(axis=1, keepdims=True)
+        np.exp(jll, out=jll)
+        jll /= jll.sum(axis=1, keepdims=True)
+        return jll
+
+    def predict(self, messages):
+        """Batch API: the most likely intent tag and its probability for each message."""
+        probabilities = self.predict_proba(messages)
+        best = probabilities.argmax(axis=1)
+        return [(str(self.classes_[i]), float(probabilities[row, i])) for row, i in enumerate(best)]
+
+
+def check_parity(pipeline, model, messages, atol=1e-9):
+    """Compare this engine with the sklearn pipeline; returns (mismatched messages, max probability error)."""
+    expected = pipeline.predict_proba(messages)
+    actual = model.predict_proba(messages)
+    errors = np.abs(expected - actual).max(axis=1)
+    mismatched = [m for m, e, a in zip(messages, expected.argmax(axis=1), actual.argmax(axis=1)) if e != a]
+    return mismatched, float(errors.max()) if len(errors) else 0.0
+
+
+if __name__ == "__main__":
+    # Parity check: python intent_inference.py [intent_model.pkl] [intent_model.bin] [messages.txt]
+    import json
+    import sys
+    from intent_classifier import load_pipeline
+
+    pickle_path = sys.argv[1] if len(sys.argv) > 1 else "intent_model.pkl"
+    artifact_path = sys.argv[2] if len(sys.argv) > 2 else "intent_model.bin"
+    with open("intents.json", encoding="utf-8") as f:
+        messages = [p for intent in json.load(f)["intents"] for p in intent.get("patterns", [])]
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], encoding="utf-8") as f:
+            messages += [line.strip() for line in f if line.strip()]
+    mismatched, max_error = check_parity(load_pipeline(pickle_path), NumpyIntentModel.load(artifact_path), messages)
+    print(f"{len(messages)} messages, {len(mismatched)} label mismatches, max probability error {max_error:.2e}")
+    for message in mismatched:
+        print(f"  mismatch: {message!r}")
+    sys.exit(1 if mismatched else 0)
@@ -0,0 +1,84 @@
+from collections import deque, namedtuple
+
+# A single pattern hit inside a message: [start, end) offsets into the lowercased message
+PatternMatch = namedtuple("PatternMatch", ["start", "end", "tag", "pattern", "intent_index"])
+
+
+class IntentMatcher:
+    """Aho-Corasick automaton over every intent pattern, built once when the intents load.
+
+    A single left-to-right pass over the message reports every pattern occurrence,
+    so matching cost no longer grows with the number of intents.
+    """
+
+    def __init__(self, intents):
+        self.tags = [intent["tag"] for intent in intents]
+        # Trie: per-node transition dict, failure link and the patterns ending there
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        seen = set()
+        for intent_index, intent in enumerate(intents):
+            for pattern in intent.get("patterns", []):
+                pattern_lower = pattern.lower()
+                if not pattern_lower or (intent_index, pattern_lower) in seen:
+                    continue
+                seen.add((intent_index, pattern_lower))
+                self._add(pattern_lower, intent_index)
+        self._build_failure_links()
+
+    def _add(self, pattern, intent_index):
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), pattern, intent_index))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit the outputs of the failure state so a lookup never walks the chain
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        # Keep every node's outputs in file order (intent index, then length)
+        for outputs in self._out:
+            outputs.sort(key=lambda item: (item[2], -item[0]))
+
+    def find_all(self, message):
+        """Return every pattern occurrence in the message, ordered by end offset."""
+        text = message.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, pattern, intent_index in out[node]:
+                end = position + 1
+                matches.append(PatternMatch(end - length, end, self.tags[intent_index], pattern, intent_index))
+        return matches
+
+    def match(self, message):
+        """Return the winning match: the first intent in file order with any pattern hit."""
+        matches = self.find_all(message)
+        if not matches:
+            return None
+        return min(matches, key=lambda m: (m.intent_index, m.start))
+
+    def predict(self, message):
+        best = self.match(message)
+        return best.tag if best else None
@@ -0,0 +1,138 @@
+import logging
+import re
+import threading
+import time
+
+from cache_utils import LRUCache
+
+# Only tok2vec, tagger and attribute_ruler are needed for token.pos_
+SPACY_EXCLUDE = ["parser", "ner", "lemmatizer", "senter"]
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9+#.\-]*[A-Za-z0-9+#]|[A-Za-z]")
+
+# Function words and chat verbs the regex fallback should never report as a topic
+FALLBACK_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for
+from further had has have having he her here hers herself him himself his how i if in
+into is it its itself just let lets me more most my myself no nor not now of off on once
+only or other our ours ourselves out over own please same she should so some such than
+that the their theirs them themselves then there these they this those through to too
+under until up very want was we were what when where which while who whom why will with
+would you your yours yourself yourselves
+give show tell explain start begin teach help need know learn study find get make take
+like try ask quiz something anything thing things some more hi hello hey thanks
+""".split())
+
+
+def fallback_keywords(message):
+    """Cheap regex + stopword keyword extraction used while spaCy is loading."""
+    return [word for word in _WORD_RE.findall(message) if word.lower() not in FALLBACK_STOPWORDS]
+
+
+class SpacyLoader:
+    """Loads the spaCy pipeline on a background thread so startup does not wait on it."""
+
+    def __init__(self, model_name="en_core_web_sm", exclude=SPACY_EXCLUDE):
+        self.model_name = model_name
+        self.exclude = list(exclude)
+        self.nlp = None
+        self.error = None
+        self.load_seconds = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="spacy-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def on_ready(self, callback):
+        """Run callback(nlp) once the model is loaded (immediately if it already is)."""
+        with self._callbacks_lock:
+            if not self._ready.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self.nlp)
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            import spacy  # Imported here: the import alone costs most of a second
+            self.nlp = spacy.load(self.model_name, exclude=self.exclude)
+        except Exception as e:
+            self.error = str(e)
+            logging.error(f"spaCy model '{self.model_name}' failed to load: {e}")
+            return
+        self.load_seconds = time.perf_counter() - started
+        logging.info(f"spaCy model '{self.model_name}' ready in {self.load_seconds:.2f}s")
+        with self._callbacks_lock:
+            self._ready.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self.nlp)
+            except Exception as e:
+                logging.error(f"spaCy ready callback failed: {e}")
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    @property
+    def state(self):
+        if self.ready:
+            return "ready"
+        return "failed" if self.error else "loading"
+
+    def extract(self, message):
+        """Nouns and proper nouns via spaCy, or the regex fallback until the model is ready."""
+        if not self.ready:
+            return fallback_keywords(message)
+        return doc_keywords(self.nlp(message))
+
+
+def doc_keywords(doc):
+    return [token.text for token in doc if token.pos_ in ("NOUN", "PROPN")]
+
+
+def normalize_message(message):
+    return " ".join(message.split())
+
+
+class KeywordExtractor:
+    """Caches spaCy keyword results per normalized message so each text is parsed once.
+
+    Fallback results are not cached, so entries added before the model is
+    ready never shadow the spaCy output.
+    """
+
+    def __init__(self, loader, maxsize=4096, ttl=3600):
+        self.loader = loader
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def extract(self, message):
+        key = normalize_message(message)
+        if not self.loader.ready:
+            return fallback_keywords(key)
+        keywords = self.cache.get(key)
+        if keywords is None:
+            keywords = tuple(doc_keywords(self.loader.nlp(key)))
+            self.cache.set(key, keywords)
+        return list(keywords)
+
+    def warmup(self, texts, batch_size=256):
+        """Parse texts in bulk with nlp.pipe and cache their keywords; returns the number added."""
+        if not self.loader.ready:
+            return 0
+        keys = list(dict.fromkeys(normalize_message(text) for text in texts))
+        keys = [key for key in keys if key]
+        for key, doc in zip(keys, self.loader.nlp.pipe(keys, batch_size=batch_size)):
+            self.cache.set(key, tuple(doc_keywords(doc)))
+        return len(keys)
@@ -0,0 +1,77 @@
+import logging
+import logging.handlers
+import queue
+import random
+
+
+class SampleFilter(logging.Filter):
+    """Pass a fraction of records below min_level; warnings and errors always pass."""
+
+    def __init__(self, rate, min_level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.min_level = min_level
+        self.dropped = 0
+
+    def filter(self, record):
+        if record.levelno >= self.min_level or self.rate >= 1:
+            return True
+        if random.random() < self.rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking the caller."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener runs in this process, so the record can cross the queue
+        # unformatted and message formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncLogging:
+    """Route the root logger through a bounded queue to a listener thread.
+
+    Callers only enqueue the record as it is. Formatting it (merging %-style
+    arguments, adding the level and logger name) and writing it to the real
+    handlers (stderr by default) both happen on the listener thread.
+    """
+
+    def __init__(self, level=logging.INFO, max_queue=10000, handlers=None):
+        self.queue = queue.Queue(max_queue)
+        self.handler = DroppingQueueHandler(self.queue)
+        if handlers is None:
+            stream = logging.StreamHandler()
+            stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+            handlers = [stream]
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.handlers[:] = [self.handler]
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "dropped": self.handler.dropped}
+
+
+def sampled_logger(name, rate):
+    """Logger for high-volume per-message lines, keeping about `rate` of the INFO records."""
+    logger = logging.getLogger(name)
+    sampler = SampleFilter(rate)
+    logger.addFilter(sampler)
+    return logger, sampler
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are skipped without Pillow; originals are still stored
+    Image = None
+
+Blob = namedtuple("Blob", "digest kind size name duplicate")
+
+# (image kind, file extension, MIME type, test on the first bytes of the file)
+IMAGE_SIGNATURES = [
+    ("png", "png", "image/png", lambda head: head.startswith(b"\x89PNG\r\n\x1a\n")),
+    ("jpeg", "jpg", "image/jpeg", lambda head: head.startswith(b"\xff\xd8\xff")),
+    ("gif", "gif", "image/gif", lambda head: head[:6] in (b"GIF87a", b"GIF89a")),
+    ("webp", "webp", "image/webp", lambda head: head[:4] == b"RIFF" and head[8:12] == b"WEBP"),
+]
+MIME_TYPES = {ext: mime for _, ext, mime, _ in IMAGE_SIGNATURES}
+_HEAD_BYTES = 12
+
+
+def sniff_image(head):
+    """(kind, extension) of an image from its leading bytes, or None if it is not a supported image."""
+    for kind, ext, _, test in IMAGE_SIGNATURES:
+        if test(head):
+            return kind, ext
+    return None
+
+
+class UploadRejected(Exception):
+    """The upload is not a supported image or is over the size limit."""
+
+
+class MediaStore:
+    """Content-addressed image store.
+
+    Uploads stream to a temp file in chunk_size pieces while being hashed, so
+    memory use does not grow with the file. The blob is then renamed to
+    <sha256>.<ext> (sharded by the first two hex digits); a file that is
+    already stored is discarded, so duplicates cost no extra space. Thumbnails
+    are made on a background pool and stored beside the original.
+    """
+
+    def __init__(self, root, max_bytes=2 * 1024 * 1024, chunk_size=64 * 1024, thumb_size=128, thumb_workers=2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.thumb_size = thumb_size
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        self._thumbs = ThreadPoolExecutor(max_workers=thumb_workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.thumbnails = 0
+
+    def _path(self, name):
+        return os.path.join(self.root, name[:2], name)
+
+    def save_stream(self, stream):
+        """Store an image read from a file-like stream; raises UploadRejected."""
+        digest = hashlib.sha256()
+        head = b""
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadRejected(f"File is larger than {self.max_bytes // 1024} KB")
+                    if len(head) < _HEAD_BYTES:
+                        head += chunk[:_HEAD_BYTES - len(head)]
+                        if len(head) >= _HEAD_BYTES and not sniff_image(head):
+                            raise UploadRejected("Not a PNG, JPEG, GIF or WebP image")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            detected = sniff_image(head)
+            if not detected:
+                raise UploadRejected("Not a PNG, JPEG, GIF or WebP image")
+            kind, ext = detected
+            name = f"{digest.hexdigest()}.{ext}"
+            path = self._path(name)
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if isinstance(e, UploadRejected):
+                with self._lock:
+                    self.rejected += 1
+            raise
+        with self._lock:
+            if duplicate:
+                self.duplicates += 1
+            else:
+                self.stored += 1
+        return Blob(digest.hexdigest(), kind, size, name, duplicate)
+
+    def path(self, name):
+        """Filesystem path of a stored blob or thumbnail name, or None if it does not exist."""
+        stem, _, ext = name.partition(".")
+        if len(stem) != 64 or ext.split(".")[-1] not in MIME_TYPES or any(c not in "0123456789abcdef" for c in stem):
+            return None
+        path = self._path(name)
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def mime_type(name):
+        return MIME_TYPES[name.rsplit(".", 1)[-1]]
+
+    @staticmethod
+    def thumbnail_name(blob_name):
+        return f"{blob_name.split('.')[0]}.thumb.png"
+
+    def request_thumbnail(self, blob):
+        """Queue thumbnail generation for a stored blob; returns the Future, or None if not needed."""
+        if Image is None or self.path(self.thumbnail_name(blob.name)):
+            return None
+        return self._thumbs.submit(self._make_thumbnail, blob.name)
+
+    def _make_thumbnail(self, name):
+        target = self._path(self.thumbnail_name(name))
+        tmp_path = f"{target}.{threading.get_ident()}.tmp"
+        try:
+            with Image.open(self._path(name)) as image:
+                image.thumbnail((self.thumb_size, self.thumb_size))
+                image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, target)
+            with self._lock:
+                self.thumbnails += 1
+        except Exception as e:
+            logging.warning(f"Thumbnail for {name} failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "stored": self.stored,
+                "duplicates": self.duplicates,
+                "rejected": self.rejected,
+                "thumbnails": self.thumbnails,
+                "thumbnails_enabled": Image is not None,
+            }
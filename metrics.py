@@ -0,0 +1,194 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Latency buckets in seconds: 100µs to 10s, roughly three per decade
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _label_text(self.labelnames, labels), value) for labels, value in items]
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum", "lock")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observe() is a bisect and two adds under a lock."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _child(self, labels):
+        child = self._children.get(labels)
+        if child is None:
+            with self._lock:
+                # One extra slot for observations above the last bucket (+Inf)
+                child = self._children.setdefault(labels, _HistogramChild(len(self.buckets) + 1))
+        return child
+
+    def observe(self, value, *labels):
+        child = self._child(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with child.lock:
+            child.counts[index] += 1
+            child.sum += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def timed(self, *labels):
+        """Decorator form of time()."""
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, *labels)
+            return wrapper
+        return decorate
+
+    def snapshot(self, *labels):
+        """(count, sum, cumulative bucket counts) for one label set."""
+        child = self._children.get(labels)
+        if child is None:
+            return 0, 0.0, [0] * (len(self.buckets) + 1)
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return running, total, cumulative
+
+    def samples(self):
+        lines = []
+        for labels in list(self._children):
+            count, total, cumulative = self.snapshot(*labels)
+            bounds = list(self.buckets) + [float("inf")]
+            for bound, running in zip(bounds, cumulative):
+                text = _label_text(self.labelnames, labels, extra=[("le", _number(bound))])
+                lines.append((f"{self.name}_bucket", text, running))
+            text = _label_text(self.labelnames, labels)
+            lines.append((f"{self.name}_sum", text, total))
+            lines.append((f"{self.name}_count", text, count))
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter whose values are read from a function at scrape time.
+
+    The function returns a number, or a {label value tuple: number} dict when
+    labelnames are given. Used for state other components already track.
+    """
+
+    def __init__(self, name, help, func, kind="gauge", labelnames=()):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        values = self.func()
+        if not self.labelnames:
+            return [(self.name, "", values)]
+        return [(self.name, _label_text(self.labelnames, labels), value) for labels, value in values.items()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge_callback(self, name, help, func, labelnames=()):
+        return self.register(CallbackMetric(name, help, func, "gauge", labelnames))
+
+    def counter_callback(self, name, help, func, labelnames=()):
+        return self.register(CallbackMetric(name, help, func, "counter", labelnames))
+
+    def render(self):
+        """Everything in the Prometheus text exposition format (version 0.0.4)."""
+        out = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                out.append(f"# {metric.name} unavailable: {_escape(e)}")
+                continue
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(f"{name}{labels} {_number(value)}" for name, labels, value in samples)
+        return "\n".join(out) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,147 @@
+# Versioned, memory-mappable storage for the trained intent model.
+#
+# Layout: 8-byte magic, little-endian uint32 header length, JSON header (format
+# version, classes, tokenizer config, content hash, TF-IDF settings and each
+# array's offset/dtype/shape), then the raw arrays on 64-byte boundaries.
+# Loading maps the file read-only, so every worker on a host shares one copy of
+# the arrays through the page cache instead of unpickling its own.
+import bisect
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"ASTRAIM\x01"
+FORMAT_VERSION = 1
+_ALIGN = 64
+
+
+class ArtifactError(Exception):
+    """Raised for files that are not intent model artifacts or use an unknown version."""
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_artifact(path, arrays, metadata):
+    """Write named NumPy arrays and a JSON-serializable metadata dict to path."""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    # Two passes: array offsets depend on the header length, which contains them
+    layout = {}
+    header = dict(metadata, format_version=FORMAT_VERSION, arrays=layout)
+    for _ in range(2):
+        header_bytes = json.dumps(header, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        offset = _aligned(len(MAGIC) + 4 + len(header_bytes) + 64)
+        for name, array in arrays.items():
+            layout[name] = {
+                "dtype": array.dtype.newbyteorder("<").str,
+                "shape": list(array.shape),
+                "offset": offset,
+                "nbytes": int(array.nbytes),
+            }
+            offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(header, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    if layout and len(MAGIC) + 4 + len(header_bytes) > min(spec["offset"] for spec in layout.values()):
+        raise ArtifactError("Header overlaps the array section")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b"\0" * (layout[name]["offset"] - f.tell()))
+            f.write(array.astype(layout[name]["dtype"], copy=False).tobytes())
+    os.replace(tmp_path, path)
+
+
+class ModelArtifact:
+    """Read-only, memory-mapped view of an artifact file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ArtifactError(f"{path} is not an intent model artifact")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[start:start + header_len].decode("utf-8"))
+        if self.header.get("format_version") != FORMAT_VERSION:
+            raise ArtifactError(f"Unsupported artifact version {self.header.get('format_version')}")
+        self.arrays = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = spec["nbytes"] // dtype.itemsize
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=spec["offset"])
+            self.arrays[name] = array.reshape(spec["shape"])
+        self.classes = self.header["classes"]
+        self.content_hash = self.header.get("content_hash")
+        self._offsets = self.arrays.get("vocab_offsets")
+        self._blob = self.arrays.get("vocab_blob")
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    @property
+    def n_features(self):
+        return len(self._offsets) - 1
+
+    def term(self, index):
+        return self._term_bytes(index).decode("utf-8")
+
+    def term_index(self, term):
+        """Feature index of term, found by binary search over the mapped vocabulary; -1 if absent."""
+        key = term.encode("utf-8")
+        index = bisect.bisect_left(_TermView(self), key)
+        if index < self.n_features and self._term_bytes(index) == key:
+            return index
+        return -1
+
+    def _term_bytes(self, index):
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]])
+
+    def vocabulary(self):
+        """Build a {term: index} dict; faster lookups at the cost of a per-process copy."""
+        return {self.term(i): i for i in range(self.n_features)}
+
+
+class _TermView:
+    """Sequence of vocabulary terms as bytes, for bisect."""
+
+    def __init__(self, artifact):
+        self._artifact = artifact
+
+    def __len__(self):
+        return self._artifact.n_features
+
+    def __getitem__(self, index):
+        return self._artifact._term_bytes(index)
+
+
+def export_pipeline(pipeline, path, content_hash=None, tokenizer=None):
+    """Write a fitted Pipeline(TfidfVectorizer, MultinomialNB) as an artifact."""
+    tfidf = pipeline.named_steps["tfidf"]
+    clf = pipeline.named_steps["clf"]
+    terms = tfidf.get_feature_names_out()
+    encoded = [term.encode("utf-8") for term in terms]
+    if encoded != sorted(encoded):
+        raise ArtifactError("Vocabulary must be in sorted feature order")
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(term) for term in encoded])
+    arrays = {
+        "vocab_offsets": offsets,
+        "vocab_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "idf": tfidf.idf_.astype(np.float64),
+        "feature_log_prob": clf.feature_log_prob_.astype(np.float64),
+        "class_log_prior": clf.class_log_prior_.astype(np.float64),
+    }
+    metadata = {
+        "classes": [str(c) for c in clf.classes_],
+        "content_hash": content_hash,
+        "tokenizer": dict(tokenizer or {}, lowercase=True, ngram_range=list(tfidf.ngram_range)),
+        "tfidf": {"norm": tfidf.norm, "sublinear_tf": bool(tfidf.sublinear_tf), "use_idf": bool(tfidf.use_idf)},
+    }
+    write_artifact(path, arrays, metadata)
@@ -0,0 +1,510 @@
+"""On-disk BM25 full-text index over a directory of markdown/text study notes.
+
+The index is a set of immutable segments plus a manifest, Lucene-style:
+
+    manifest.json       live segment names, indexed files (mtime, size, segment,
+                        doc) and per-segment deleted docs
+    <segment>.json      documents (path, title, stored text range, length) and
+                        the term dictionary: term -> [postings offset, doc count]
+    <segment>.post      per term, doc ids then term frequencies (little-endian uint32)
+    <segment>.store     UTF-8 text of every document, for snippets
+
+Postings and stored text are memory-mapped, so only the term dictionaries live
+in process memory and the page cache holds whatever the queries touch. update()
+indexes new and changed notes into fresh segments and marks the old copies
+deleted; once there are more than max_segments, the smallest ones are merged by
+concatenating their postings. Several worker processes can share one index
+directory: updates take a file lock and readers pick up a new manifest on
+their next search.
+"""
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import threading
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+from text_vectors import normalize_text
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process updates only
+    fcntl = None
+
+MANIFEST_VERSION = 1
+# Snippets come from the start of long notes, so a huge file costs no more than this to quote
+SNIPPET_SCAN_BYTES = 64 * 1024
+NOTE_EXTENSIONS = (".md", ".markdown", ".txt")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into is it its me my of on or "
+    "so than that the their them then there these they this to was we what when where which who why will "
+    "with you your".split()
+)
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+_HEADING_RE = re.compile(r"^\s*#+\s*", re.MULTILINE)
+_MARKUP_RE = re.compile(r"[*`]+")
+_TITLE_RE = re.compile(r"\A\s*#[^\n]*\n")
+
+NoteHit = namedtuple("NoteHit", ["score", "path", "title", "snippet"])
+
+
+def stem(token):
+    """Fold plurals so "networks" finds "network"."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(token) for token in normalize_text(text).split() if token not in STOP_WORDS]
+
+
+def note_title(path, text):
+    for line in text.splitlines():
+        if line.lstrip().startswith("#"):
+            return _HEADING_RE.sub("", line).strip()
+    return os.path.splitext(os.path.basename(path))[0].replace("-", " ").replace("_", " ").title()
+
+
+def snippet(text, terms, width=220):
+    """The window of the note with the most distinct query terms, matches in bold."""
+    # Plain text without the title line, which is shown on its own; heading,
+    # emphasis and code markers would clash with the highlighting
+    text = _TITLE_RE.sub("", text, count=1)
+    text = " ".join(_MARKUP_RE.sub("", _HEADING_RE.sub("", text)).split())
+    # Look only for the surface forms the query terms can stem from, not at every word
+    forms = set()
+    for term in terms:
+        forms.update((term, term + "s", term + "es", term[:-1] + "ies" if term.endswith("y") else term))
+    pattern = re.compile(r"(?<![a-z0-9+#])(?:%s)(?![a-z0-9+#])" % "|".join(
+        re.escape(form) for form in sorted(forms, key=len, reverse=True)))
+    hits = [(m.start(), m.end(), stem(m.group())) for m in pattern.finditer(text.lower())]
+    hits = [hit for hit in hits if hit[2] in terms]
+    if not hits:
+        return text[:width] + ("…" if len(text) > width else "")
+    best_start, best_count = hits[0][0], 0
+    right = 0
+    for left in range(len(hits)):
+        while right < len(hits) and hits[right][1] - hits[left][0] <= width:
+            right += 1
+        count = len({hit[2] for hit in hits[left:right]})
+        if count > best_count:
+            best_start, best_count = hits[left][0], count
+    # Start a little before the first hit, on a word boundary
+    start = max(0, best_start - width // 4)
+    if start:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < best_start else start
+    end = min(len(text), start + width)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > best_start else end
+    pieces = []
+    position = start
+    for hit_start, hit_end, _ in hits:
+        if hit_start >= start and hit_end <= end:
+            pieces.append(text[position:hit_start])
+            pieces.append(f"**{text[hit_start:hit_end]}**")
+            position = hit_end
+    pieces.append(text[position:end])
+    # Adjacent matches read better as one highlighted phrase
+    body = "".join(pieces).replace("** **", " ")
+    return ("…" if start else "") + body + ("…" if end < len(text) else "")
+
+
+def _map_file(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Segment:
+    """One immutable batch of indexed notes."""
+
+    def __init__(self, directory, name):
+        self.name = name
+        base = os.path.join(directory, name)
+        with open(f"{base}.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.docs = meta["docs"]
+        self.terms = meta["terms"]
+        self.lengths = np.array([doc[4] for doc in self.docs], dtype=np.float32)
+        self._postings = _map_file(f"{base}.post")
+        self._store = _map_file(f"{base}.store")
+        self._norm = (None, None)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def postings(self, term):
+        """(doc ids, term frequencies) as read-only views into the mapped file, or None."""
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        offset, count = entry
+        ids = np.frombuffer(self._postings, dtype="<u4", count=count, offset=offset)
+        tfs = np.frombuffer(self._postings, dtype="<u4", count=count, offset=offset + 4 * count)
+        return ids, tfs
+
+    def text(self, doc, limit=None):
+        """Stored text of a document, or its first `limit` bytes."""
+        start, end = self.docs[doc][2:4]
+        if limit is not None:
+            end = min(end, start + limit)
+        return bytes(self._store[start:end]).decode("utf-8", errors="ignore")
+
+    def length_norm(self, k1, b, avgdl):
+        """k1 * (1 - b + b * length / avgdl) per document, cached until avgdl changes."""
+        if self._norm[0] != avgdl:
+            self._norm = (avgdl, k1 * (1 - b + b * self.lengths / avgdl))
+        return self._norm[1]
+
+
+class _SegmentWriter:
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        self.docs = []
+        self._store = open(os.path.join(directory, f"{name}.store"), "wb")
+
+    def add(self, path, title, data, length):
+        start = self._store.tell()
+        self._store.write(data)
+        self.docs.append([path, title, start, start + len(data), length])
+        return len(self.docs) - 1
+
+    def finish(self, postings):
+        """Write the postings, an iterable of (term, doc ids, term frequencies) in term order."""
+        self._store.close()
+        terms = {}
+        with open(os.path.join(self.directory, f"{self.name}.post"), "wb") as f:
+            for term, ids, tfs in postings:
+                terms[term] = [f.tell(), len(ids)]
+                f.write(np.asarray(ids, dtype="<u4").tobytes())
+                f.write(np.asarray(tfs, dtype="<u4").tobytes())
+        tmp_path = os.path.join(self.directory, f"{self.name}.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"docs": self.docs, "terms": terms}, ensure_ascii=False))
+        os.replace(tmp_path, os.path.join(self.directory, f"{self.name}.json"))
+
+
+class NotesIndex:
+    """BM25 search over a notes directory, kept in segments under `directory`."""
+
+    def __init__(self, directory, k1=1.2, b=0.75, segment_docs=5000, segment_bytes=64 * 1024 * 1024,
+                 max_segments=8, merge_factor=4):
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        self.segment_docs = segment_docs
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.merge_factor = merge_factor
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._segments = {}
+        self._manifest = self._empty_manifest()
+        self._manifest_mtime = None
+        self._view = ([], {}, 0, 1.0)
+        self._watcher = None
+        self._stop = threading.Event()
+        self.refresh()
+
+    @staticmethod
+    def _empty_manifest():
+        return {"version": MANIFEST_VERSION, "generation": 0, "next_segment": 0,
+                "segments": [], "files": {}, "deleted": {}}
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, "manifest.json")
+
+    @property
+    def generation(self):
+        """Bumped by every update that changed the index; usable as a cache key."""
+        return self._manifest["generation"]
+
+    # --- Loading ---
+
+    def refresh(self):
+        """Reload the manifest if another process (or update()) has written a new one."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        with self._lock:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"Unsupported notes index version {manifest.get('version')}")
+            segments = {name: self._segments.get(name) or Segment(self.directory, name)
+                        for name in manifest["segments"]}
+            deleted = {}
+            live_docs = 0
+            total_length = 0.0
+            for name, segment in segments.items():
+                mask = None
+                if manifest["deleted"].get(name):
+                    mask = np.zeros(len(segment), dtype=bool)
+                    mask[manifest["deleted"][name]] = True
+                    deleted[name] = mask
+                live = segment.lengths if mask is None else segment.lengths[~mask]
+                live_docs += len(live)
+                total_length += float(live.sum())
+            self._segments = segments
+            self._manifest = manifest
+            self._manifest_mtime = mtime
+            # Searches read this tuple once, so an update never shows them half a manifest
+            self._view = (list(segments.values()), deleted, live_docs, total_length / live_docs if live_docs else 1.0)
+
+    def _write_manifest(self, manifest):
+        manifest["generation"] += 1
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(manifest, ensure_ascii=False))
+        os.replace(tmp_path, self.manifest_path)
+
+    @contextmanager
+    def _exclusive(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, "lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- Indexing ---
+
+    @staticmethod
+    def scan(notes_dir):
+        """{relative path: (mtime_ns, size)} for every note under notes_dir."""
+        found = {}
+        pending = [(notes_dir, "")]
+        while pending:
+            directory, prefix = pending.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir():
+                        pending.append((entry.path, f"{prefix}{entry.name}/"))
+                    elif entry.name.lower().endswith(NOTE_EXTENSIONS):
+                        st = entry.stat()
+                        found[prefix + entry.name] = (st.st_mtime_ns, st.st_size)
+        return dict(sorted(found.items()))
+
+    def update(self, notes_dir):
+        """Index new and changed notes, drop removed ones. Returns counts of each."""
+        if not os.path.isdir(notes_dir):
+            return {"added": 0, "removed": 0}
+        with self._exclusive():
+            self.refresh()
+            found = self.scan(notes_dir)
+            files = self._manifest["files"]
+            changed = [path for path, stat in found.items() if files.get(path, [None, None])[:2] != list(stat)]
+            removed = [path for path in files if path not in found]
+            if not changed and not removed:
+                return {"added": 0, "removed": 0}
+            manifest = json.loads(json.dumps(self._manifest))
+            files = manifest["files"]
+            for path in changed + removed:
+                if path in files:
+                    _, _, segment, doc = files.pop(path)
+                    manifest["deleted"].setdefault(segment, []).append(doc)
+            self._index_files(manifest, notes_dir, changed, found)
+            self._merge_small_segments(manifest)
+            self._write_manifest(manifest)
+            self.refresh()
+            self._remove_unused_files()
+        logging.info(f"Notes index updated: {len(changed)} note(s) indexed, {len(removed)} removed")
+        return {"added": len(changed), "removed": len(removed)}
+
+    def _new_segment_name(self, manifest):
+        name = f"seg{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+        return name
+
+    def _index_files(self, manifest, notes_dir, paths, found):
+        batch = []
+        batch_bytes = 0
+        for path in paths:
+            try:
+                with open(os.path.join(notes_dir, path), encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError as e:
+                logging.warning(f"Skipping note {path}: {e}")
+                continue
+            batch.append((path, text))
+            batch_bytes += len(text)
+            if len(batch) >= self.segment_docs or batch_bytes >= self.segment_bytes:
+                self._write_batch(manifest, batch, found)
+                batch, batch_bytes = [], 0
+        if batch:
+            self._write_batch(manifest, batch, found)
+
+    def _write_batch(self, manifest, batch, found):
+        name = self._new_segment_name(manifest)
+        writer = _SegmentWriter(self.directory, name)
+        postings = {}
+        for path, text in batch:
+            tokens = tokenize(text)
+            doc = writer.add(path, note_title(path, text), text.encode("utf-8"), len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(doc)
+                postings[term][1].append(tf)
+            manifest["files"][path] = [*found[path], name, doc]
+        writer.finish((term, *postings[term]) for term in sorted(postings))
+        manifest["segments"].append(name)
+
+    def _merge_small_segments(self, manifest):
+        """Merge the smallest segments together while there are more than max_segments."""
+        while len(manifest["segments"]) > self.max_segments:
+            sizes = {name: self._segment(name).docs for name in manifest["segments"]}
+            live = {name: len(docs) - len(manifest["deleted"].get(name, ())) for name, docs in sizes.items()}
+            chosen = sorted(manifest["segments"], key=lambda name: live[name])[:self.merge_factor]
+            merged = self._merge(manifest, chosen)
+            manifest["segments"] = [name for name in manifest["segments"] if name not in chosen] + [merged]
+            for name in chosen:
+                manifest["deleted"].pop(name, None)
+
+    def _segment(self, name):
+        return self._segments.get(name) or Segment(self.directory, name)
+
+    def _merge(self, manifest, names):
+        name = self._new_segment_name(manifest)
+        writer = _SegmentWriter(self.directory, name)
+        sources = []
+        for source_name in names:
+            segment = self._segment(source_name)
+            deleted = set(manifest["deleted"].get(source_name, ()))
+            # Old doc id -> new doc id, -1 for deleted docs
+            remap = np.full(len(segment), -1, dtype=np.int64)
+            for doc, (path, title, start, end, length) in enumerate(segment.docs):
+                if doc in deleted:
+                    continue
+                remap[doc] = writer.add(path, title, bytes(segment._store[start:end]), length)
+                manifest["files"][path][2:] = [name, int(remap[doc])]
+            sources.append((segment, remap))
+
+        def postings():
+            for term in sorted(set().union(*(segment.terms for segment, _ in sources))):
+                ids, tfs = [], []
+                for segment, remap in sources:
+                    found = segment.postings(term)
+                    if found is None:
+                        continue
+                    new_ids = remap[found[0]]
+                    keep = new_ids >= 0
+                    ids.append(new_ids[keep])
+                    tfs.append(found[1][keep])
+                if ids:
+                    ids, tfs = np.concatenate(ids), np.concatenate(tfs)
+                    if len(ids):
+                        yield term, ids, tfs
+        writer.finish(postings())
+        return name
+
+    def _remove_unused_files(self):
+        """Delete files of segments the manifest no longer lists (mapped copies stay readable on POSIX)."""
+        live = set(self._manifest["segments"])
+        for filename in os.listdir(self.directory):
+            segment, ext = os.path.splitext(filename)
+            if ext in (".json", ".post", ".store") and segment.startswith("seg") and segment not in live:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    def watch(self, notes_dir, interval=10.0):
+        """Index notes_dir now and then every `interval` seconds on a background thread."""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(notes_dir, interval), name="notes-indexer",
+                                             daemon=True)
+            self._watcher.start()
+
+    def _watch(self, notes_dir, interval):
+        while True:
+            try:
+                self.update(notes_dir)
+            except Exception as e:
+                logging.error(f"Notes index update failed: {e}")
+            if self._stop.wait(interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+
+    # --- Search ---
+
+    def search(self, query, k=5, with_snippets=True):
+        """Top-k notes for the query by BM25, best first."""
+        self.refresh()
+        segments, deleted, live_docs, avgdl = self._view
+        terms = set(tokenize(query))
+        if not terms or not live_docs:
+            return []
+        found = {term: [segment.postings(term) for segment in segments] for term in terms}
+        weights = {}
+        for term, postings in found.items():
+            df = sum(len(p[0]) for p in postings if p is not None)
+            if df:
+                weights[term] = math.log(1 + (live_docs - df + 0.5) / (df + 0.5))
+        heap = []
+        for position, segment in enumerate(segments):
+            scores = None
+            norm = segment.length_norm(self.k1, self.b, avgdl)
+            for term, weight in weights.items():
+                posting = found[term][position]
+                if posting is None:
+                    continue
+                if scores is None:
+                    scores = np.zeros(len(segment), dtype=np.float32)
+                ids, tfs = posting
+                tf = tfs.astype(np.float32)
+                scores[ids] += weight * tf * (self.k1 + 1) / (tf + norm[ids])
+            if scores is None:
+                continue
+            if segment.name in deleted:
+                scores[deleted[segment.name]] = 0
+            top = np.argpartition(-scores, k)[:k] if len(scores) > k else np.arange(len(scores))
+            for doc in top:
+                # (score, position, doc) is unique, so the segment itself is never compared
+                item = (float(scores[doc]), position, int(doc), segment)
+                if item[0] <= 0:
+                    continue
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+        hits = []
+        for score, _, doc, segment in sorted(heap, key=lambda item: -item[0]):
+            path, title = segment.docs[doc][:2]
+            text = snippet(segment.text(doc, SNIPPET_SCAN_BYTES), terms) if with_snippets else ""
+            hits.append(NoteHit(round(score, 4), path, title, text))
+        return hits
+
+    def stats(self):
+        segments, deleted, live_docs, avgdl = self._view
+        return {
+            "documents": live_docs,
+            "segments": len(segments),
+            "deleted": sum(int(mask.sum()) for mask in deleted.values()),
+            "avg_length": round(avgdl, 1),
+            "generation": self.generation,
+        }
@@ -0,0 +1,83 @@
+import nltk
+from nltk.stem import WordNetLemmatizer
+from nltk.corpus import stopwords # Import stopwords for a more comprehensive list
+
+# NLTK data (punkt, wordnet, stopwords) must already be installed: train_model.py
+# downloads it, or run `python -m nltk.downloader punkt wordnet stopwords`.
+# Importing this module never touches the network.
+
+# --- Initialize Lemmatizer and Stop Words ---
+lemmatizer = WordNetLemmatizer()
+# Combine custom ignore words with NLTK's English stopwords for a more robust set
+ignore_words_set = set(['?', '!', '.', ',', 'is', 'a', 'the', 'and', 'to', 'in', 'for', 'on', 'of', 'that', 'it', 'you', 'this', 'are', 'with', 'as', 'at', 'by', 'an', 'be', 'not']).union(set(stopwords.words('english')))
+
+# --- Custom Tokenizer for TfidfVectorizer ---
+# Lives in its own module so the pickled pipeline can be loaded by app.py
+# as well as by train_model.py.
+def custom_tokenizer(text):
+    """Tokenizes, lemmatizes, and filters stop words from a sentence."""
+    word_list = nltk.word_tokenize(text.lower())
+    return [lemmatizer.lemmatize(word) for word in word_list if word.isalnum() and word not in ignore_words_set]
+
+
+class PretokenizedLookup:
+    """Tokenizer that returns precomputed custom_tokenizer output for known texts.
+
+    Used while training so every pattern is tokenized once, however many times the
+    vectorizer is refit during cross-validation. Unknown texts fall back to
+    custom_tokenizer, so the result is always identical to the real tokenizer.
+    """
+
+    def __init__(self, tokens_by_text):
+        self.tokens_by_text = tokens_by_text
+
+    def __call__(self, text):
+        tokens = self.tokens_by_text.get(text)
+        return list(tokens) if tokens is not None else custom_tokenizer(text)
+
+
+def build_lemma_table(texts, vocabulary_words):
+    """Map surface words to custom_tokenizer's lemmas where serve-time rules would get them wrong.
+
+    intent_inference lemmatizes with this table first and WordNet's noun suffix
+    rules (rule_lemma) second, so the table only keeps the words where the two
+    disagree. Candidates are the words of the training texts, every form the
+    rules reduce to a vocabulary word and WordNet's irregular nouns
+    ("children", "quizzes") whose lemma is a vocabulary word, so the two
+    lemmatizers agree on every word that can produce a feature.
+    """
+    from nltk.corpus import wordnet
+    from intent_inference import rule_lemma
+
+    vocabulary = set(vocabulary_words)
+    candidates = set()
+    for text in texts:
+        candidates.update(word for word in nltk.word_tokenize(text.lower()) if word.isalnum())
+    # Every form rule_lemma could reduce to a vocabulary word
+    for word in vocabulary:
+        candidates.update((word + 's', word + 'es', word + word[-1] + 'es'))
+        if word.endswith('y'):
+            candidates.add(word[:-1] + 'ies')
+        elif word.endswith('f'):
+            candidates.add(word[:-1] + 'ves')
+        elif word.endswith('man'):
+            candidates.add(word[:-3] + 'men')
+    for line in wordnet.open('noun.exc').read().splitlines():
+        inflected, *lemmas = line.split()
+        if any(lemma in vocabulary for lemma in lemmas):
+            candidates.add(inflected)
+    table = {}
+    for word in candidates:
+        if word in ignore_words_set or not word.isalnum():
+            continue
+        lemma = lemmatizer.lemmatize(word)
+        if lemma != rule_lemma(word, vocabulary.__contains__):
+            table[word] = lemma
+    return table
+
+
+def english_words():
+    """Single-word WordNet lemmas plus stop words: real words that spelling correction must leave alone."""
+    from nltk.corpus import wordnet
+    words = {name for name in wordnet.all_lemma_names() if name.isalpha()}
+    return words | {word for word in ignore_words_set if word.isalpha()}
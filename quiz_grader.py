@@ -0,0 +1,127 @@
+import math
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from text_vectors import char_ngrams, normalize_text
+
+# Weight of answer terms that also appear in the question. Repeating the question
+# back ("a variable in python") shares most of its terms with the reference
+# answer, so those terms must count for little.
+QUESTION_TERM_WEIGHT = 0.1
+
+
+def _answer_terms(text):
+    # Trigrams tolerate typos and inflections; whole words reward exact terminology
+    return char_ngrams(text) + [f"w:{word}" for word in normalize_text(text).split()]
+
+
+def _weighted_vector(terms, question_terms, question_weight):
+    """Sublinear TF weights with question terms scaled down, L2-normalized, as a sparse dict."""
+    weights = {}
+    for term, count in Counter(terms).items():
+        weight = 1.0 + math.log(count)
+        weights[term] = weight * question_weight if term in question_terms else weight
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    if not norm:
+        return {}
+    return {term: w / norm for term, w in weights.items()}
+
+
+class QuizGrader:
+    """Scores quiz answers against reference answers vectorized once at load time.
+
+    quiz_bank maps a topic to a list of {"q": question, "a": reference answer}
+    entries; a reference may also be a list of acceptable answers. References
+    are rows of one sparse (CSR) matrix, so memory grows with the terms each
+    answer uses rather than with answers x vocabulary, and a batch of answers
+    is scored with sparse dot products over the nonzero entries. Terms the
+    answer shares with the question are discounted on both sides, so echoing
+    the question does not pass.
+    """
+
+    def __init__(self, quiz_bank, threshold=0.3, question_weight=QUESTION_TERM_WEIGHT):
+        self.threshold = threshold
+        self.question_weight = question_weight
+        self._columns = {}
+        self._question_terms = {}
+        # topic -> per question, the matrix rows of its acceptable answers
+        self._rows = {}
+        vectors = []
+        data, row_ids, column_ids = [], [], []
+        for topic, entries in quiz_bank.items():
+            questions = self._question_terms[topic] = []
+            rows = self._rows[topic] = []
+            for entry in entries:
+                question_terms = frozenset(_answer_terms(entry.get("q", "")))
+                questions.append(question_terms)
+                answers = [entry["a"]] if isinstance(entry["a"], str) else entry["a"]
+                rows.append(list(range(len(vectors), len(vectors) + len(answers))))
+                for answer in answers:
+                    vector = _weighted_vector(_answer_terms(answer), question_terms, question_weight)
+                    for term, weight in vector.items():
+                        data.append(weight)
+                        row_ids.append(len(vectors))
+                        column_ids.append(self._columns.setdefault(term, len(self._columns)))
+                    vectors.append(vector)
+        self._matrix = sparse.csr_matrix((data, (row_ids, column_ids)), shape=(len(vectors), len(self._columns)))
+
+    def score(self, topic, index, user_answer):
+        return self.score_batch(topic, [(index, user_answer)])[0]
+
+    def score_batch(self, topic, answers):
+        """Score (question index, answer) pairs for one topic in a single pass.
+
+        Each answer is compared with every acceptable reference for its
+        question; the best cosine similarity in [0, 1] wins.
+        """
+        references = self._rows.get(topic, [])
+        questions = self._question_terms.get(topic, [])
+        columns = len(self._columns)
+        keys, weights = [], []
+        pair_answers, pair_references = [], []
+        for row, (index, user_answer) in enumerate(answers):
+            if not 0 <= index < len(references):
+                continue
+            # Normalized over all of the answer's terms; only shared terms need a column
+            vector = _weighted_vector(_answer_terms(user_answer), questions[index], self.question_weight)
+            for term, weight in vector.items():
+                column = self._columns.get(term)
+                if column is not None:
+                    keys.append(row * columns + column)
+                    weights.append(weight)
+            pair_answers.extend([row] * len(references[index]))
+            pair_references.extend(references[index])
+        scores = np.zeros(len(answers))
+        if pair_answers and keys:
+            np.maximum.at(scores, pair_answers, self._pair_dots(keys, weights, pair_answers, pair_references))
+        return scores.tolist()
+
+    def _pair_dots(self, keys, weights, pair_answers, pair_references):
+        """Dot product of each (answer, reference row) pair, touching only nonzero entries.
+
+        Answer entries are keyed row * columns + column; every nonzero of the
+        paired reference rows is looked up among them with one searchsorted.
+        """
+        order = np.argsort(keys)
+        keys = np.asarray(keys, dtype=np.int64)[order]
+        weights = np.asarray(weights)[order]
+        matrix = self._matrix
+        starts = matrix.indptr[pair_references]
+        lengths = matrix.indptr[np.asarray(pair_references) + 1] - starts
+        pairs = np.repeat(np.arange(len(pair_references)), lengths)
+        # Positions of the paired rows' nonzeros in matrix.indices / matrix.data
+        positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        wanted = np.asarray(pair_answers, dtype=np.int64)[pairs] * matrix.shape[1] + matrix.indices[positions]
+        found = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        products = np.where(keys[found] == wanted, matrix.data[positions] * weights[found], 0.0)
+        return np.bincount(pairs, weights=products, minlength=len(pair_references))
+
+    def is_correct(self, topic, index, user_answer):
+        return self.score(topic, index, user_answer) >= self.threshold
+
+    def grade_quiz(self, topic, answers):
+        """Grade a whole submitted quiz (answers in question order); returns (score, per-question results)."""
+        results = [s >= self.threshold for s in self.score_batch(topic, list(enumerate(answers)))]
+        return sum(results), results
@@ -0,0 +1,415 @@
+import datetime
+import heapq
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from dateutil import parser as date_parser
+
+Reminder = namedtuple("Reminder", "id user_id text due created")
+
+# --- Parsing ---
+# "remind me to <text> <when>", where <when> starts at the first time expression,
+# or "remind me <when> to <text>"
+
+_REMIND = re.compile(r"^\s*remind\s+me\s+(?:to\s+|about\s+|that\s+)?(?P<rest>.*?)[\s.!?]*$", re.I)
+_WEEKDAYS = r"(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*"
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*"
+_WHEN_START = re.compile(
+    rf"\b(?:at\s+\d|at\s+(?:noon|midnight)|on\s+(?:{_WEEKDAYS}|{_MONTHS}|\d|the\s+\d)|in\s+(?:\d+|an?|half)\s|"
+    rf"by\s+\d|(?:mon|tues|wednes|thurs|fri|satur|sun)day|tomorrow|tonight|today|next\s+(?:week|{_WEEKDAYS})|this\s+(?:evening|afternoon|morning)|"
+    rf"\d{{4}}-\d{{2}}-\d{{2}})",
+    re.I,
+)
+_RELATIVE = re.compile(r"\bin\s+(\d+|an?|half\s+an?)\s*(minute|min|hour|hr|day|week)s?\b", re.I)
+_RELATIVE_UNITS = {"min": "minutes", "minute": "minutes", "hr": "hours", "hour": "hours", "day": "days", "week": "weeks"}
+_HAS_TIME = re.compile(r"\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)|\b\d{1,2}:\d{2}\b|\bnoon\b|\bmidnight\b", re.I)
+_HAS_DATE = re.compile(rf"\b(?:{_WEEKDAYS}|{_MONTHS})\b|\d{{4}}-\d{{2}}-\d{{2}}|\b\d{{1,2}}(?:st|nd|rd|th)\b", re.I)
+_BARE_HOUR = re.compile(r"\bat\s+(\d{1,2})\b(?!\s*(?::|am|pm|a\.m|p\.m))", re.I)
+_MERIDIEM = re.compile(r"\d\s*(?:am|pm|a\.m\.|p\.m\.)|\bnoon\b|\bmidnight\b", re.I)
+_PADDED_HOUR = re.compile(r"(?<!\d)0\d:\d{2}")
+_MONTH_NAME = re.compile(
+    r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|"
+    r"oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b", re.I)
+_DAY_OF_MONTH = re.compile(r"\b(?:on\s+)?(?:the\s+)?(\d{1,2})(?:st|nd|rd|th)\b", re.I)
+# Separates a leading time from the reminder text: "at 7pm to eat"
+_TEXT_AFTER_TIME = re.compile(r"[\s,]+(?:to|about|that)\s+", re.I)
+# Time of day used when only a day is given
+_DAY_DEFAULTS = {"tonight": 20, "this evening": 19, "this afternoon": 15, "this morning": 9}
+DEFAULT_HOUR = 9
+# Times further ahead are refused: "in 99999999 days" is a typo, and would overflow datetime
+MAX_AHEAD = datetime.timedelta(days=10 * 366)
+
+
+def _next_day_of_month(when, day, now):
+    """when moved to the first month whose `day` (at when's time of day) is after now; None if there is none."""
+    year, month = now.year, now.month
+    for _ in range(13):
+        try:
+            candidate = when.replace(year=year, month=month, day=day)
+        except ValueError:
+            # No such day in this month ("the 31st" in June)
+            candidate = None
+        if candidate and candidate > now:
+            return candidate
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return None
+
+
+def parse_when(text, now):
+    """Resolve a time expression like 'at 6 pm', 'in 20 minutes' or 'friday 9am' against now.
+
+    now is a naive datetime in the user's local time; returns a naive local
+    datetime in the future, at most MAX_AHEAD away, or None if nothing usable
+    was found.
+    """
+    try:
+        when = _resolve_when(text.strip().lower(), now)
+    except (OverflowError, ValueError, TypeError):
+        # Dates datetime cannot hold, or that dateutil cannot make sense of
+        return None
+    return when if when is not None and now < when <= now + MAX_AHEAD else None
+
+
+def _resolve_when(text, now):
+    relative = _RELATIVE.search(text)
+    if relative:
+        amount, unit = relative.groups()
+        amount = 0.5 if amount.startswith("half") else 1 if amount in ("a", "an") else int(amount)
+        delta = datetime.timedelta(**{_RELATIVE_UNITS[unit]: amount})
+        return now + delta if delta <= MAX_AHEAD else None
+
+    day_offset = 1 if "tomorrow" in text else 0
+    today = "today" in text
+    default_hour = next((hour for phrase, hour in _DAY_DEFAULTS.items() if phrase in text), None)
+    has_time = bool(_HAS_TIME.search(text) or _BARE_HOUR.search(text))
+    if not has_time and not _HAS_DATE.search(text) and not day_offset and not today and default_hour is None:
+        return None
+    cleaned = _BARE_HOUR.sub(r"at \1:00", text).replace("noon", "12:00 pm").replace("midnight", "12:00 am")
+    for word in ("tomorrow", "tonight", "today", "next", "this evening", "this afternoon", "this morning"):
+        cleaned = cleaned.replace(word, " ")
+    # "on the 1st": dateutil would put it in the current month even when that day has passed
+    day_of_month = None
+    ordinal = None if _MONTH_NAME.search(text) else _DAY_OF_MONTH.search(cleaned)
+    if ordinal:
+        day_of_month = int(ordinal.group(1))
+        cleaned = cleaned[:ordinal.start()] + " " + cleaned[ordinal.end():]
+    # Fields the expression does not mention come from default: a given hour means minute 0
+    default = now.replace(minute=0, second=0, microsecond=0)
+    if not has_time:
+        if default_hour is not None:
+            default = default.replace(hour=default_hour)
+        elif today and not day_of_month and now.hour >= DEFAULT_HOUR:
+            # "today" once the morning is gone: the next full hour
+            default += datetime.timedelta(hours=1)
+        else:
+            default = default.replace(hour=DEFAULT_HOUR)
+    when = date_parser.parse(cleaned, default=default, fuzzy=True) if cleaned.strip() else default
+    # An offset in the text ("5pm +0530") is dropped: the time is read as the user's local time
+    when = when.replace(tzinfo=None)
+    # A clock time with no am/pm, written 12-hour style ("1:30", not "01:30" or "13:30")
+    unmarked = has_time and not _MERIDIEM.search(text) and not _PADDED_HOUR.search(text)
+    if default_hour is not None and default_hour >= 12 and when.hour < 12 and not re.search(r"am|a\.m\.", text):
+        # "tonight at 9" means 9 pm
+        when += datetime.timedelta(hours=12)
+    elif unmarked and default_hour is None and 1 <= when.hour <= 6:
+        # Nobody means 1:30 am: small hours without am/pm are afternoon ones
+        when += datetime.timedelta(hours=12)
+    elif unmarked and not day_offset and 7 <= when.hour < 12 and when <= now < when + datetime.timedelta(hours=12):
+        # "at 11" said in the afternoon means 11 pm
+        when += datetime.timedelta(hours=12)
+    when += datetime.timedelta(days=day_offset)
+    if day_of_month:
+        return _next_day_of_month(when, day_of_month, now)
+    if when <= now and _MONTH_NAME.search(text) and not re.search(r"\b\d{4}\b", text):
+        # "on jan 5" said in March means next January
+        when = when.replace(year=when.year + 1)
+    if when <= now and not day_offset and when.date() == now.date() and not _HAS_DATE.search(text):
+        # "at 6 pm" after 6 pm means tomorrow
+        when += datetime.timedelta(days=1)
+    return when
+
+
+def parse_reminder(message, now):
+    """Split 'remind me to study at 6 pm' into ('study', datetime); None if it is not a timed reminder."""
+    match = _REMIND.match(message)
+    if not match:
+        return None
+    rest = match.group("rest")
+    starts = list(_WHEN_START.finditer(rest))
+    if starts and starts[0].start() == 0:
+        # Time first: "remind me at 7pm to eat"
+        split = _TEXT_AFTER_TIME.search(rest, starts[0].end())
+        text = rest[split.end():].strip(" ,") if split else ""
+        when = parse_when(rest[:split.start()], now) if text else None
+        if when:
+            return text, when
+    for start in starts:
+        when = parse_when(rest[start.start():], now)
+        if when:
+            text = rest[:start.start()].strip(" ,") or "your reminder"
+            return text, when
+    return None
+
+
+def local_now(clock, tz_offset):
+    """Current naive local time for a JavaScript getTimezoneOffset() value; server time if None."""
+    if tz_offset is None:
+        return datetime.datetime.fromtimestamp(clock())
+    return datetime.datetime.utcfromtimestamp(clock()) - datetime.timedelta(minutes=tz_offset)
+
+
+def to_timestamp(local, tz_offset):
+    """Epoch seconds of a naive local datetime produced by local_now with the same offset."""
+    if tz_offset is None:
+        return local.timestamp()
+    utc = local + datetime.timedelta(minutes=tz_offset)
+    return utc.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+# --- Storage ---
+class ReminderStore:
+    """Reminders in SQLite. Rows stay until delivered; claiming marks them so only one process delivers each."""
+
+    def __init__(self, path="reminders.db", clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS reminders ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, text TEXT NOT NULL, "
+            "due REAL NOT NULL, created REAL NOT NULL, delivered REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS reminders_pending ON reminders(delivered, due)")
+        conn.execute("CREATE INDEX IF NOT EXISTS reminders_user ON reminders(user_id, due)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, user_id, text, due):
+        created = self._clock()
+        cursor = self._connect().execute(
+            "INSERT INTO reminders (user_id, text, due, created) VALUES (?, ?, ?, ?)", (user_id, text, due, created)
+        )
+        return Reminder(cursor.lastrowid, user_id, text, due, created)
+
+    def cancel(self, user_id, reminder_id):
+        return self._connect().execute(
+            "DELETE FROM reminders WHERE id = ? AND user_id = ? AND delivered IS NULL", (reminder_id, user_id)
+        ).rowcount > 0
+
+    def pending(self, user_id):
+        rows = self._connect().execute(
+            "SELECT id, user_id, text, due, created FROM reminders WHERE user_id = ? AND delivered IS NULL ORDER BY due",
+            (user_id,),
+        ).fetchall()
+        return [Reminder(*row) for row in rows]
+
+    def count_pending(self, user_id):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM reminders WHERE user_id = ? AND delivered IS NULL", (user_id,)
+        ).fetchone()[0]
+
+    def iter_schedule(self, chunk_size=10000):
+        """(due, id) of every pending reminder, read in chunks so startup does not hold the rows."""
+        conn = self._connect()
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT due, id FROM reminders WHERE delivered IS NULL AND id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][1]
+
+    def claim(self, ids):
+        """Mark the given reminders delivered and return those this call claimed (cancelled ones are skipped)."""
+        conn = self._connect()
+        claimed = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT id, user_id, text, due, created FROM reminders WHERE delivered IS NULL AND id IN ({marks})",
+                    chunk,
+                ).fetchall()
+                conn.executemany("UPDATE reminders SET delivered = ? WHERE id = ?", [(self._clock(), r[0]) for r in rows])
+                claimed.extend(Reminder(*row) for row in rows)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+
+# --- Scheduling ---
+class ReminderScheduler:
+    """Fires stored reminders at their due time.
+
+    A min-heap of (due, id) holds only what is needed to order the pending
+    reminders (O(log n) per add and per fire); the rows themselves stay in the
+    store. Everything due in one tick (up to batch_size) is claimed in one
+    transaction and handed to deliver(user_id, reminders) once per user.
+    Cancelled reminders are left in the heap and skipped when claimed.
+
+    clock is injectable: tests call run_due() with a fake clock instead of start().
+    """
+
+    def __init__(self, store, deliver, clock=time.time, batch_size=1000):
+        self.store = store
+        self.deliver = deliver
+        self.clock = clock
+        self.batch_size = batch_size
+        self._heap = list(store.iter_schedule())
+        heapq.heapify(self._heap)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.delivered = 0
+        self.ticks = 0
+
+    def schedule(self, user_id, text, due):
+        reminder = self.store.add(user_id, text, due)
+        with self._cond:
+            heapq.heappush(self._heap, (reminder.due, reminder.id))
+            # Wake the thread only if this is now the earliest reminder
+            if self._heap[0][1] == reminder.id:
+                self._cond.notify()
+        return reminder
+
+    def cancel(self, user_id, reminder_id):
+        return self.store.cancel(user_id, reminder_id)
+
+    def next_due(self):
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def _pop_due(self, now):
+        with self._cond:
+            ids = []
+            while self._heap and self._heap[0][0] <= now and len(ids) < self.batch_size:
+                ids.append(heapq.heappop(self._heap)[1])
+            return ids
+
+    def run_due(self):
+        """Deliver everything due by clock(); returns the number of reminders delivered."""
+        total = 0
+        while True:
+            ids = self._pop_due(self.clock())
+            if not ids:
+                return total
+            self.ticks += 1
+            by_user = {}
+            for reminder in self.store.claim(ids):
+                by_user.setdefault(reminder.user_id, []).append(reminder)
+            for user_id, reminders in by_user.items():
+                try:
+                    self.deliver(user_id, reminders)
+                except Exception as e:
+                    logging.error(f"Reminder delivery to {user_id} failed: {e}")
+                total += len(reminders)
+                self.delivered += len(reminders)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                timeout = None if not self._heap else max(0.0, self._heap[0][0] - self.clock())
+                if timeout is None or timeout > 0:
+                    # Capped so a changed wall clock is noticed within a minute
+                    self._cond.wait(60 if timeout is None else min(timeout, 60))
+            try:
+                self.run_due()
+            except Exception as e:
+                logging.error(f"Reminder scheduler tick failed: {e}")
+                time.sleep(1)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._heap),
+                "next_due": self._heap[0][0] if self._heap else None,
+                "delivered": self.delivered,
+                "ticks": self.ticks,
+            }
+
+
+# --- iCalendar ---
+def _ics_escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # don't split a UTF-8 sequence
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts)
+
+
+def _ics_time(timestamp):
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y%m%dT%H%M%SZ")
+
+
+def to_ics(events, now, domain="smart-study-buddy"):
+    """iCalendar text for events given as dicts with uid, summary and either start (epoch) or date (datetime.date).
+
+    Timed events get a display alarm at their start time.
+    """
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Smart Study Buddy//Reminders//EN", "CALSCALE:GREGORIAN"]
+    for event in events:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{event['uid']}@{domain}",
+            f"DTSTAMP:{_ics_time(now)}",
+            f"SUMMARY:{_ics_escape(event['summary'])}",
+        ]
+        if event.get("start") is not None:
+            lines += [
+                f"DTSTART:{_ics_time(event['start'])}",
+                f"DURATION:PT{event.get('minutes', 30)}M",
+                "BEGIN:VALARM", "ACTION:DISPLAY", f"DESCRIPTION:{_ics_escape(event['summary'])}",
+                "TRIGGER:PT0M", "END:VALARM",
+            ]
+        else:
+            lines.append(f"DTSTART;VALUE=DATE:{event['date'].strftime('%Y%m%d')}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_ics_fold(line) for line in lines) + "\r\n"
+
+
+def reminder_event(reminder):
+    return {"uid": f"reminder-{reminder.id}", "summary": reminder.text, "start": reminder.due}
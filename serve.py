@@ -0,0 +1,94 @@
+"""Run several app worker processes on one port.
+
+Every worker binds the port with SO_REUSEPORT (Linux), so the kernel spreads
+incoming connections across them. Workers share emits through MESSAGE_QUEUE
+(a SQLite file queue by default) and keep sessions, groups, reminders, the chat
+log and uploads under a shared STATE_DIR, so any worker can serve any request.
+
+    python serve.py --workers 4 --port 5000
+    MESSAGE_QUEUE=redis://localhost:6379/0 python serve.py --workers 4
+"""
+import argparse
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+
+def reuse_port_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(256)
+    return sock
+
+
+def run_worker(host, port):
+    import app as chat_app
+    if chat_app.ASYNC_MODE == "eventlet":
+        import eventlet
+        import eventlet.wsgi
+        eventlet.wsgi.server(eventlet.listen((host, port), reuse_port=True), chat_app.app, log_output=False)
+    elif chat_app.ASYNC_MODE == "gevent":
+        from gevent.pywsgi import WSGIServer
+        WSGIServer(reuse_port_socket(host, port), chat_app.app, log=None).serve_forever()
+    else:
+        from werkzeug.serving import make_server
+        sock = reuse_port_socket(host, port)
+        make_server(host, port, chat_app.app, threaded=True, fd=sock.fileno()).serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run Smart Study Buddy with several worker processes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "5000")))
+    parser.add_argument("--state-dir", default=os.environ.get("STATE_DIR", "."),
+                        help="directory for the shared SQLite files and uploads")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args.host, args.port)
+        return 0
+
+    os.makedirs(args.state_dir, exist_ok=True)
+    env = dict(os.environ, STATE_DIR=args.state_dir)
+    env.setdefault("MESSAGE_QUEUE", f"sqlite:///{os.path.join(args.state_dir, 'socketio_queue.db')}")
+    # Every worker must sign sessions with the same key, or a user's id changes between requests
+    env.setdefault("SECRET_KEY", secrets.token_hex(32))
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--host", args.host, "--port", str(args.port)]
+    workers = [subprocess.Popen(command, env=env) for _ in range(args.workers)]
+    print(f"{args.workers} worker(s) on http://{args.host}:{args.port} (message queue {env['MESSAGE_QUEUE']})")
+
+    stopping = []
+
+    def shutdown(signum, frame):
+        stopping.append(signum)
+        for worker in workers:
+            if worker.poll() is None:
+                worker.terminate()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    try:
+        while not stopping and all(worker.poll() is None for worker in workers):
+            time.sleep(0.5)
+    finally:
+        # One worker dying takes the rest down, so a supervisor can restart the group
+        shutdown(None, None)
+        for worker in workers:
+            worker.wait()
+    if stopping[0] is not None:
+        return 0
+    return max(abs(worker.returncode or 0) for worker in workers) or 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
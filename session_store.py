@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class SessionStore(ABC):
+    """Per-user conversation state with TTL expiry and LRU eviction.
+
+    Values must be JSON-serializable so every backend can store them.
+    """
+
+    @abstractmethod
+    def get(self, user_id, key):
+        """The value stored under key for the user, or None."""
+
+    @abstractmethod
+    def set(self, user_id, key, value):
+        """Store a value for the user, refreshing the session's TTL."""
+
+    @abstractmethod
+    def clear(self, user_id):
+        """Forget everything stored for the user."""
+
+    @abstractmethod
+    def stats(self):
+        """Backend name, live session count and eviction/expiration counters."""
+
+
+class _Session:
+    __slots__ = ("data", "expires_at", "size")
+
+    def __init__(self, expires_at):
+        self.data = {}
+        self.expires_at = expires_at
+        self.size = 0
+
+
+def _estimate_size(data):
+    return len(json.dumps(data, separators=(",", ":"), default=str))
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store; only suitable for a single worker."""
+
+    def __init__(self, ttl=1800, max_sessions=10000, max_bytes=16 * 1024 * 1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _live(self, user_id, now):
+        session = self._sessions.get(user_id)
+        if session is None:
+            return None
+        if session.expires_at <= now:
+            self._drop(user_id)
+            self.expirations += 1
+            return None
+        session.expires_at = now + self.ttl
+        self._sessions.move_to_end(user_id)
+        return session
+
+    def _drop(self, user_id):
+        session = self._sessions.pop(user_id)
+        self._bytes -= session.size
+
+    def _enforce_limits(self):
+        now = self._clock()
+        # Expired sessions are at the LRU end, so they go first
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if session.expires_at <= now:
+                self._drop(user_id)
+                self.expirations += 1
+            elif len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+                self._drop(user_id)
+                self.evictions += 1
+            else:
+                break
+
+    def get(self, user_id, key):
+        with self._lock:
+            session = self._live(user_id, self._clock())
+            return session.data.get(key) if session else None
+
+    def set(self, user_id, key, value):
+        with self._lock:
+            now = self._clock()
+            session = self._live(user_id, now)
+            if session is None:
+                session = self._sessions[user_id] = _Session(now + self.ttl)
+            session.data[key] = value
+            size = _estimate_size(session.data)
+            self._bytes += size - session.size
+            session.size = size
+            self._enforce_limits()
+
+    def clear(self, user_id):
+        with self._lock:
+            if user_id in self._sessions:
+                self._drop(user_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "live_sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store shared by every worker process on the host through one SQLite file."""
+
+    def __init__(self, path="sessions.db", ttl=1800, max_sessions=100000, sweep_every=256, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sweep_every = sweep_every
+        self._clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "user_id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions(last_access)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, conn, user_id, now):
+        row = conn.execute("SELECT data, expires_at FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+            with self._lock:
+                self.expirations += 1
+            return None
+        return json.loads(row[0])
+
+    def get(self, user_id, key):
+        conn = self._connect()
+        now = self._clock()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            data = self._load(conn, user_id, now)
+            if data is not None:
+                conn.execute(
+                    "UPDATE sessions SET expires_at = ?, last_access = ? WHERE user_id = ?",
+                    (now + self.ttl, now, user_id),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return data.get(key) if data else None
+
+    def set(self, user_id, key, value):
+        conn = self._connect()
+        now = self._clock()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            data = self._load(conn, user_id, now) or {}
+            data[key] = value
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (user_id, data, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (user_id, json.dumps(data, separators=(",", ":")), now + self.ttl, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % self.sweep_every == 0
+        if sweep:
+            self.sweep()
+
+    def clear(self, user_id):
+        self._connect().execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    def sweep(self):
+        """Delete expired sessions, then evict least recently used ones above max_sessions."""
+        conn = self._connect()
+        expired = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (self._clock(),)).rowcount
+        evicted = conn.execute(
+            "DELETE FROM sessions WHERE user_id IN ("
+            "SELECT user_id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        ).rowcount
+        with self._lock:
+            self.expirations += expired
+            self.evictions += evicted
+
+    def stats(self):
+        live = self._connect().execute(
+            "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (self._clock(),)
+        ).fetchone()[0]
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "live_sessions": live,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def create_session_store(default_backend="memory", default_path="sessions.db"):
+    """Build the store selected by SESSION_BACKEND (memory or sqlite)."""
+    backend = os.environ.get("SESSION_BACKEND", default_backend).lower()
+    ttl = float(os.environ.get("SESSION_TTL", "1800"))
+    max_sessions = int(os.environ.get("SESSION_MAX", "10000"))
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.environ.get("SESSION_DB", default_path), ttl=ttl, max_sessions=max_sessions)
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND '{backend}'")
+    max_bytes = int(os.environ.get("SESSION_MAX_BYTES", str(16 * 1024 * 1024)))
+    return MemorySessionStore(ttl=ttl, max_sessions=max_sessions, max_bytes=max_bytes)
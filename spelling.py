@@ -0,0 +1,209 @@
+import json
+import re
+from collections import Counter
+
+from cache_utils import LRUCache
+
+INDEX_VERSION = 1
+_WORD_RE = re.compile(r"[a-z]+")
+# Suffix and what to put back, tried by word_forms
+_INFLECTIONS = [
+    ("ies", ("y",)), ("es", ("", "e")), ("s", ("",)), ("ied", ("y",)), ("ed", ("", "e")),
+    ("ing", ("", "e")), ("ier", ("y",)), ("er", ("", "e")), ("iest", ("y",)), ("est", ("", "e")),
+    ("ily", ("y",)), ("ly", ("",)),
+]
+
+
+def pattern_vocabulary(intents):
+    """Word counts over every intent pattern, lowercased as the pattern matcher sees them."""
+    counts = Counter()
+    for intent in intents:
+        for pattern in intent.get("patterns", []):
+            counts.update(_WORD_RE.findall(pattern.lower()))
+    return dict(counts)
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance (an adjacent swap is one edit).
+
+    Stops early and returns max_distance + 1 once the distance is known to exceed max_distance.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def word_forms(token):
+    """token plus the stems a regular English inflection (plural, -ed, -ing, -ly...) could come from."""
+    forms = [token]
+    for suffix, replacements in _INFLECTIONS:
+        if token.endswith(suffix) and len(token) > len(suffix) + 2:
+            stem = token[:-len(suffix)]
+            forms.extend(stem + replacement for replacement in replacements)
+            # Doubled final consonant: "quizzes", "running", "stopped"
+            if len(stem) > 2 and stem[-1] == stem[-2] and suffix in ("es", "ed", "ing", "er", "est"):
+                forms.append(stem[:-1])
+    return forms
+
+
+def deletes(word, distance):
+    """Every string reachable from word by removing up to `distance` characters, word included."""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    found.discard("")
+    return found
+
+
+class SpellingIndex:
+    """Symmetric-delete (SymSpell-style) index over the intent pattern vocabulary.
+
+    Every vocabulary word is stored under each string obtained by deleting up to
+    max_distance characters from its first prefix_length characters. A lookup
+    generates the same deletes for the misspelled token and only verifies the
+    words found under them, so cost depends on the token length rather than the
+    vocabulary size. Short tokens get a smaller edit budget, since a two-letter
+    edit turns most short words into some other word.
+
+    `dictionary` holds general English words. A token found there (directly or
+    as an inflection) is spelled correctly even when no pattern uses it, so it
+    is left alone: "byte" must not become "bye".
+    """
+
+    def __init__(self, words, max_distance=2, prefix_length=7, cache_size=4096, dictionary=()):
+        self.words = dict(words)
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.dictionary = frozenset(dictionary)
+        self._deletes = {}
+        for word in sorted(self.words):
+            for key in deletes(word[:prefix_length], max_distance):
+                self._deletes.setdefault(key, []).append(word)
+        self._cache = LRUCache(maxsize=cache_size)
+
+    @classmethod
+    def from_intents(cls, intents, **kwargs):
+        return cls(pattern_vocabulary(intents), **kwargs)
+
+    def __len__(self):
+        return len(self.words)
+
+    def budget(self, token):
+        """Edits allowed for a token of this length."""
+        if len(token) < 4:
+            return 0
+        if len(token) < 6:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def add_dictionary(self, words):
+        self.dictionary = self.dictionary | frozenset(words)
+        self._cache.clear()
+
+    def is_word(self, token):
+        """Whether token is a known English word or an inflection of one."""
+        return any(form in self.dictionary for form in word_forms(token)) if self.dictionary else False
+
+    def lookup(self, token):
+        """Return the closest vocabulary word for token, or None when nothing is within budget.
+
+        Ties on distance go to the word used most often in the patterns. Dictionary
+        words are never corrected.
+        """
+        if token in self.words:
+            return token
+        cached = self._cache.get(token, False)
+        if cached is not False:
+            return cached
+        budget = self.budget(token)
+        best = None
+        if budget and not self.is_word(token):
+            best_key = None
+            seen = set()
+            for key in deletes(token[:self.prefix_length], budget):
+                for word in self._deletes.get(key, ()):
+                    if word in seen:
+                        continue
+                    seen.add(word)
+                    distance = edit_distance(token, word, budget)
+                    if distance > budget:
+                        continue
+                    rank = (distance, -self.words[word], word)
+                    if best_key is None or rank < best_key:
+                        best, best_key = word, rank
+        self._cache.set(token, best)
+        return best
+
+    def correct(self, message):
+        """Lowercase the message and replace each out-of-vocabulary word with its closest match."""
+        return self.correct_spans(message)[0]
+
+    def correct_spans(self, message):
+        """Like correct, also returning the [start, end) offsets of the replaced words in the result."""
+        parts = []
+        spans = []
+        length = last = 0
+        text = message.lower()
+        for m in _WORD_RE.finditer(text):
+            token = m.group()
+            replacement = self.lookup(token) or token
+            parts.append(text[last:m.start()])
+            length += m.start() - last
+            if replacement != token:
+                spans.append((length, length + len(replacement)))
+            parts.append(replacement)
+            length += len(replacement)
+            last = m.end()
+        parts.append(text[last:])
+        return "".join(parts), spans
+
+    def to_dict(self):
+        return {
+            "version": INDEX_VERSION,
+            "max_distance": self.max_distance,
+            "prefix_length": self.prefix_length,
+            "words": self.words,
+            "deletes": self._deletes,
+            "dictionary": sorted(self.dictionary),
+        }
+
+    @classmethod
+    def from_dict(cls, data, cache_size=4096):
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported spelling index version {data.get('version')}")
+        index = cls.__new__(cls)
+        index.words = data["words"]
+        index.max_distance = data["max_distance"]
+        index.prefix_length = data["prefix_length"]
+        index._deletes = data["deletes"]
+        # Indexes saved before the dictionary existed correct every unknown word
+        index.dictionary = frozenset(data.get("dictionary", ()))
+        index._cache = LRUCache(maxsize=cache_size)
+        return index
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), **kwargs)
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+import time
+
+import socketio
+
+
+class SQLiteManager(socketio.PubSubManager):
+    """Socket.IO message queue in a SQLite file, for several workers on one host without a broker.
+
+    Use MESSAGE_QUEUE=sqlite:///path/to/queue.db. Each published message is a
+    row; every worker tails the table from the last id it has seen, polling
+    every poll_interval seconds when idle. Rows older than `retention` seconds
+    are pruned by publishers. Across hosts, use Redis or AMQP instead.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, url="sqlite:///socketio_queue.db", channel="flask-socketio", write_only=False,
+                 logger=None, json=None, poll_interval=0.005, retention=60, prune_every=1000):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        if not url.startswith("sqlite:///"):
+            raise ValueError(f"Not a sqlite:/// message queue URL: {url}")
+        self.path = url[len("sqlite:///"):]
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._published = 0
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, ts REAL NOT NULL, payload TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS messages_ts ON messages(ts)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _publish(self, data):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("INSERT INTO messages (channel, ts, payload) VALUES (?, ?, ?)",
+                     (self.channel, now, self.json.dumps(data)))
+        self._published += 1
+        if self._published % self.prune_every == 0:
+            conn.execute("DELETE FROM messages WHERE ts < ?", (now - self.retention,))
+
+    def _sleep(self):
+        if self.server is not None:
+            self.server.sleep(self.poll_interval)
+        else:
+            time.sleep(self.poll_interval)
+
+    def _listen(self):
+        conn = self._connect()
+        # Only messages published after this worker started are relevant
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+        while True:
+            rows = conn.execute(
+                "SELECT id, channel, payload FROM messages WHERE id > ? ORDER BY id LIMIT 1000", (last_id,)
+            ).fetchall()
+            if not rows:
+                self._sleep()
+                continue
+            # Advance past other channels' rows too, so they are not rescanned
+            last_id = rows[-1][0]
+            for _, channel, payload in rows:
+                if channel == self.channel:
+                    yield payload
@@ -1,6 +1,12 @@
-const socket = io();
-let userId = localStorage.getItem("user_id") || `user_${Date.now()}`;
-localStorage.setItem("user_id", userId);
+// With several server workers, the server asks for websocket only so a
+// connection never needs to return to the worker that started it
+const socket = io({ transports: (document.body.dataset.socketTransports || "polling,websocket").split(",") });
+
+// Join this user's room on every (re)connect so replies are delivered only here;
+// the server knows the user from the session cookie
+socket.on("connect", () => {
+  socket.emit("join", {});
+});
 
 window.onload = () => {
   loadHistory();
@@ -172,32 +178,8 @@ document.addEventListener("DOMContentLoaded", function() {
     });
   }
 
-  // Listen for user sending a reminder prompt
-  document.getElementById('send-button').addEventListener('click', function() {
-    const input = document.getElementById('user-input');
-    const value = input.value.trim();
-    const match = value.match(/^remind me to (.+) at (.+)$/i);
-    if (match) {
-      const text = match[1];
-      const time = match[2];
-      fetch('/reminder', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text, time })
-      })
-      .then(res => res.json())
-      .then(data => {
-        if (data.success) {
-          appendMessage(`<b>Reminder:</b> ${data.message}`, 'bot');
-        } else {
-          appendMessage('❌ <b>Reminder failed.</b>', 'bot');
-        }
-      })
-      .catch(() => {
-        appendMessage('❌ <b>Reminder failed: Network error.</b>', 'bot');
-      });
-    }
-  });
+  // "Remind me to ... at ..." is scheduled by the chat message itself; the
+  // reminder arrives as a bot message when it is due
 
   // Calendar Export
   const calBtn = document.querySelector('.sidebar-btn[title="Calendar Export"]');
@@ -213,25 +195,15 @@ document.addEventListener("DOMContentLoaded", function() {
   document.getElementById('send-button').addEventListener('click', function() {
     const input = document.getElementById('user-input');
     const value = input.value.trim();
-    const match = value.match(/^export my event (.+) to calendar$/i);
+    const match = value.match(/^export my (?:event (.+) to calendar|reminders)$/i);
     if (match) {
-      const event = match[1];
-      fetch('/calendar-export', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ event })
-      })
-      .then(res => res.json())
-      .then(data => {
-        if (data.success) {
-          appendMessage(`<b>Calendar Export:</b> ${data.message}`, 'bot');
-        } else {
-          appendMessage('❌ <b>Calendar export failed.</b>', 'bot');
-        }
-      })
-      .catch(() => {
-        appendMessage('❌ <b>Calendar export failed: Network error.</b>', 'bot');
-      });
+      const params = new URLSearchParams({ tz_offset: new Date().getTimezoneOffset() });
+      if (match[1]) params.set('event', match[1]);
+      const link = document.createElement('a');
+      link.href = `/calendar-export?${params}`;
+      link.download = 'astra_calendar.ics';
+      link.click();
+      appendMessage('📅 <b>Calendar Export:</b> Downloading your .ics file.', 'bot');
     }
   });
 
@@ -320,25 +292,11 @@ document.addEventListener("DOMContentLoaded", function() {
   document.getElementById('send-button').addEventListener('click', function() {
     const input = document.getElementById('user-input');
     const value = input.value.trim();
-    const match = value.match(/^export my (.+)$/i);
+    const match = value.match(/^export my (?!event .+ to calendar$|reminders$)(.+)$/i);
     if (match) {
-      const what = match[1];
-      fetch('/export', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ what })
-      })
-      .then(res => res.json())
-      .then(data => {
-        if (data.success) {
-          appendMessage(`<b>Export:</b> ${data.message}`, 'bot');
-        } else {
-          appendMessage('❌ <b>Export failed.</b>', 'bot');
-        }
-      })
-      .catch(() => {
-        appendMessage('❌ <b>Export failed: Network error.</b>', 'bot');
-      });
+      const format = /json/i.test(match[1]) ? "json" : "txt";
+      appendMessage(`<b>Export:</b> Downloading your chat history as ${format.toUpperCase()}.`, 'bot');
+      downloadHistory(format);
     }
   });
 
@@ -403,47 +361,103 @@ document.addEventListener("DOMContentLoaded", function() {
   }
 });
 
+// Set from "busy" replies: the server asked us to hold off until this time
+let retryAt = 0;
+
 function sendMessage() {
   const input = document.getElementById("user-input");
   const message = input.value.trim();
-  if (!message) return;
+  if (!message || Date.now() < retryAt) return;
 
   appendMessage(message, "user");
-  socket.emit("message", { message, user_id: userId });
+  socket.emit("message", { message, tz_offset: new Date().getTimezoneOffset() });
   input.value = "";
 }
 
 socket.on("response", (data) => {
   appendMessage(data.message, "bot");
-  saveToHistory(data.message, "bot");
+  if (data.busy && data.retry_after) {
+    const sendButton = document.getElementById("send-button");
+    retryAt = Date.now() + data.retry_after * 1000;
+    sendButton.disabled = true;
+    setTimeout(() => { sendButton.disabled = false; }, data.retry_after * 1000);
+  }
 });
 
-function appendMessage(text, type) {
+// Group messages are other users' raw text, so they are shown as text, never parsed as HTML
+socket.on("group_message", (data) => {
+  const msg = document.createElement("div");
+  msg.className = "message bot";
+  const bubble = document.createElement("div");
+  bubble.className = "bubble";
+  const group = document.createElement("b");
+  group.textContent = data.group;
+  bubble.append("👥 ", group, `: ${data.message}`);
+  msg.appendChild(bubble);
   const chatbox = document.getElementById("chatbox");
+  chatbox.appendChild(msg);
+  chatbox.scrollTop = chatbox.scrollHeight;
+});
+
+function renderMessage(text, type) {
   const msg = document.createElement("div");
   msg.className = `message ${type}`;
   msg.innerHTML = `<div class="bubble">${marked.parse(text || "..." )}</div>`;
-  chatbox.appendChild(msg);
+  return msg;
+}
+
+function appendMessage(text, type) {
+  const chatbox = document.getElementById("chatbox");
+  chatbox.appendChild(renderMessage(text, type));
   chatbox.scrollTop = chatbox.scrollHeight;
-  saveToHistory(text, type);
 }
 
 function clearChat() {
   if (!confirm("Clear chat history?")) return;
   document.getElementById("chatbox").innerHTML = "";
-  localStorage.removeItem("chatHistory");
+  olderBefore = null;
+  fetch("/history", { method: "DELETE" });
   appendMessage("👋 Hi again! I'm Astra. Let's start fresh.", "bot");
 }
 
-function saveToHistory(text, type) {
-  const history = JSON.parse(localStorage.getItem("chatHistory") || "[]");
-  history.push({ text, type });
-  localStorage.setItem("chatHistory", JSON.stringify(history.slice(-300)));
+// History is kept on the server and fetched one page at a time
+let olderBefore = null;
+let loadingHistory = false;
+
+function fetchHistoryPage(before) {
+  let url = "/history?limit=50";
+  if (before) url += `&before=${before}`;
+  return fetch(url).then(res => res.json());
 }
 
 function loadHistory() {
-  const history = JSON.parse(localStorage.getItem("chatHistory") || "[]");
-  history.forEach(msg => appendMessage(msg.text, msg.type));
+  const chatbox = document.getElementById("chatbox");
+  fetchHistoryPage(null).then(data => {
+    if (!data.success) return;
+    data.messages.forEach(msg => appendMessage(msg.message, msg.role));
+    olderBefore = data.before;
+  });
+  chatbox.addEventListener("scroll", () => {
+    if (chatbox.scrollTop === 0) loadOlderHistory();
+  });
+}
+
+function loadOlderHistory() {
+  if (!olderBefore || loadingHistory) return;
+  loadingHistory = true;
+  const chatbox = document.getElementById("chatbox");
+  fetchHistoryPage(olderBefore).then(data => {
+    if (!data.success) return;
+    const previousHeight = chatbox.scrollHeight;
+    const fragment = document.createDocumentFragment();
+    data.messages.forEach(msg => fragment.appendChild(renderMessage(msg.message, msg.role)));
+    chatbox.insertBefore(fragment, chatbox.firstChild);
+    // Keep the view on the message that was at the top before the older page was added
+    chatbox.scrollTop = chatbox.scrollHeight - previousHeight;
+    olderBefore = data.before;
+  }).finally(() => {
+    loadingHistory = false;
+  });
 }
 
 function startVoiceInput() {
@@ -470,24 +484,17 @@ function startVoiceInput() {
   recognition.start();
 }
 
-function exportChat() {
-  const chatbox = document.getElementById("chatbox");
-  let text = "Astra Chat History\n----------------------\n";
-  const bubbles = chatbox.querySelectorAll(".message");
-
-  bubbles.forEach(bubble => {
-    const content = bubble.innerText;
-    const speaker = bubble.classList.contains("user") ? "You" : "Astra";
-    text += `${speaker}: ${content}\n\n`;
-  });
-
-  const blob = new Blob([text], { type: "text/plain" });
+function downloadHistory(format) {
   const link = document.createElement("a");
-  link.href = URL.createObjectURL(blob);
-  link.download = "astra_chat.txt";
+  link.href = `/export?format=${format}`;
+  link.download = `astra_chat.${format}`;
   link.click();
 }
 
+function exportChat() {
+  downloadHistory("txt");
+}
+
 function toggleTheme() {
   document.body.classList.toggle("light");
   const isLight = document.body.classList.contains("light");
@@ -501,7 +508,3 @@ function applyTheme() {
   document.getElementById("themeToggle").checked = saved === "light";
   document.getElementById("theme-status").textContent = saved === "light" ? "Light" : "Dark";
 }
-// Clear chat history on close
-window.addEventListener("beforeunload", function () {
-  localStorage.removeItem("chatHistory");
-});
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # gzip only; brotli is optional
+    brotli = None
+
+COMPRESS_MIN_BYTES = 256
+MIME_TYPES = {".js": "text/javascript", ".css": "text/css", ".html": "text/html", ".json": "application/json"}
+
+
+class EncodedBody:
+    """A response body with its gzip (and brotli, when available) encodings computed once."""
+
+    __slots__ = ("etag", "variants")
+
+    def __init__(self, body):
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {"identity": body}
+        if len(body) < COMPRESS_MIN_BYTES:
+            return
+        self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body)
+        # Compression that does not save anything is not worth the client's CPU
+        for encoding in [e for e in self.variants if e != "identity"]:
+            if len(self.variants[encoding]) >= len(body):
+                del self.variants[encoding]
+
+    def negotiate(self, accept_encodings):
+        """(encoding, body) best matching the request's Accept-Encoding."""
+        encoding = accept_encodings.best_match([e for e in ("br", "gzip") if e in self.variants]) or "identity"
+        return encoding, self.variants[encoding]
+
+    def etag_for(self, encoding):
+        # Each encoding is a different representation, so it gets its own strong ETag
+        return self.etag if encoding == "identity" else f"{self.etag}-{encoding}"
+
+
+def json_body(obj):
+    """Serialize obj once, deterministically, for reuse across requests."""
+    return EncodedBody(json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+class _Asset:
+    __slots__ = ("path", "mtime", "url_name", "mimetype", "body")
+
+
+class StaticAssets:
+    """Pre-compressed static files served under content-fingerprinted names.
+
+    add('js/script.js', path) publishes the file as js/script.<hash>.js. The
+    hash changes whenever the file does, so the fingerprinted URL can be cached
+    forever. Files are re-read when their mtime changes.
+    """
+
+    def __init__(self):
+        self._assets = {}
+        self._by_url_name = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, path):
+        asset = _Asset()
+        asset.path = path
+        asset.mtime = None
+        asset.url_name = None
+        asset.mimetype = MIME_TYPES.get(os.path.splitext(name)[1], "application/octet-stream")
+        self._assets[name] = asset
+        self._refresh(name, asset)
+
+    def _refresh(self, name, asset):
+        mtime = os.stat(asset.path).st_mtime_ns
+        if mtime == asset.mtime:
+            return asset
+        with self._lock:
+            if mtime != asset.mtime:
+                with open(asset.path, "rb") as f:
+                    body = EncodedBody(f.read())
+                stem, ext = os.path.splitext(name)
+                url_name = f"{stem}.{body.etag}{ext}"
+                self._by_url_name.pop(asset.url_name, None)
+                asset.body, asset.url_name, asset.mtime = body, url_name, mtime
+                self._by_url_name[url_name] = name
+        return asset
+
+    def url_name(self, name):
+        return self._refresh(name, self._assets[name]).url_name
+
+    @property
+    def version(self):
+        """Changes whenever any asset's content does."""
+        return tuple(self.url_name(name) for name in self._assets)
+
+    def lookup(self, url_name):
+        """The asset published under a fingerprinted name, or None."""
+        name = self._by_url_name.get(url_name)
+        if name is None:
+            return None
+        asset = self._refresh(name, self._assets[name])
+        return asset if asset.url_name == url_name else None
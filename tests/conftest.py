@@ -0,0 +1,16 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def nltk_data_available():
+    """Whether the punkt, wordnet and stopwords data custom_tokenizer needs is installed."""
+    import nltk
+    try:
+        for path in ("tokenizers/punkt", "corpora/wordnet", "corpora/stopwords"):
+            nltk.data.find(path)
+    except LookupError:
+        return False
+    return True
@@ -0,0 +1,50 @@
+import sqlite3
+
+from chat_log import ChatLog
+
+
+class LockedOnce:
+    """A connection whose next BEGIN fails the way a busy shared database does."""
+
+    def __init__(self, conn, owner):
+        self._conn = conn
+        self._owner = owner
+
+    def execute(self, sql, *args):
+        if sql == "BEGIN" and self._owner.fail_begin:
+            self._owner.fail_begin -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class FlakyChatLog(ChatLog):
+    fail_begin = 1
+
+    def _connect(self):
+        return LockedOnce(super()._connect(), self)
+
+
+def test_writer_survives_a_failed_begin(tmp_path):
+    log = FlakyChatLog(str(tmp_path / "chat.db"))
+    log.append("u1", "user", "lost")
+    assert log.flush(timeout=2)
+    log.append("u1", "user", "kept")
+    assert log.flush(timeout=2)
+    assert [m["message"] for m in log.page("u1")] == ["kept"]
+    assert log.stats()["written"] == 1
+
+
+def test_page_and_delete(tmp_path):
+    log = ChatLog(str(tmp_path / "chat.db"))
+    for n in range(5):
+        log.append("u1", "user", f"m{n}")
+    log.append("u2", "user", "other")
+    log.flush()
+    first = log.page("u1", limit=2)
+    assert [m["message"] for m in first] == ["m3", "m4"]
+    assert [m["message"] for m in log.page("u1", before=first[0]["id"], limit=2)] == ["m1", "m2"]
+    assert log.delete_user("u1") == 5
+    assert [m["message"] for m in log.iter_messages("u2")] == ["other"]
@@ -0,0 +1,33 @@
+from faq_index import FaqIndex
+
+FAQS = [
+    {"q": "How do I reset my password?", "a": "Settings, then Reset Password."},
+    {"q": "How do I start a quiz?", "a": "Type 'start a quiz'."},
+    {"q": "How do I set a reminder?", "a": "Say 'remind me to ...'."},
+]
+
+
+def test_best_match_first():
+    hits = FaqIndex(FAQS).search("forgot my password, how to reset", k=3)
+    assert hits[0].answer == "Settings, then Reset Password."
+    assert [h.score for h in hits] == sorted((h.score for h in hits), reverse=True)
+
+
+def test_min_score_and_no_overlap():
+    index = FaqIndex(FAQS)
+    assert index.search("qqqq zzzz") == []
+    assert all(h.score >= 0.5 for h in index.search("quiz", k=3, min_score=0.5))
+
+
+def test_ties_go_to_the_older_entry():
+    index = FaqIndex([{"q": "exam dates", "a": "first"}, {"q": "exam dates?", "a": "second"}])
+    assert [h.answer for h in index.search("exam dates", k=2)] == ["first", "second"]
+
+
+def test_add_and_remove_update_results():
+    index = FaqIndex(FAQS)
+    index.search("reset password")
+    assert index.remove_question("How do I reset my password?")
+    assert all("password" not in h.question for h in index.search("reset password", k=3))
+    faq_id = index.add("Where do I reset my password?", "Use the login page.")
+    assert index.search("reset password")[0].faq_id == faq_id
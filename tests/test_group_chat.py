@@ -0,0 +1,49 @@
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    os.environ.update(CONTENT_WATCH="0", REMINDER_SCHEDULER="0",
+                      STATE_DIR=str(tmp_path_factory.mktemp("state")))
+    return importlib.import_module("app")
+
+
+def member(app_module, group, action="join"):
+    """A socket client whose session has joined `group` through /group-chat."""
+    client = app_module.app.test_client()
+    client.get("/")
+    socket = app_module.socketio.test_client(app_module.app, flask_test_client=client)
+    socket.emit("join", {})
+    sid = app_module.socketio.server.manager.sid_from_eio_sid(socket.eio_sid, "/")
+    client.post("/group-chat", json={"action": action, "group": group, "sid": sid})
+    socket.get_received()
+    return socket
+
+
+def group_messages(socket):
+    return [p["args"][0]["message"] for p in socket.get_received() if p["name"] == "group_message"]
+
+
+def test_members_receive_group_messages(app_module):
+    alice = member(app_module, "algebra", "create")
+    bob = member(app_module, "algebra")
+    alice.emit("group_message", {"group": "algebra", "message": " hi all "})
+    assert group_messages(bob) == ["hi all"]
+
+
+def test_non_members_cannot_post(app_module):
+    alice = member(app_module, "physics", "create")
+    outsider = member(app_module, "chemistry", "create")
+    outsider.emit("group_message", {"group": "physics", "message": "<img src=x onerror=alert(1)>"})
+    assert group_messages(alice) == []
+
+
+def test_non_string_payloads_are_ignored(app_module):
+    alice = member(app_module, "biology", "create")
+    bob = member(app_module, "biology")
+    alice.emit("group_message", {"group": "biology", "message": {"x": 1}})
+    alice.emit("group_message", {"group": ["biology"], "message": "hi"})
+    assert group_messages(bob) == []
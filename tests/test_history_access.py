@@ -0,0 +1,50 @@
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    os.environ.update(CONTENT_WATCH="0", REMINDER_SCHEDULER="0",
+                      STATE_DIR=str(tmp_path_factory.mktemp("state")))
+    return importlib.import_module("app")
+
+
+def browser(app_module):
+    """A test client with a session cookie and a socket connection that shares it."""
+    client = app_module.app.test_client()
+    client.get("/")
+    with client.session_transaction() as session:
+        user_id = session["user_id"]
+    socket = app_module.socketio.test_client(app_module.app, flask_test_client=client)
+    socket.emit("join", {})
+    return client, socket, user_id
+
+
+def test_history_is_visible_right_after_chatting(app_module):
+    client, socket, _ = browser(app_module)
+    socket.emit("message", {"message": "hello"})
+    messages = client.get("/history").get_json()["messages"]
+    assert [m["role"] for m in messages] == ["user", "bot"]
+    assert messages[0]["message"] == "hello"
+
+
+def test_client_supplied_user_id_is_ignored(app_module):
+    owner, socket, owner_id = browser(app_module)
+    socket.emit("message", {"message": "hello", "user_id": "someone_else"})
+    other = app_module.app.test_client()
+    other.get("/")
+
+    assert other.get(f"/history?user_id={owner_id}").get_json()["messages"] == []
+    assert other.delete(f"/history?user_id={owner_id}").get_json()["deleted"] == 0
+    assert b"hello" not in other.get(f"/export?user_id={owner_id}&format=json").data
+    assert len(owner.get("/history").get_json()["messages"]) == 2
+
+
+def test_socket_user_id_comes_from_the_session(app_module):
+    _, socket, owner_id = browser(app_module)
+    socket.emit("message", {"message": "hello", "user_id": "someone_else"})
+    app_module.chat_log.flush()
+    assert app_module.chat_log.page("someone_else", limit=10) == []
+    assert len(app_module.chat_log.page(owner_id, limit=10)) == 2
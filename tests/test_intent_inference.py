@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+
+import pytest
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from conftest import ROOT, nltk_data_available
+from intent_inference import NumpyIntentModel, Tokenizer, check_parity, rule_lemma
+from model_artifacts import export_pipeline
+
+needs_nltk = pytest.mark.skipif(not nltk_data_available(),
+                                reason="NLTK data missing: python -m nltk.downloader punkt wordnet stopwords")
+
+# Inflections the training patterns do not contain
+INFLECTIONS = ["give me quizzes", "my classes and schedules", "children need study plans",
+               "explain the theories", "any boxes of resources", "studies", "reminders for exams"]
+
+
+def training_data():
+    with open(os.path.join(ROOT, "intents.json"), encoding="utf-8") as f:
+        intents = json.load(f)["intents"]
+    texts, labels = [], []
+    for intent in intents:
+        for pattern in intent.get("patterns", []):
+            texts.append(pattern)
+            labels.append(intent["tag"])
+    return texts, labels
+
+
+def probe_messages(texts):
+    messages = list(texts) + INFLECTIONS
+    for name in ("messages.txt", "noisy_messages.txt"):
+        with open(os.path.join(ROOT, "benchmarks", "corpus", name), encoding="utf-8") as f:
+            messages += [line.strip().split("\t")[-1] for line in f if line.strip()]
+    return messages
+
+
+def fit(tokenizer, texts, labels, ngram_range=(1, 2), sublinear_tf=False, alpha=0.1):
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer(tokenizer=tokenizer, lowercase=False, token_pattern=None,
+                                  ngram_range=ngram_range, sublinear_tf=sublinear_tf)),
+        ("clf", MultinomialNB(alpha=alpha)),
+    ])
+    return pipeline.fit(texts, labels)
+
+
+def test_rule_lemma_reduces_plurals_to_known_terms():
+    known = {"quiz", "box", "story", "class", "church", "dish", "leaf", "man", "bus"}.__contains__
+    assert rule_lemma("quizzes", known) == "quiz"
+    assert rule_lemma("boxes", known) == "box"
+    assert rule_lemma("stories", known) == "story"
+    assert rule_lemma("classes", known) == "class"
+    assert rule_lemma("churches", known) == "church"
+    assert rule_lemma("dishes", known) == "dish"
+    assert rule_lemma("men", known) == "man"
+    assert rule_lemma("bus", known) == "bus"
+    # Nothing known: the word is kept
+    assert rule_lemma("theories", known) == "theories"
+
+
+def test_lemma_table_overrides_rules():
+    tokenizer = Tokenizer([], {"children": "child", "news": "news"}, {"child", "new"}.__contains__)
+    assert tokenizer("Children read the news") == ["child", "read", "the", "news"]
+
+
+@pytest.mark.parametrize("ngram_range,sublinear_tf", [((1, 1), False), ((1, 2), False), ((1, 2), True)])
+def test_engine_matches_sklearn(tmp_path, ngram_range, sublinear_tf):
+    texts, labels = training_data()
+    tokenizer = Tokenizer(ENGLISH_STOP_WORDS, {})
+    pipeline = fit(tokenizer, texts, labels, ngram_range, sublinear_tf)
+    path = str(tmp_path / "model.bin")
+    export_pipeline(pipeline, path, tokenizer={"stop_words": sorted(ENGLISH_STOP_WORDS), "lemmas": {}})
+
+    mismatched, max_error = check_parity(pipeline, NumpyIntentModel.load(path), probe_messages(texts))
+    assert mismatched == []
+    assert max_error < 1e-9
+
+
+def test_unseen_plural_reaches_vocabulary_term(tmp_path):
+    texts, labels = training_data()
+    pipeline = fit(Tokenizer(ENGLISH_STOP_WORDS, {}), texts, labels)
+    path = str(tmp_path / "model.bin")
+    export_pipeline(pipeline, path, tokenizer={"stop_words": sorted(ENGLISH_STOP_WORDS), "lemmas": {},
+                                               "lemma_fallback": "noun_rules"})
+    model = NumpyIntentModel.load(path)
+    assert model.tokenizer("give me quizzes") == ["quiz"]
+    plural, singular = model.predict_proba(["give me quizzes", "give me quiz"])
+    assert plural.tolist() == singular.tolist()
+
+
+@needs_nltk
+def test_parity_with_custom_tokenizer(tmp_path):
+    from preprocessing import build_lemma_table, custom_tokenizer, ignore_words_set
+
+    texts, labels = training_data()
+    pipeline = fit(custom_tokenizer, texts, labels)
+    words = sorted({token for text in texts for token in custom_tokenizer(text)})
+    path = str(tmp_path / "model.bin")
+    export_pipeline(pipeline, path, tokenizer={
+        "stop_words": sorted(ignore_words_set),
+        "lemmas": build_lemma_table(texts, words),
+        "lemma_fallback": "noun_rules",
+    })
+    model = NumpyIntentModel.load(path)
+
+    # Lemmas may differ only where neither is a feature
+    known = set(words)
+    messages = probe_messages(texts)
+    for message in messages:
+        served = [token if token in known else None for token in model.tokenizer(message)]
+        trained = [token if token in known else None for token in custom_tokenizer(message)]
+        assert served == trained, message
+    mismatched, max_error = check_parity(pipeline, model, messages)
+    assert mismatched == []
+    assert max_error < 1e-9
+
+
+@needs_nltk
+@pytest.mark.skipif(not os.path.exists(os.path.join(ROOT, "intent_model.bin")),
+                    reason="intent_model.bin not built; run train_model.py")
+def test_shipped_artifact_matches_pickle():
+    from intent_classifier import load_pipeline
+
+    artifact_path = os.path.join(ROOT, "intent_model.bin")
+    model = NumpyIntentModel.load(artifact_path)
+    with open(os.path.join(ROOT, "intents.json"), "rb") as f:
+        assert model.artifact.content_hash == hashlib.sha1(f.read()).hexdigest()
+    texts, _ = training_data()
+    mismatched, max_error = check_parity(load_pipeline(os.path.join(ROOT, "intent_model.pkl")), model,
+                                         probe_messages(texts))
+    assert mismatched == []
+    assert max_error < 1e-9
@@ -0,0 +1,103 @@
+import datetime
+
+import pytest
+
+from reminders import ReminderScheduler, ReminderStore, local_now, parse_reminder, parse_when, to_timestamp
+
+
+class FakeClock:
+    def __init__(self, when):
+        self.now = when.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+# Sunday 18 October 2026, 14:30 in the user's time zone (UTC, tz_offset 0)
+SUNDAY_AFTERNOON = datetime.datetime(2026, 10, 18, 14, 30)
+
+
+def at(*args):
+    return datetime.datetime(*args)
+
+
+@pytest.mark.parametrize("message, expected", [
+    # Text first
+    ("remind me to eat at 7pm", ("eat", at(2026, 10, 18, 19, 0))),
+    ("remind me to revise in 20 minutes", ("revise", at(2026, 10, 18, 14, 50))),
+    ("remind me to call mom tomorrow", ("call mom", at(2026, 10, 19, 9, 0))),
+    ("remind me to run friday 9am", ("run", at(2026, 10, 23, 9, 0))),
+    ("remind me to read tonight at 9", ("read", at(2026, 10, 18, 21, 0))),
+    # Time first
+    ("remind me at 7pm to eat", ("eat", at(2026, 10, 18, 19, 0))),
+    ("remind me tomorrow at 9 to submit the essay", ("submit the essay", at(2026, 10, 19, 9, 0))),
+    ("remind me on friday about the exam", ("the exam", at(2026, 10, 23, 9, 0))),
+    # Hours without am/pm
+    ("remind me to study at 11", ("study", at(2026, 10, 18, 23, 0))),
+    ("remind me to study at 4:15", ("study", at(2026, 10, 18, 16, 15))),
+    ("remind me to eat at 1:30", ("eat", at(2026, 10, 19, 13, 30))),
+    ("remind me to eat at 1:30 am", ("eat", at(2026, 10, 19, 1, 30))),
+    ("remind me to wake up at 06:00", ("wake up", at(2026, 10, 19, 6, 0))),
+    ("remind me to revise tomorrow at 3", ("revise", at(2026, 10, 19, 15, 0))),
+    # Dates
+    ("remind me to pay rent on the 1st", ("pay rent", at(2026, 11, 1, 9, 0))),
+    ("remind me to submit on the 18th at 5pm", ("submit", at(2026, 10, 18, 17, 0))),
+    ("remind me to submit on the 18th at 1pm", ("submit", at(2026, 11, 18, 13, 0))),
+    ("remind me to renew on the 31st", ("renew", at(2026, 10, 31, 9, 0))),
+    ("remind me to enrol on jan 5", ("enrol", at(2027, 1, 5, 9, 0))),
+    ("remind me to study today", ("study", at(2026, 10, 18, 15, 0))),
+    ("remind me to study today at 5", ("study", at(2026, 10, 18, 17, 0))),
+])
+def test_parse_reminder(message, expected):
+    now = local_now(FakeClock(SUNDAY_AFTERNOON), 0)
+    assert parse_reminder(message, now) == expected
+
+
+def test_unmarked_hour_is_today_when_still_ahead():
+    now = local_now(FakeClock(at(2026, 10, 18, 12, 30)), 0)
+    assert parse_reminder("remind me to eat at 1:30", now) == ("eat", at(2026, 10, 18, 13, 30))
+
+
+def test_today_before_the_default_hour():
+    assert parse_when("today", at(2026, 10, 18, 8, 0)) == at(2026, 10, 18, 9, 0)
+
+
+def test_day_of_month_skips_short_months():
+    assert parse_when("on the 31st", at(2026, 11, 2, 10, 0)) == at(2026, 12, 31, 9, 0)
+
+
+@pytest.mark.parametrize("message", ["remind me", "remind me to study", "what is recursion"])
+def test_parse_reminder_needs_a_time(message):
+    assert parse_reminder(message, SUNDAY_AFTERNOON) is None
+
+
+@pytest.mark.parametrize("text", ["in 99999999 days", "in 9999999999999 days", "in 5000 weeks", "on 9999-12-31",
+                                  "at 5pm +99999"])
+def test_parse_when_refuses_unusable_times(text):
+    assert parse_when(text, SUNDAY_AFTERNOON) is None
+
+
+def test_parse_when_reads_an_offset_as_local_time():
+    assert parse_when("at 5pm +0530", SUNDAY_AFTERNOON) == at(2026, 10, 18, 17, 0)
+
+
+def test_parse_reminder_without_text():
+    assert parse_reminder("remind me at 7pm", SUNDAY_AFTERNOON) == ("your reminder", at(2026, 10, 18, 19, 0))
+
+
+def test_parsed_reminder_fires_at_its_time(tmp_path):
+    clock = FakeClock(SUNDAY_AFTERNOON)
+    delivered = []
+    scheduler = ReminderScheduler(ReminderStore(str(tmp_path / "reminders.db"), clock=clock),
+                                  lambda user_id, reminders: delivered.extend(reminders), clock=clock)
+    text, when = parse_reminder("remind me at 3pm to stretch", local_now(clock, 0))
+    scheduler.schedule("u1", text, to_timestamp(when, 0))
+
+    clock.advance(29 * 60)
+    assert scheduler.run_due() == 0
+    clock.advance(60)
+    assert scheduler.run_due() == 1
+    assert [r.text for r in delivered] == ["stretch"]
@@ -0,0 +1,26 @@
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    os.environ.update(CONTENT_WATCH="0", REMINDER_SCHEDULER="0",
+                      STATE_DIR=str(tmp_path_factory.mktemp("state")))
+    return importlib.import_module("app")
+
+
+def test_resources_survives_a_broken_notes_manifest(app_module):
+    index = app_module.notes_index
+    with open(index.manifest_path, encoding="utf-8") as f:
+        manifest = f.read()
+    try:
+        with open(index.manifest_path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        response = app_module.app.test_client().get("/resources?topic=python")
+        assert response.status_code == 200
+        assert response.get_json()["success"]
+    finally:
+        with open(index.manifest_path, "w", encoding="utf-8") as f:
+            f.write(manifest)
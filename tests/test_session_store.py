@@ -0,0 +1,51 @@
+import pytest
+
+from session_store import MemorySessionStore, SessionStore, SQLiteSessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_incomplete_backend_fails_when_created():
+    class NoStats(SessionStore):
+        def get(self, user_id, key):
+            return None
+
+        def set(self, user_id, key, value):
+            pass
+
+        def clear(self, user_id):
+            pass
+
+    with pytest.raises(TypeError):
+        NoStats()
+
+
+@pytest.mark.parametrize("make", [
+    lambda tmp_path, clock: MemorySessionStore(ttl=60, clock=clock),
+    lambda tmp_path, clock: SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=60, clock=clock),
+])
+def test_sessions_expire_after_ttl(tmp_path, make):
+    clock = FakeClock()
+    store = make(tmp_path, clock)
+    store.set("u1", "quiz", {"index": 2})
+    assert store.get("u1", "quiz") == {"index": 2}
+    clock.now += 61
+    assert store.get("u1", "quiz") is None
+    stats = store.stats()
+    assert stats["expirations"] == 1 and stats["live_sessions"] == 0
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_sessions=2, clock=FakeClock())
+    for user_id in ("u1", "u2"):
+        store.set(user_id, "k", 1)
+    store.get("u1", "k")
+    store.set("u3", "k", 1)
+    assert store.get("u2", "k") is None and store.get("u1", "k") == 1
+    assert store.stats()["evictions"] == 1
@@ -0,0 +1,28 @@
+import json
+import os
+
+import pytest
+
+from conftest import ROOT
+from spelling import SpellingIndex
+
+# Written by train_model.py (CI runs it before the tests); not committed
+SHIPPED_INDEX = os.path.join(ROOT, "spelling.json")
+INTENTS = [{"tag": "goodbye", "patterns": ["bye", "see you later"]}, {"tag": "quiz", "patterns": ["quiz me"]}]
+
+
+@pytest.mark.skipif(not os.path.exists(SHIPPED_INDEX), reason="spelling.json is built by train_model.py")
+@pytest.mark.parametrize("message", ["what is a byte", "explain sorting", "teach me calculus"])
+def test_shipped_index_leaves_real_words_alone(message):
+    index = SpellingIndex.load(SHIPPED_INDEX)
+    assert index.dictionary
+    assert index.correct_spans(message) == (message, [])
+
+
+def test_saved_index_round_trips_as_json(tmp_path):
+    path = tmp_path / "spelling.json"
+    SpellingIndex.from_intents(INTENTS, dictionary={"byte"}).save(path)
+    json.loads(path.read_text(encoding="utf-8"))
+    index = SpellingIndex.load(path)
+    assert index.correct("quizz me") == "quiz me"
+    assert index.correct("what is a byte") == "what is a byte"
@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_app_creates_a_missing_state_dir(tmp_path):
+    state_dir = tmp_path / "not" / "created" / "yet"
+    env = dict(os.environ, CONTENT_WATCH="0", REMINDER_SCHEDULER="0", STATE_DIR=str(state_dir))
+    result = subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, env=env, capture_output=True, text=True,
+                            timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert (state_dir / "chat_history.db").exists()
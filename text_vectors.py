@@ -0,0 +1,38 @@
+import math
+import re
+from collections import Counter
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9+#]+")
+
+
+def normalize_text(text):
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+def char_ngrams(text, n=3):
+    """Character n-grams of each word, padded so short words and word edges still count."""
+    grams = []
+    for word in normalize_text(text).split():
+        padded = f" {word} "
+        if len(padded) <= n:
+            grams.append(padded)
+        else:
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def term_vector(terms):
+    """Sublinear TF weights, L2-normalized, as a sparse dict."""
+    counts = Counter(terms)
+    weights = {term: 1.0 + math.log(count) for term, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    if not norm:
+        return {}
+    return {term: w / norm for term, w in weights.items()}
+
+
+def cosine(a, b):
+    """Dot product of two L2-normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(term, 0.0) for term, w in a.items())
@@ -1,45 +1,41 @@
+import argparse
+import hashlib
 import json
-import nltk
-from nltk.stem import WordNetLemmatizer
-from nltk.corpus import stopwords # Import stopwords for a more comprehensive list
+import os
 import pickle
-import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 
+import nltk
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import LabelBinarizer # For one-hot encoding labels if needed for some classifiers
-
-# --- NLTK Data Downloads ---
-# Download necessary NLTK data (run once)
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    print("Downloading NLTK 'punkt' tokenizer data...")
-    nltk.download('punkt')
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    print("Downloading NLTK 'wordnet' corpus data...")
-    nltk.download('wordnet')
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    print("Downloading NLTK 'stopwords' corpus data...")
-    nltk.download('stopwords')
-
-# --- Initialize Lemmatizer and Stop Words ---
-lemmatizer = WordNetLemmatizer()
-# Combine custom ignore words with NLTK's English stopwords for a more robust set
-ignore_words_set = set(['?', '!', '.', ',', 'is', 'a', 'the', 'and', 'to', 'in', 'for', 'on', 'of', 'that', 'it', 'you', 'this', 'are', 'with', 'as', 'at', 'by', 'an', 'be', 'not']).union(set(stopwords.words('english')))
-
-# --- Custom Tokenizer for TfidfVectorizer ---
-# This function will be used by TfidfVectorizer to preprocess text
-# It ensures consistency with how you might preprocess text in the chatbot
-def custom_tokenizer(text):
-    """Tokenizes, lemmatizes, and filters stop words from a sentence."""
-    word_list = nltk.word_tokenize(text.lower())
-    return [lemmatizer.lemmatize(word) for word in word_list if word.isalnum() and word not in ignore_words_set]
+
+# --- NLTK Data ---
+NLTK_DATA = {'punkt': 'tokenizers/punkt', 'wordnet': 'corpora/wordnet', 'stopwords': 'corpora/stopwords'}
+
+def ensure_nltk_data():
+    """Download the NLTK data custom_tokenizer needs, once per machine."""
+    for name, path in NLTK_DATA.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            print(f"Downloading NLTK '{name}' data...")
+            nltk.download(name, quiet=True)
+
+# preprocessing reads the stop word list when it is imported
+ensure_nltk_data()
+
+# Tokenizer, lemmatizer and stop words are shared with app.py so the pickled
+# pipeline references an importable module instead of __main__.
+from preprocessing import custom_tokenizer, ignore_words_set, build_lemma_table, english_words, PretokenizedLookup
+from model_artifacts import export_pipeline
+from spelling import SpellingIndex
+
+# Bump when custom_tokenizer changes so cached tokens are not reused
+TOKENIZER_VERSION = 1
 
 # --- Data Loading ---
 def load_intents(filename='intents.json'):
@@ -56,68 +52,210 @@ def load_intents(filename='intents.json'):
         print(f"Error: The JSON file {filename} is not properly formatted.")
         return None
 
-# Load intents data
-intents_data = load_intents()
+# --- Stage Timing ---
+stage_times = {}
 
-# --- Prepare Training Data for Pipeline ---
-# The pipeline expects raw text for TF-IDF and corresponding labels
-patterns_text = [] # Stores raw text patterns
-labels = []        # Stores corresponding intent tags
-classes = []       # Stores unique intent tags
+@contextmanager
+def stage(name):
+    """Record how long a training stage takes for the final breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_times[name] = stage_times.get(name, 0.0) + time.perf_counter() - started
+
+def print_timings():
+    total = sum(stage_times.values())
+    print("\nTiming breakdown:")
+    for name, seconds in stage_times.items():
+        print(f"  {name:<12} {seconds:8.3f}s")
+    print(f"  {'total':<12} {total:8.3f}s")
+
+# --- Tokenization Cache ---
+def content_hash(text):
+    return hashlib.sha1(f"{TOKENIZER_VERSION}:{text}".encode('utf-8')).hexdigest()
+
+def file_hash(filename):
+    with open(filename, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+def intent_hash(intent):
+    return content_hash(json.dumps([intent['tag'], intent.get('patterns', [])], ensure_ascii=False))
+
+def load_cache(path):
+    """Load {'intents': {tag: hash}, 'tokens': {pattern hash: tokens}}, or an empty cache."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'intents': {}, 'tokens': {}}
 
-if intents_data:
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(cache, file)
+    os.replace(tmp_path, path)
+
+def tokenize_patterns(intents_data, cache, workers):
+    """Return {pattern: tokens}, tokenizing only patterns of intents that changed since the last run."""
+    old_tokens = cache['tokens']
+    new_cache = {'intents': {}, 'tokens': {}}
+    tokens_by_text = {}
+    pending = []
+    changed_intents = []
     for intent in intents_data:
+        digest = intent_hash(intent)
+        new_cache['intents'][intent['tag']] = digest
+        unchanged = cache['intents'].get(intent['tag']) == digest
+        if not unchanged:
+            changed_intents.append(intent['tag'])
         for pattern in intent.get('patterns', []):
-            patterns_text.append(pattern) # Append the raw pattern text
-            labels.append(intent['tag'])
-            if intent['tag'] not in classes:
-                classes.append(intent['tag'])
-
-# Sort and save classes
-classes = sorted(list(set(classes)))
-pickle.dump(classes, open('classes.pkl', 'wb'))
-print(f"Classes saved to classes.pkl: {classes}")
+            key = content_hash(pattern)
+            if unchanged and key in old_tokens:
+                tokens_by_text[pattern] = old_tokens[key]
+                new_cache['tokens'][key] = old_tokens[key]
+            elif pattern not in tokens_by_text:
+                pending.append(pattern)
+    pending = list(dict.fromkeys(p for p in pending if p not in tokens_by_text))
+    print(f"{len(changed_intents)} changed intent(s), {len(pending)} pattern(s) to tokenize, "
+          f"{len(tokens_by_text)} reused from cache.")
+    if pending:
+        if workers > 1 and len(pending) >= 64:
+            chunksize = max(1, len(pending) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(custom_tokenizer, pending, chunksize=chunksize))
+        else:
+            results = [custom_tokenizer(pattern) for pattern in pending]
+        for pattern, tokens in zip(pending, results):
+            tokens_by_text[pattern] = tokens
+            new_cache['tokens'][content_hash(pattern)] = tokens
+    return tokens_by_text, new_cache
 
 # --- Model Training Pipeline ---
-# Use a Pipeline to chain TF-IDF vectorization and the classifier
-# The TfidfVectorizer will now take raw text from patterns_text
-# and use our custom_tokenizer for preprocessing.
-intent_model = Pipeline([
-    # 'tfidf' step: Converts text to TF-IDF features
-    ('tfidf', TfidfVectorizer(
-        tokenizer=custom_tokenizer, # Use our custom function for tokenization, lemmatization, stop words
-        lowercase=False,            # Set to False because our custom_tokenizer handles lowercasing
-        min_df=1,                   # Minimum document frequency to include a term
-        ngram_range=(1, 2)          # Consider unigrams and bigrams
-    )),
-    # 'clf' step: The classifier that trains on the TF-IDF features
-    ('clf', MultinomialNB())
-])
-
-# Train the model
-if patterns_text and labels:
-    intent_model.fit(patterns_text, labels) # Fit the pipeline with raw text and labels
-    pickle.dump(intent_model, open('intent_model.pkl', 'wb'))
-    print('Model training complete. Model and classes saved to disk.')
-else:
-    print("No training data found. Model not trained.")
-
-# --- Save 'words.pkl' (Optional, for TF-IDF fallback consistency) ---
-# If your chatbot's TF-IDF fallback specifically relies on a 'words.pkl'
-# for a bag-of-words approach, you can generate it here.
-# However, if the TF-IDF fallback in the chatbot also uses TfidfVectorizer,
-# this file might not be strictly necessary for the fallback either.
-# For now, let's keep it to maintain compatibility with your original chatbot structure.
-all_words = []
-if intents_data:
+def build_pipeline(tokenizer, alpha=1.0, ngram_range=(1, 2)):
+    """TF-IDF vectorization chained with the classifier, fed raw pattern text."""
+    return Pipeline([
+        # 'tfidf' step: Converts text to TF-IDF features
+        ('tfidf', TfidfVectorizer(
+            tokenizer=tokenizer,        # Tokenization, lemmatization, stop words
+            lowercase=False,            # Set to False because our custom_tokenizer handles lowercasing
+            token_pattern=None,         # Unused with a custom tokenizer
+            min_df=1,                   # Minimum document frequency to include a term
+            ngram_range=ngram_range     # Consider unigrams and bigrams
+        )),
+        # 'clf' step: The classifier that trains on the TF-IDF features
+        ('clf', MultinomialNB(alpha=alpha))
+    ])
+
+def sweep(pipeline, patterns_text, labels, folds, jobs):
+    """Cross-validated grid search over smoothing and n-gram range, run in parallel."""
+    smallest_class = min(labels.count(label) for label in set(labels))
+    folds = min(folds, smallest_class)
+    if folds < 2:
+        print("Skipping sweep: every intent needs at least 2 patterns for cross-validation.")
+        return pipeline
+    search = GridSearchCV(
+        pipeline,
+        {
+            'tfidf__ngram_range': [(1, 1), (1, 2)],
+            'tfidf__sublinear_tf': [False, True],
+            'clf__alpha': [0.01, 0.05, 0.1, 0.5, 1.0],
+        },
+        cv=StratifiedKFold(n_splits=folds, shuffle=True, random_state=42),
+        n_jobs=jobs,
+    )
+    search.fit(patterns_text, labels)
+    print(f"Best CV accuracy {search.best_score_:.3f} with {search.best_params_}")
+    return search.best_estimator_
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the intent classifier from intents.json.")
+    parser.add_argument('--intents', default='intents.json', help="intents file to train on")
+    parser.add_argument('--output-dir', default='.', help="where to write intent_model.pkl, classes.pkl, words.pkl, spelling.json and intent_model.bin")
+    parser.add_argument('--cache', default=os.path.join('.train_cache', 'tokens.json'),
+                        help="tokenization cache file")
+    parser.add_argument('--no-cache', action='store_true', help="ignore and do not update the tokenization cache")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="processes used for tokenization and the sweep")
+    parser.add_argument('--sweep', action='store_true', help="run a cross-validated hyperparameter sweep")
+    parser.add_argument('--folds', type=int, default=5, help="cross-validation folds for --sweep")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with stage('load'):
+        intents_data = load_intents(args.intents)
+    if not intents_data:
+        print("No training data found. Model not trained.")
+        return 1
+
+    # --- Prepare Training Data for Pipeline ---
+    # The pipeline expects raw text for TF-IDF and corresponding labels
+    patterns_text = [] # Stores raw text patterns
+    labels = []        # Stores corresponding intent tags
     for intent in intents_data:
         for pattern in intent.get('patterns', []):
-            word_list = custom_tokenizer(pattern) # Use the same tokenizer
-            all_words.extend(word_list)
-words = sorted(list(set(all_words)))
-pickle.dump(words, open('words.pkl', 'wb'))
-print(f"Words saved to words.pkl: {len(words)} unique words.")
+            patterns_text.append(pattern)
+            labels.append(intent['tag'])
+    classes = sorted(set(labels))
+    if not patterns_text:
+        print("No training data found. Model not trained.")
+        return 1
+
+    with stage('tokenize'):
+        cache = {'intents': {}, 'tokens': {}} if args.no_cache else load_cache(args.cache)
+        tokens_by_text, new_cache = tokenize_patterns(intents_data, cache, args.workers)
+        if not args.no_cache:
+            save_cache(args.cache, new_cache)
+
+    # Fit on the cached tokens, then ship the real tokenizer: both produce identical tokens
+    pipeline = build_pipeline(PretokenizedLookup(tokens_by_text))
+    if args.sweep:
+        with stage('sweep'):
+            pipeline = sweep(pipeline, patterns_text, labels, args.folds, args.workers)
+    with stage('fit'):
+        pipeline.fit(patterns_text, labels)
+        pipeline.set_params(tfidf__tokenizer=custom_tokenizer)
+
+    with stage('save'):
+        os.makedirs(args.output_dir, exist_ok=True)
+        with open(os.path.join(args.output_dir, 'classes.pkl'), 'wb') as f:
+            pickle.dump(classes, f)
+        print(f"Classes saved to classes.pkl: {classes}")
+        with open(os.path.join(args.output_dir, 'intent_model.pkl'), 'wb') as f:
+            pickle.dump(pipeline, f)
+        print('Model training complete. Model and classes saved to disk.')
+        # 'words.pkl': the vocabulary of lemmatized pattern words
+        words = sorted({word for tokens in tokens_by_text.values() for word in tokens})
+        with open(os.path.join(args.output_dir, 'words.pkl'), 'wb') as f:
+            pickle.dump(words, f)
+        print(f"Words saved to words.pkl: {len(words)} unique words.")
+        # Typo-tolerant intent lookup: symmetric-delete index over the raw pattern words,
+        # which the pattern matcher compares against (words.pkl holds lemmas). The English
+        # dictionary keeps correctly spelled words the patterns never use from being "corrected".
+        spelling = SpellingIndex.from_intents(intents_data, dictionary=english_words())
+        spelling.save(os.path.join(args.output_dir, 'spelling.json'))
+        print(f"Spelling index saved to spelling.json: {len(spelling)} words, {len(spelling.dictionary)} dictionary words.")
+        # Memory-mappable artifact for serving; the pickles stay for older deployments
+        export_pipeline(
+            pipeline,
+            os.path.join(args.output_dir, 'intent_model.bin'),
+            content_hash=file_hash(args.intents),
+            tokenizer={
+                'name': 'custom_tokenizer',
+                'stop_words': sorted(ignore_words_set),
+                # Lets intent_inference.py lemmatize without WordNet: the table, then noun suffix rules
+                'lemmas': build_lemma_table(patterns_text, words),
+                'lemma_fallback': 'noun_rules',
+            },
+        )
+        print("Model artifact saved to intent_model.bin.")
+
+    print_timings()
+    return 0
 
 
 if __name__ == '__main__':
-    print("Script finished.")
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool already holds max_workers + max_queue calls."""
+
+
+def _make_runner(async_mode, max_workers):
+    """Return a function that runs a zero-argument call on a real OS thread and waits for it."""
+    if async_mode == "eventlet":
+        from eventlet import tpool
+        tpool.set_num_threads(max_workers)
+        return tpool.execute
+    if async_mode == "gevent":
+        import gevent
+        threadpool = gevent.get_hub().threadpool
+        threadpool.maxsize = max_workers
+        return threadpool.apply
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nlp-worker")
+    return lambda call: executor.submit(call).result()
+
+
+class WorkerPool:
+    """Bounded pool for CPU-bound NLP work, kept off the socket handler's event loop.
+
+    Calls beyond max_workers wait in a queue of at most max_queue; anything past
+    that is rejected with PoolSaturated so callers can shed load instead of piling up.
+    """
+
+    def __init__(self, max_workers=4, max_queue=64, async_mode="threading"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.async_mode = async_mode
+        self._runner = _make_runner(async_mode, max_workers)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(f"{self._pending} calls already pending")
+            self._pending += 1
+
+        def call():
+            with self._lock:
+                self._in_flight += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+        try:
+            return self._runner(call)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "async_mode": self.async_mode,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queue_depth": self._pending - self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }